@@ -22,10 +22,83 @@ app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
 app.config['UPLOAD_FOLDER'] = 'uploads'
 app.config['REPORTS_FOLDER'] = 'reports'
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+# Keep a copy of each uploaded CV (written asynchronously, named by content hash)
+app.config['PERSIST_UPLOADS'] = os.environ.get("PERSIST_UPLOADS", "1") == "1"
+
+# CV analysis cache (in-process LRU tier + persistent database tier)
+app.config['CV_CACHE_TTL_SECONDS'] = int(os.environ.get("CV_CACHE_TTL_SECONDS", 7 * 24 * 3600))
+app.config['CV_CACHE_MEMORY_ENTRIES'] = int(os.environ.get("CV_CACHE_MEMORY_ENTRIES", 256))
+app.config['CV_CACHE_MAX_ROWS'] = int(os.environ.get("CV_CACHE_MAX_ROWS", 5000))
+
+# Content-addressed text-to-speech cache
+app.config['AUDIO_CACHE_FOLDER'] = os.path.join(app.config['UPLOAD_FOLDER'], 'tts_cache')
+app.config['AUDIO_CACHE_MAX_BYTES'] = int(os.environ.get("AUDIO_CACHE_MAX_BYTES", 200 * 1024 * 1024))
+app.config['AUDIO_CACHE_WARMUP'] = os.environ.get("AUDIO_CACHE_WARMUP", "0") == "1"
+# How long /api/submit_turn waits for the next question's audio before returning
+app.config['TURN_AUDIO_WAIT_SECONDS'] = float(os.environ.get("TURN_AUDIO_WAIT_SECONDS", 10))
+
+# Server-side transcription of recorded answer segments (see
+# services/transcription_service.py for the STT_* backend settings)
+app.config['RECORDINGS_FOLDER'] = os.path.join(app.config['UPLOAD_FOLDER'], 'recordings')
+app.config['STT_FINISH_TIMEOUT_SECONDS'] = float(os.environ.get("STT_FINISH_TIMEOUT_SECONDS", 15))
+
+# Background jobs (report generation). Set JOB_WORKERS_IN_PROCESS=0 and run
+# `flask run-job-worker` separately to keep web workers free for interviews.
+app.config['JOB_WORKERS'] = int(os.environ.get("JOB_WORKERS", 2))
+app.config['JOB_WORKERS_IN_PROCESS'] = os.environ.get("JOB_WORKERS_IN_PROCESS", "1") == "1"
+app.config['JOB_POLL_INTERVAL_SECONDS'] = float(os.environ.get("JOB_POLL_INTERVAL_SECONDS", 1.0))
+app.config['JOB_STALE_SECONDS'] = int(os.environ.get("JOB_STALE_SECONDS", 300))
+app.config['JOB_MAX_ATTEMPTS'] = int(os.environ.get("JOB_MAX_ATTEMPTS", 3))
+
+# Time budget of a request; Gemini and ElevenLabs calls get what is left of it
+# (see services/resilience.py for the circuit breaker settings). Clients may
+# ask for less with an X-Request-Timeout header.
+app.config['REQUEST_BUDGET_SECONDS'] = float(os.environ.get("REQUEST_BUDGET_SECONDS", 30))
+app.config['REQUEST_BUDGET_OVERRIDES'] = {
+    'api.analyze_cv': float(os.environ.get("ANALYZE_CV_BUDGET_SECONDS", 90)),
+}
+
+# Fold each answer into a persisted rolling summary in the background, so the
+# final report only has to finalize it
+app.config['ROLLING_SUMMARY_ENABLED'] = os.environ.get("ROLLING_SUMMARY_ENABLED", "1") == "1"
+
+# Storage janitor: per-directory quotas and age/idle limits (0 disables a limit).
+# Files of sessions updated within JANITOR_ACTIVE_SESSION_HOURS are never evicted.
+app.config['JANITOR_ENABLED'] = os.environ.get("JANITOR_ENABLED", "1") == "1"
+app.config['JANITOR_INTERVAL_SECONDS'] = int(os.environ.get("JANITOR_INTERVAL_SECONDS", 3600))
+app.config['JANITOR_ACTIVE_SESSION_HOURS'] = int(os.environ.get("JANITOR_ACTIVE_SESSION_HOURS", 48))
+app.config['JANITOR_POLICIES'] = {
+    'uploads': {
+        'max_bytes': int(os.environ.get("JANITOR_UPLOADS_MAX_BYTES", 1024 * 1024 * 1024)) or None,
+        'max_files': int(os.environ.get("JANITOR_UPLOADS_MAX_FILES", 5000)) or None,
+        'max_age_days': int(os.environ.get("JANITOR_UPLOADS_MAX_AGE_DAYS", 90)) or None,
+        'max_idle_days': None
+    },
+    'audio_cache': {
+        'max_bytes': app.config['AUDIO_CACHE_MAX_BYTES'],
+        'max_files': int(os.environ.get("JANITOR_AUDIO_MAX_FILES", 20000)) or None,
+        'max_age_days': None,
+        'max_idle_days': int(os.environ.get("JANITOR_AUDIO_MAX_IDLE_DAYS", 30)) or None
+    },
+    'recordings': {
+        'max_bytes': int(os.environ.get("JANITOR_RECORDINGS_MAX_BYTES", 1024 * 1024 * 1024)) or None,
+        'max_files': None,
+        'max_age_days': int(os.environ.get("JANITOR_RECORDINGS_MAX_AGE_DAYS", 30)) or None,
+        'max_idle_days': None
+    },
+    'reports': {
+        'max_bytes': int(os.environ.get("JANITOR_REPORTS_MAX_BYTES", 2 * 1024 * 1024 * 1024)) or None,
+        'max_files': int(os.environ.get("JANITOR_REPORTS_MAX_FILES", 10000)) or None,
+        'max_age_days': int(os.environ.get("JANITOR_REPORTS_MAX_AGE_DAYS", 0)) or None,
+        'max_idle_days': None
+    }
+}
 
 # Create directories if they don't exist
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 os.makedirs(app.config['REPORTS_FOLDER'], exist_ok=True)
+os.makedirs(app.config['AUDIO_CACHE_FOLDER'], exist_ok=True)
+os.makedirs(app.config['RECORDINGS_FOLDER'], exist_ok=True)
 
 # Configure the database
 app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL", "sqlite:///assessment.db")
@@ -49,3 +122,42 @@ with app.app_context():
 
     # Create all tables
     db.create_all()
+
+    # Migrate existing data to the current schema
+    from migrations import run_migrations
+    run_migrations(app)
+
+    # Time requests and DB commits for the /metrics endpoint
+    from services.metrics import register_metrics
+    register_metrics(app)
+
+    # Derive upstream call deadlines from each request's budget
+    from services.resilience import register_request_deadlines
+    register_request_deadlines(app)
+
+    # Register CLI commands
+    from commands import register_commands
+    register_commands(app)
+
+
+def start_background_services(app):
+    """
+    Start the job dispatcher, storage janitor and audio warm-up threads.
+    Only web server processes call this (gunicorn.conf.py, main.py), so
+    importing the app for a CLI command never claims background jobs.
+    """
+    with app.app_context():
+        # Run queued background jobs in this process
+        if app.config['JOB_WORKERS_IN_PROCESS']:
+            from services.job_queue import start_background_workers
+            start_background_workers(app)
+
+        # Optionally pre-render static question audio in the background
+        if app.config['AUDIO_CACHE_WARMUP']:
+            from services.audio_cache import start_background_warmup
+            start_background_warmup(app)
+
+        # Periodically enforce storage quotas
+        if app.config['JANITOR_ENABLED']:
+            from services.storage_janitor import start_background_janitor
+            start_background_janitor(app)
@@ -0,0 +1,157 @@
+"""
+Synthetic, seeded corpus for the CPU micro-benchmarks: CVs as PDF and DOCX
+of several sizes, interview Q&A sets and Markdown summaries like the ones
+Gemini returns. The same seed always produces the same texts.
+"""
+import io
+import random
+
+import docx
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import PageBreak, Paragraph, SimpleDocTemplate, Spacer
+
+DEFAULT_SEED = 1234
+
+# Pages per PDF CV: below, at and above PDF_PARALLEL_MIN_PAGES, and past PDF_MAX_PAGES
+PDF_PAGE_COUNTS = (1, 5, 20, 50)
+# Experience entries per DOCX CV
+DOCX_ENTRY_COUNTS = (5, 40, 200)
+QA_COUNTS = (4, 8, 16)
+# Sections per summary
+SUMMARY_SIZES = {'short': 2, 'medium': 6, 'long': 20}
+
+ROLES = ["Ingénieur logiciel", "Cheffe de projet", "Analyste de données",
+         "Responsable RH", "Consultant SAP", "Architecte cloud",
+         "Chargée de communication", "Contrôleur de gestion"]
+COMPANIES = ["Orange", "Capgemini", "Decathlon", "BNP Paribas", "Airbus",
+             "Sopra Steria", "Michelin", "La Poste"]
+SKILLS = ["Python", "SQL", "gestion de projet", "Scrum", "Power BI",
+          "négociation", "encadrement", "AWS", "Excel avancé", "SAP FI",
+          "communication écrite", "analyse financière", "Kubernetes"]
+ACHIEVEMENTS = [
+    "réduction de {n} % des délais de traitement",
+    "encadrement d'une équipe de {n} personnes",
+    "migration de {n} applications vers le cloud",
+    "hausse de {n} % de la satisfaction client",
+    "déploiement d'un outil utilisé par {n} collaborateurs",
+]
+QUESTIONS = [
+    "Pouvez-vous décrire une situation où vous avez dû convaincre votre équipe d'adopter une nouvelle approche ?",
+    "Quel projet récent illustre le mieux votre façon de gérer les priorités sous contrainte de délai ?",
+    "Comment accompagnez-vous la montée en compétences des membres moins expérimentés ?",
+    "Quelle décision difficile avez-vous prise récemment et qu'en avez-vous appris ?",
+    "Comment voyez-vous évoluer votre rôle dans les trois prochaines années ?",
+]
+ANSWER_SENTENCES = [
+    "Dans mon poste actuel, j'ai piloté la migration de notre plateforme vers une architecture orientée services.",
+    "Nous avons réduit les temps de réponse de 40 % en six mois grâce à un travail sur les requêtes et le cache.",
+    "J'encadre une équipe de cinq personnes et j'organise des points de suivi hebdomadaires.",
+    "Je souhaite évoluer vers un rôle d'architecte et renforcer ma vision produit.",
+    "Le plus grand défi a été de convaincre les équipes métier de revoir leurs priorités.",
+    "J'ai appris à mieux déléguer et à formaliser les décisions pour toute l'équipe.",
+]
+SUMMARY_HEADINGS = ["Points forts", "Axes de développement", "Compétences démontrées",
+                    "Motivation", "Recommandations", "Adéquation au poste"]
+
+
+def _experience_entry(rng: random.Random, year: int) -> str:
+    achievement = rng.choice(ACHIEVEMENTS).format(n=rng.randint(3, 60))
+    skills = ", ".join(rng.sample(SKILLS, 3))
+    return (f"{year} - {rng.choice(ROLES)} chez {rng.choice(COMPANIES)} : "
+            f"{achievement}, utilisation quotidienne de {skills}, "
+            f"coordination avec les équipes métier et reporting à la direction.")
+
+
+def make_pdf_cv(pages: int, seed: int = DEFAULT_SEED) -> bytes:
+    """
+    Text CV with exactly the given number of pages
+    Output: PDF bytes
+    """
+    rng = random.Random(seed * 1000 + pages)
+    styles = getSampleStyleSheet()
+    story = [Paragraph(f"{rng.choice(ROLES)} - CV synthétique ({pages} pages)", styles['Title'])]
+    year = 2024
+    for page in range(pages):
+        if page:
+            story.append(PageBreak())
+        story.append(Paragraph(f"Expériences professionnelles ({page + 1})", styles['Heading2']))
+        # Nine entries fit on one A4 page, so each page break starts a new page
+        for _ in range(9):
+            story.append(Paragraph(_experience_entry(rng, year), styles['BodyText']))
+            year = year - 1 if year > 1990 else 2024
+        story.append(Spacer(1, 6))
+    buffer = io.BytesIO()
+    SimpleDocTemplate(buffer, pagesize=A4, invariant=1).build(story)
+    return buffer.getvalue()
+
+
+def make_docx_cv(entries: int, seed: int = DEFAULT_SEED) -> bytes:
+    """
+    CV with a heading, a skills list and the given number of experience entries
+    Output: DOCX bytes
+    """
+    rng = random.Random(seed * 1000 + entries)
+    document = docx.Document()
+    document.add_heading(f"{rng.choice(ROLES)} - CV synthétique ({entries} expériences)", 0)
+    document.add_heading("Compétences", level=1)
+    for skill in rng.sample(SKILLS, 6):
+        document.add_paragraph(skill, style='List Bullet')
+    document.add_heading("Expériences professionnelles", level=1)
+    for i in range(entries):
+        document.add_paragraph(_experience_entry(rng, 2024 - i % 35))
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def make_cv_analysis(seed: int = DEFAULT_SEED) -> dict:
+    rng = random.Random(seed)
+    return {
+        'summary': f"{rng.choice(ROLES)} avec une solide expérience et une forte capacité d'adaptation.",
+        'key_skills': rng.sample(SKILLS, 8),
+        'experience_years': rng.randint(2, 25),
+        'career_stage': rng.choice(['Junior', 'Confirmé', 'Senior']),
+        'notable_achievements': [a.format(n=rng.randint(3, 60)) for a in rng.sample(ACHIEVEMENTS, 3)],
+        'potential_areas_for_growth': ['Communication avec les parties prenantes', 'Stratégie produit'],
+    }
+
+
+def make_qa_pairs(count: int, seed: int = DEFAULT_SEED) -> list:
+    """Q&A pairs shaped like get_questions_answers() returns them"""
+    rng = random.Random(seed * 1000 + count)
+    return [
+        {
+            'question': rng.choice(QUESTIONS),
+            'answer': " ".join(rng.choice(ANSWER_SENTENCES) for _ in range(rng.randint(2, 6))),
+        }
+        for _ in range(count)
+    ]
+
+
+def make_summary(sections: int, seed: int = DEFAULT_SEED) -> str:
+    """Markdown summary with bold headings, bullet lists and inline emphasis"""
+    rng = random.Random(seed * 1000 + sections)
+    lines = ["**Synthèse de l'évaluation**", ""]
+    for i in range(sections):
+        lines.append(f"**{SUMMARY_HEADINGS[i % len(SUMMARY_HEADINGS)]} :**")
+        lines.append(f"Le candidat montre *{rng.choice(SKILLS)}* et **{rng.choice(SKILLS)}**, "
+                     f"avec des exemples concrets : {rng.choice(ACHIEVEMENTS).format(n=rng.randint(3, 60))}.")
+        for _ in range(rng.randint(2, 5)):
+            lines.append(f"* **{rng.choice(SKILLS)}** : {rng.choice(ANSWER_SENTENCES)}")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def build_corpus(seed: int = DEFAULT_SEED) -> dict:
+    """
+    Every input of the benchmark suite
+    Output: dict of case name -> input
+    """
+    return {
+        'pdf': {f"{pages}p": make_pdf_cv(pages, seed) for pages in PDF_PAGE_COUNTS},
+        'docx': {f"{entries}e": make_docx_cv(entries, seed) for entries in DOCX_ENTRY_COUNTS},
+        'cv_analysis': make_cv_analysis(seed),
+        'qa_pairs': {f"{count}qa": make_qa_pairs(count, seed) for count in QA_COUNTS},
+        'summaries': {name: make_summary(sections, seed) for name, sections in SUMMARY_SIZES.items()},
+    }
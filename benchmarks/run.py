@@ -0,0 +1,219 @@
+"""
+CPU micro-benchmarks of the CV and report hot paths over the synthetic corpus
+in benchmarks/corpus.py: PDF and DOCX text extraction, Markdown to ReportLab
+conversion of summaries and full report generation. Each case is timed over
+several repeats after a warmup, then run once more under tracemalloc for its
+peak memory.
+
+    python -m benchmarks.run --json results.json
+    python -m benchmarks.run --baseline previous.json --threshold 0.2
+
+With --baseline the run exits with status 1 when a case's median is more
+than --threshold slower than in the baseline file.
+"""
+import argparse
+import io
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from reportlab.platypus import Paragraph
+
+from benchmarks.corpus import DEFAULT_SEED, build_corpus
+from services.cv_processor import (
+    PDF_MAX_CHARS, PDF_MAX_PAGES, PDF_PARALLEL_MIN_PAGES, PDF_WORKERS,
+    _reset_pdf_pool, extract_text_from_docx, extract_text_from_pdf
+)
+from services.document_service import (
+    generate_assessment_report, get_report_styles, replace_markdown
+)
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Report cases pair Q&A sets with summaries of matching length
+REPORT_CASES = (('4qa', 'short'), ('8qa', 'medium'), ('16qa', 'long'))
+
+
+def convert_summary(summary: str, style) -> list:
+    """Every summary line through replace_markdown and the ReportLab markup parser"""
+    return [Paragraph(replace_markdown(line.strip().strip('* ')), style)
+            for line in summary.split('\n') if line.strip()]
+
+
+def build_cases(corpus: dict, workdir: str) -> list:
+    """
+    Benchmark cases as (stage, case, function) with the inputs already bound
+    """
+    cases = []
+    for name, pdf_bytes in corpus['pdf'].items():
+        path = os.path.join(workdir, f"cv_{name}.pdf")
+        with open(path, 'wb') as file:
+            file.write(pdf_bytes)
+        cases.append(('extract_pdf', name, lambda path=path: extract_text_from_pdf(path)))
+
+    for name, docx_bytes in corpus['docx'].items():
+        cases.append(('extract_docx', name,
+                      lambda data=docx_bytes: extract_text_from_docx(io.BytesIO(data))))
+
+    body_style = get_report_styles()['body']
+    for name, summary in corpus['summaries'].items():
+        cases.append(('markdown', name,
+                      lambda summary=summary: convert_summary(summary, body_style)))
+
+    output_path = os.path.join(workdir, 'report.pdf')
+    for qa_name, summary_name in REPORT_CASES:
+        cases.append(('report_pdf', f"{qa_name}_{summary_name}",
+                      lambda qa_pairs=corpus['qa_pairs'][qa_name],
+                      summary=corpus['summaries'][summary_name]:
+                      generate_assessment_report(corpus['cv_analysis'], qa_pairs,
+                                                 summary, output_path)))
+    return cases
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def measure(func, repeat: int, warmup: int) -> dict:
+    """
+    Wall-clock and CPU time over repeat runs, then the tracemalloc peak of
+    one more run. CPU time and memory used in PDF pool workers (documents of
+    PDF_PARALLEL_MIN_PAGES pages or more) are not counted.
+    """
+    for _ in range(warmup):
+        func()
+
+    wall, cpu = [], []
+    for _ in range(repeat):
+        started, started_cpu = time.perf_counter(), time.process_time()
+        func()
+        wall.append(time.perf_counter() - started)
+        cpu.append(time.process_time() - started_cpu)
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'repeat': repeat,
+        'min_seconds': min(wall),
+        'median_seconds': statistics.median(wall),
+        'p95_seconds': percentile(wall, 95),
+        'max_seconds': max(wall),
+        'cpu_median_seconds': statistics.median(cpu),
+        'peak_memory_bytes': peak,
+    }
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=REPO_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def run_benchmarks(repeat: int, warmup: int, seed: int, only: list = None) -> dict:
+    """
+    Build the corpus and measure every case
+    Output: results with the environment they were measured in
+    """
+    corpus = build_corpus(seed)
+    results = []
+    with tempfile.TemporaryDirectory(prefix='cv-bench-') as workdir:
+        try:
+            for stage, case, func in build_cases(corpus, workdir):
+                if only and stage not in only:
+                    continue
+                result = {'stage': stage, 'case': case}
+                result.update(measure(func, repeat, warmup))
+                results.append(result)
+        finally:
+            _reset_pdf_pool()
+
+    return {
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'git_commit': _git_commit(),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'seed': seed,
+        'settings': {
+            'PDF_MAX_PAGES': PDF_MAX_PAGES,
+            'PDF_MAX_CHARS': PDF_MAX_CHARS,
+            'PDF_PARALLEL_MIN_PAGES': PDF_PARALLEL_MIN_PAGES,
+            'PDF_WORKERS': PDF_WORKERS,
+        },
+        'results': results,
+    }
+
+
+def compare(report: dict, baseline: dict, threshold: float) -> list:
+    """
+    Cases whose median grew by more than threshold (0.2 = 20 %) over the baseline
+    Output: list of (stage, case, baseline median, current median)
+    """
+    previous = {(r['stage'], r['case']): r['median_seconds'] for r in baseline.get('results', [])}
+    regressions = []
+    for result in report['results']:
+        before = previous.get((result['stage'], result['case']))
+        if before and result['median_seconds'] > before * (1 + threshold):
+            regressions.append((result['stage'], result['case'], before, result['median_seconds']))
+    return regressions
+
+
+def print_table(report: dict):
+    print(f"{'stage':<14}{'case':<16}{'median ms':>11}{'p95 ms':>10}{'cpu ms':>10}{'peak KiB':>11}")
+    for r in report['results']:
+        print(f"{r['stage']:<14}{r['case']:<16}{r['median_seconds'] * 1000:>11.2f}"
+              f"{r['p95_seconds'] * 1000:>10.2f}{r['cpu_median_seconds'] * 1000:>10.2f}"
+              f"{r['peak_memory_bytes'] / 1024:>11.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--warmup', type=int, default=2)
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--only', action='append',
+                        choices=['extract_pdf', 'extract_docx', 'markdown', 'report_pdf'],
+                        help="run only this stage (repeatable)")
+    parser.add_argument('--json', help="write the results to this file")
+    parser.add_argument('--baseline', help="results file of an earlier run to compare against")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="allowed median slowdown before failing (default 0.2 = 20%%)")
+    args = parser.parse_args()
+
+    # The services log every report they build; keep the output readable
+    logging.basicConfig(level=logging.WARNING)
+
+    report = run_benchmarks(args.repeat, args.warmup, args.seed, args.only)
+    print_table(report)
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump(report, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        regressions = compare(report, baseline, args.threshold)
+        for stage, case, before, after in regressions:
+            print(f"REGRESSION {stage}[{case}]: {before * 1000:.2f} ms -> {after * 1000:.2f} ms "
+                  f"(+{(after / before - 1) * 100:.0f}%)")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+import logging
+import click
+
+
+def register_commands(app):
+    """Register maintenance commands on the Flask CLI"""
+
+    @app.cli.command('warm-audio-cache')
+    def warm_audio_cache_command():
+        """Pre-render TTS audio for the static fallback questions."""
+        from services.audio_cache import warm_audio_cache
+        stats = warm_audio_cache()
+        click.echo(
+            f"Rendered {stats['rendered']}, already cached {stats['cached']}, failed {stats['failed']}"
+        )
+
+    @app.cli.command('migrate-qa')
+    def migrate_qa_command():
+        """Move legacy JSON Q&A blobs into the QuestionAnswer table."""
+        from migrations import migrate_questions_answers
+        click.echo(f"Migrated {migrate_questions_answers()} sessions")
+
+    @app.cli.command('index-reports')
+    def index_reports_command():
+        """Register report PDFs that are missing from the ReportArtifact table."""
+        from migrations import index_existing_reports
+        count = index_existing_reports(app.config['REPORTS_FOLDER'])
+        click.echo(f"Registered {count} reports")
+
+    @app.cli.command('render-reports')
+    @click.option('--session-id', 'session_ids', multiple=True,
+                  help='Session to re-render (repeatable). Defaults to all completed sessions.')
+    @click.option('--workers', type=int, default=None,
+                  help='Number of rendering processes (defaults to CPU count).')
+    def render_reports_command(session_ids, workers):
+        """Re-render report PDFs with the current layout."""
+        from services.report_service import render_reports_batch
+        stats = render_reports_batch(list(session_ids) or None, workers)
+        click.echo(
+            f"Rendered {stats['rendered']}, skipped {stats['skipped']} (no stored summary), failed {stats['failed']}"
+        )
+
+    @app.cli.command('index-audio')
+    def index_audio_command():
+        """Read duration, bitrate and sample rate for unindexed audio files."""
+        import os
+        from app import db
+        from models import AudioFile
+        from services.audio_metadata import probe_audio
+        indexed = 0
+        for audio_file in AudioFile.query.filter(
+                AudioFile.duration_seconds.is_(None)).yield_per(200):
+            if not os.path.exists(audio_file.file_path):
+                continue
+            audio_file.size_bytes = os.path.getsize(audio_file.file_path)
+            audio_file.set_metadata(probe_audio(audio_file.file_path))
+            indexed += 1
+        db.session.commit()
+        click.echo(f"Indexed {indexed} audio files")
+
+    @app.cli.command('janitor')
+    @click.option('--dry-run', is_flag=True,
+                  help='Report what would be deleted without removing anything.')
+    def janitor_command(dry_run):
+        """Enforce storage quotas on uploads, the TTS cache and reports."""
+        from services.storage_janitor import run_janitor
+        for name, result in run_janitor(dry_run=dry_run).items():
+            action = 'would evict' if dry_run else 'evicted'
+            click.echo(
+                f"{name}: scanned {result['files_scanned']} files ({result['bytes_scanned']} bytes), "
+                f"protected {result['files_protected']}, {action} {result['files_evicted']} "
+                f"({result['bytes_reclaimed']} bytes)")
+
+    @app.cli.command('run-job-worker')
+    @click.option('--workers', type=int, default=None,
+                  help='Number of concurrent jobs (defaults to JOB_WORKERS).')
+    def run_job_worker_command(workers):
+        """Run background jobs (report generation) until interrupted."""
+        from services.job_queue import create_dispatcher
+        if workers:
+            app.config['JOB_WORKERS'] = workers
+        dispatcher = create_dispatcher(app)
+        click.echo(f"Job worker started with {dispatcher.max_workers} slots")
+        try:
+            dispatcher.run_forever()
+        except KeyboardInterrupt:
+            logging.info("Stopping job worker")
+            dispatcher.stop()
@@ -0,0 +1,7 @@
+# Loaded by gunicorn from the working directory (or with --config)
+
+
+def post_worker_init(worker):
+    """Start the background job dispatcher, janitor and audio warm-up in each web worker"""
+    from app import app, start_background_services
+    start_background_services(app)
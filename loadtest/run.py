@@ -0,0 +1,327 @@
+"""
+End-to-end load test: simulated candidates take complete interviews through
+the real routes (upload, analyze_cv, 8x generate_audio + submit_answer,
+generate_report, job polling) while Gemini and ElevenLabs are replaced by
+the local stubs in loadtest/stubs.py.
+
+Against gunicorn configurations started by the harness (workers x threads):
+    python -m loadtest.run --gunicorn 1x4,2x4,4x4 --candidates 40 --concurrency 10
+
+Against an app that is already running (started with the stub env vars):
+    python -m loadtest.run --base-url http://127.0.0.1:5000 --candidates 20
+"""
+import argparse
+import io
+import json
+import logging
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import Paragraph, SimpleDocTemplate
+
+from loadtest.stubs import add_stub_arguments, start_stub_server, stub_config_from_args
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAX_QUESTIONS = 8
+ANSWER_SENTENCES = [
+    "Dans mon poste actuel, j'ai piloté la migration de notre plateforme vers une architecture orientée services.",
+    "Nous avons réduit les temps de réponse de 40 % en six mois grâce à un travail sur les requêtes et le cache.",
+    "J'encadre une équipe de cinq développeurs et j'organise des revues de code hebdomadaires.",
+    "Je souhaite évoluer vers un rôle d'architecte et renforcer ma vision produit.",
+    "Le plus grand défi a été de convaincre les équipes métier de revoir leurs priorités.",
+]
+
+
+def make_cv_pdf(candidate: int) -> bytes:
+    """Small text CV, different per candidate so the analysis cache misses"""
+    styles = getSampleStyleSheet()
+    buffer = io.BytesIO()
+    story = [Paragraph(f"Candidat {candidate} - Ingénieur logiciel", styles['Title'])]
+    for year in range(2015, 2025):
+        story.append(Paragraph(
+            f"{year} : développement Python et SQL, projet {candidate}-{year}, "
+            "encadrement technique et amélioration continue.", styles['BodyText']))
+    SimpleDocTemplate(buffer, pagesize=A4).build(story)
+    return buffer.getvalue()
+
+
+class Recorder:
+    """Latencies and failures per endpoint"""
+
+    def __init__(self):
+        self.samples = {}
+        self.errors = {}
+        self.sessions_completed = 0
+        self.sessions_failed = 0
+        self._lock = threading.Lock()
+
+    def record(self, endpoint: str, seconds: float, ok: bool):
+        with self._lock:
+            self.samples.setdefault(endpoint, []).append(seconds)
+            if not ok:
+                self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+    def session_done(self, ok: bool):
+        with self._lock:
+            if ok:
+                self.sessions_completed += 1
+            else:
+                self.sessions_failed += 1
+
+
+def percentile(samples: list, value: float) -> float:
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    rank = (len(ordered) - 1) * value / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+class Candidate:
+    """One simulated interview over its own cookie session"""
+
+    def __init__(self, base_url: str, number: int, recorder: Recorder,
+                 think_time: float, timeout: float):
+        self.base_url = base_url
+        self.number = number
+        self.recorder = recorder
+        self.think_time = think_time
+        self.timeout = timeout
+        self.http = requests.Session()
+
+    def call(self, endpoint: str, method: str, path: str, ok_status=(200, ), **kwargs):
+        started = time.perf_counter()
+        try:
+            response = self.http.request(method, self.base_url + path,
+                                         timeout=self.timeout, **kwargs)
+            ok = response.status_code in ok_status
+        except requests.RequestException as e:
+            logging.warning(f"Candidate {self.number} {endpoint} failed: {str(e)}")
+            response, ok = None, False
+        self.recorder.record(endpoint, time.perf_counter() - started, ok)
+        if not ok:
+            raise RuntimeError(
+                f"{endpoint} failed ({response.status_code if response is not None else 'no response'})")
+        return response
+
+    def pause(self):
+        if self.think_time:
+            time.sleep(random.uniform(0.5, 1.5) * self.think_time)
+
+    def run(self) -> bool:
+        started = time.perf_counter()
+        try:
+            self.call('upload', 'POST', '/upload', ok_status=(302, ),
+                      files={'cv_file': (f'cv_{self.number}.pdf',
+                                         make_cv_pdf(self.number), 'application/pdf')},
+                      allow_redirects=False)
+            question = self.call('analyze_cv', 'POST', '/api/analyze_cv').json()['first_question']
+
+            for _ in range(MAX_QUESTIONS):
+                self.call('generate_audio', 'POST', '/api/generate_audio', json={'text': question})
+                self.pause()
+                answer = ' '.join(random.sample(ANSWER_SENTENCES, 3))
+                data = self.call('submit_answer', 'POST', '/api/submit_answer',
+                                 json={'question': question, 'answer': answer}).json()
+                if data.get('completed'):
+                    break
+                question = data['next_question']
+
+            job = self.call('generate_report', 'POST', '/api/generate_report',
+                            ok_status=(202, )).json()
+            report_started = time.perf_counter()
+            while True:
+                status = self.call('job_status', 'GET', job['status_url']).json()
+                if status.get('status') == 'done':
+                    break
+                if status.get('status') == 'failed':
+                    raise RuntimeError(f"Report job failed: {status.get('error')}")
+                if time.perf_counter() - report_started > self.timeout:
+                    raise RuntimeError("Report job timed out")
+                time.sleep(0.5)
+            self.recorder.record('report_ready', time.perf_counter() - report_started, True)
+            self.recorder.record('interview', time.perf_counter() - started, True)
+            return True
+
+        except Exception as e:
+            logging.warning(f"Candidate {self.number} abandoned: {str(e)}")
+            return False
+
+
+def run_load(base_url: str, candidates: int, concurrency: int,
+             think_time: float, timeout: float) -> dict:
+    recorder = Recorder()
+    started = time.perf_counter()
+
+    def simulate(number):
+        recorder.session_done(
+            Candidate(base_url, number, recorder, think_time, timeout).run())
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(simulate, range(candidates)))
+
+    elapsed = time.perf_counter() - started
+    endpoints = {}
+    for endpoint, samples in sorted(recorder.samples.items()):
+        endpoints[endpoint] = {
+            'requests': len(samples),
+            'errors': recorder.errors.get(endpoint, 0),
+            'p50_ms': round(percentile(samples, 50) * 1000, 1),
+            'p95_ms': round(percentile(samples, 95) * 1000, 1),
+            'p99_ms': round(percentile(samples, 99) * 1000, 1),
+            'max_ms': round(max(samples) * 1000, 1)
+        }
+    return {
+        'candidates': candidates,
+        'concurrency': concurrency,
+        'elapsed_seconds': round(elapsed, 2),
+        'sessions_completed': recorder.sessions_completed,
+        'sessions_failed': recorder.sessions_failed,
+        'sessions_per_minute': round(recorder.sessions_completed / elapsed * 60, 2),
+        'endpoints': endpoints
+    }
+
+
+def wait_until_ready(base_url: str, process, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("gunicorn exited during startup")
+        try:
+            if requests.get(base_url + '/', timeout=2).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError("gunicorn did not become ready in time")
+
+
+def run_with_gunicorn(workers: int, threads: int, stub_url: str, port: int,
+                      args) -> dict:
+    """
+    Start the app under gunicorn in a scratch directory (its own SQLite
+    database, uploads and reports), pointed at the stubs, and load it
+    """
+    workdir = tempfile.mkdtemp(prefix='loadtest-')
+    env = dict(os.environ,
+               GEMINI_API_KEY='stub',
+               GEMINI_BASE_URL=stub_url,
+               ELEVENLABS_API_KEY='stub',
+               ELEVENLABS_API_URL=f"{stub_url}/v1",
+               DATABASE_URL=args.database_url or f"sqlite:///{os.path.join(workdir, 'load.db')}",
+               JANITOR_ENABLED='0',
+               PYTHONPATH=REPO_ROOT)
+    command = [sys.executable, '-m', 'gunicorn', '--bind', f'127.0.0.1:{port}',
+               '--workers', str(workers), '--threads', str(threads),
+               '--timeout', '120', '--log-level', 'warning',
+               '--config', os.path.join(REPO_ROOT, 'gunicorn.conf.py'), 'main:app']
+    log = open(os.path.join(workdir, 'gunicorn.log'), 'w')
+    # Create the schema once, so workers do not race to migrate it
+    subprocess.run([sys.executable, '-c', 'import app'], cwd=workdir, env=env,
+                   stdout=log, stderr=subprocess.STDOUT, check=True)
+    process = subprocess.Popen(command, cwd=workdir, env=env, stdout=log,
+                               stderr=subprocess.STDOUT)
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        wait_until_ready(base_url, process)
+        result = run_load(base_url, args.candidates, args.concurrency,
+                          args.think_time, args.timeout)
+        result['gunicorn'] = {'workers': workers, 'threads': threads}
+        return result
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+        log.close()
+        if args.keep_workdir:
+            logging.info(f"Kept {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+def print_report(result: dict):
+    label = ''
+    if 'gunicorn' in result:
+        label = f" - gunicorn {result['gunicorn']['workers']} workers x {result['gunicorn']['threads']} threads"
+    print(f"\n== {result['candidates']} candidates, concurrency {result['concurrency']}{label}")
+    print(f"   {result['sessions_completed']} completed, {result['sessions_failed']} failed "
+          f"in {result['elapsed_seconds']}s -> {result['sessions_per_minute']} sessions/min")
+    print(f"   {'endpoint':<16}{'requests':>9}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for endpoint, stats in result['endpoints'].items():
+        print(f"   {endpoint:<16}{stats['requests']:>9}{stats['errors']:>8}"
+              f"{stats['p50_ms']:>10}{stats['p95_ms']:>10}{stats['p99_ms']:>10}")
+
+
+def parse_gunicorn_configs(value: str) -> list:
+    configs = []
+    for item in value.split(','):
+        workers, _, threads = item.strip().partition('x')
+        configs.append((int(workers), int(threads or 1)))
+    return configs
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__.strip().splitlines()[0],
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__)
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--base-url', help="Load an app that is already running")
+    target.add_argument('--gunicorn', type=parse_gunicorn_configs,
+                        help="Comma-separated WORKERSxTHREADS configurations to start and load")
+    parser.add_argument('--candidates', type=int, default=20)
+    parser.add_argument('--concurrency', type=int, default=5)
+    parser.add_argument('--think-time', type=float, default=0.0,
+                        help="Mean pause in seconds before each answer")
+    parser.add_argument('--timeout', type=float, default=120.0,
+                        help="Per-request and report-wait timeout in seconds")
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--stub-port', type=int, default=0,
+                        help="Port for the AI stubs started with --gunicorn (0 picks a free one)")
+    parser.add_argument('--database-url', help="Database for --gunicorn runs (default: scratch SQLite)")
+    parser.add_argument('--keep-workdir', action='store_true')
+    parser.add_argument('--json', dest='json_path', help="Also write the results to this file")
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s %(message)s')
+    logging.getLogger('urllib3').setLevel(logging.WARNING)
+
+    results = []
+    if args.base_url:
+        results.append(run_load(args.base_url.rstrip('/'), args.candidates,
+                                args.concurrency, args.think_time, args.timeout))
+    else:
+        stub_config = stub_config_from_args(args)
+        server, stub_url = start_stub_server(stub_config, port=args.stub_port)
+        try:
+            for workers, threads in args.gunicorn:
+                results.append(run_with_gunicorn(workers, threads, stub_url,
+                                                 args.port, args))
+        finally:
+            server.shutdown()
+        logging.info(f"Stub requests served: {stub_config.requests}")
+
+    for result in results:
+        print_report(result)
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
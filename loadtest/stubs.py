@@ -0,0 +1,274 @@
+"""
+Local stand-ins for the Gemini and ElevenLabs HTTP APIs, with configurable
+latency and error rates, so the app can be load tested without real keys.
+
+Point the app at them with:
+    GEMINI_API_KEY=stub GEMINI_BASE_URL=http://127.0.0.1:8900
+    ELEVENLABS_API_KEY=stub ELEVENLABS_API_URL=http://127.0.0.1:8900/v1
+
+Run standalone: python -m loadtest.stubs --port 8900 --gemini-latency lognormal:0.8,0.5
+"""
+import argparse
+import itertools
+import json
+import logging
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# One silent MPEG-1 Layer III frame: 128 kbit/s, 44.1 kHz, ~26 ms
+MP3_FRAME = b'\xff\xfb\x90\x64' + b'\x00' * 413
+MP3_FRAMES_PER_SECOND = 38
+# Spoken French runs at roughly 15 characters per second
+SPEECH_CHARS_PER_SECOND = 15
+
+CV_ANALYSIS = {
+    'summary': "Ingénieur logiciel avec une solide expérience en développement backend et en encadrement d'équipe.",
+    'key_skills': ['Python', 'SQL', 'Architecture logicielle', 'Encadrement'],
+    'experience_years': 7,
+    'career_stage': 'Confirmé',
+    'notable_achievements': ["Migration d'une plateforme vers le cloud", "Réduction de 40 % des temps de réponse"],
+    'potential_areas_for_growth': ['Communication avec les parties prenantes', 'Stratégie produit']
+}
+ROLLING_SUMMARY = {
+    'strengths': ['Expertise technique démontrée', 'Exemples chiffrés'],
+    'gaps': ['Vision stratégique à préciser'],
+    'evidence': ['Réduction de 40 % des temps de réponse'],
+    'overall': 'Profil technique solide, à approfondir sur le leadership.'
+}
+QUESTIONS = [
+    "Pouvez-vous décrire une situation où vous avez dû convaincre votre équipe d'adopter une nouvelle approche technique ?",
+    "Quel projet récent illustre le mieux votre façon de gérer les priorités sous contrainte de délai ?",
+    "Comment accompagnez-vous la montée en compétences des membres moins expérimentés de votre équipe ?",
+]
+SUMMARY_PARAGRAPH = ("**Résumé exécutif** : le candidat présente un parcours technique cohérent, "
+                     "des réalisations mesurables et une réelle capacité d'encadrement. ")
+
+
+class Latency:
+    """
+    Latency distribution parsed from 'fixed:S', 'uniform:A,B' or
+    'lognormal:MEDIAN,SIGMA' (seconds)
+    """
+
+    def __init__(self, spec: str):
+        kind, _, params = spec.partition(':')
+        self.kind = kind
+        self.params = [float(value) for value in params.split(',') if value]
+        if kind not in ('fixed', 'uniform', 'lognormal'):
+            raise ValueError(f"Unknown latency distribution: {spec}")
+
+    def sample(self) -> float:
+        if self.kind == 'fixed':
+            return self.params[0]
+        if self.kind == 'uniform':
+            return random.uniform(self.params[0], self.params[1])
+        median, sigma = self.params
+        return random.lognormvariate(0, sigma) * median
+
+
+class StubConfig:
+    def __init__(self, gemini_latency='lognormal:0.8,0.5',
+                 gemini_error_rate=0.0, tts_latency='lognormal:0.4,0.4',
+                 tts_error_rate=0.0, stream_chunks=8):
+        self.gemini_latency = Latency(gemini_latency)
+        self.gemini_error_rate = gemini_error_rate
+        self.tts_latency = Latency(tts_latency)
+        self.tts_error_rate = tts_error_rate
+        self.stream_chunks = stream_chunks
+        self.requests = {}
+        self._lock = threading.Lock()
+
+    def count(self, name: str):
+        with self._lock:
+            self.requests[name] = self.requests.get(name, 0) + 1
+
+
+_question_counter = itertools.count(1)
+
+
+def _gemini_text(body: dict) -> str:
+    """Canned answer shaped like what the app asked for"""
+    schema = body.get('generationConfig', {}).get('responseSchema') or {}
+    fields = schema.get('properties', {})
+    if 'key_skills' in fields:
+        return json.dumps(CV_ANALYSIS, ensure_ascii=False)
+    if 'strengths' in fields:
+        return json.dumps(ROLLING_SUMMARY, ensure_ascii=False)
+    if "rapport d'évaluation" in json.dumps(body.get('contents', []), ensure_ascii=False):
+        return SUMMARY_PARAGRAPH * 12
+    # Real questions are personalized, so each one is unique (no TTS cache hits)
+    number = next(_question_counter)
+    return f"{QUESTIONS[number % len(QUESTIONS)]} (question {number})"
+
+
+def _gemini_payload(text: str, finished: bool = True) -> dict:
+    candidate = {'content': {'role': 'model', 'parts': [{'text': text}]}, 'index': 0}
+    if finished:
+        candidate['finishReason'] = 'STOP'
+    return {
+        'candidates': [candidate],
+        'usageMetadata': {'promptTokenCount': 100, 'candidatesTokenCount': len(text) // 4}
+    }
+
+
+def make_handler(config: StubConfig):
+
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            logging.debug(f"stub: {format % args}")
+
+        def _read_json(self) -> dict:
+            length = int(self.headers.get('Content-Length') or 0)
+            raw = self.rfile.read(length) if length else b''
+            try:
+                return json.loads(raw or b'{}')
+            except ValueError:
+                return {}
+
+        def _send(self, status: int, body: bytes, content_type: str):
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _send_error(self, status: int, message: str):
+            body = json.dumps({'error': {'code': status, 'message': message,
+                                         'status': 'UNAVAILABLE'}}).encode()
+            self._send(status, body, 'application/json')
+
+        def _start_chunked(self, content_type: str):
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+
+        def _write_chunk(self, data: bytes):
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+
+        def _end_chunked(self):
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+
+        def do_GET(self):
+            if self.path == '/health':
+                self._send(200, b'ok', 'text/plain')
+            elif self.path == '/stats':
+                self._send(200, json.dumps(config.requests).encode(), 'application/json')
+            else:
+                self._send_error(404, 'Not found')
+
+        def do_POST(self):
+            gemini = re.match(r'^/v1\w*/models/([^:/]+):(generateContent|streamGenerateContent)', self.path)
+            tts = re.match(r'^/v1/text-to-speech/[^/]+(/stream)?$', self.path.split('?')[0])
+            body = self._read_json()
+            if gemini:
+                self._gemini(body, gemini.group(2) == 'streamGenerateContent')
+            elif tts:
+                self._tts(body, bool(tts.group(1)))
+            else:
+                self._send_error(404, 'Not found')
+
+        def _gemini(self, body: dict, stream: bool):
+            config.count('gemini_stream' if stream else 'gemini')
+            latency = config.gemini_latency.sample()
+            if random.random() < config.gemini_error_rate:
+                time.sleep(latency / 2)
+                self._send_error(503, 'The model is overloaded')
+                return
+
+            text = _gemini_text(body)
+            if not stream:
+                time.sleep(latency)
+                self._send(200, json.dumps(_gemini_payload(text), ensure_ascii=False).encode(),
+                           'application/json')
+                return
+
+            # Server-sent events, the first one after about a third of the latency
+            self._start_chunked('text/event-stream')
+            parts = max(1, config.stream_chunks)
+            size = max(1, len(text) // parts + 1)
+            pieces = [text[i:i + size] for i in range(0, len(text), size)]
+            time.sleep(latency / 3)
+            for i, piece in enumerate(pieces):
+                payload = _gemini_payload(piece, finished=i == len(pieces) - 1)
+                self._write_chunk(f"data: {json.dumps(payload, ensure_ascii=False)}\r\n\r\n".encode())
+                time.sleep(latency * 2 / 3 / len(pieces))
+            self._end_chunked()
+
+        def _tts(self, body: dict, stream: bool):
+            config.count('tts_stream' if stream else 'tts')
+            latency = config.tts_latency.sample()
+            if random.random() < config.tts_error_rate:
+                time.sleep(latency / 2)
+                self._send_error(503, 'Service unavailable')
+                return
+
+            seconds = max(1.0, len(body.get('text', '')) / SPEECH_CHARS_PER_SECOND)
+            frames = int(seconds * MP3_FRAMES_PER_SECOND)
+            if not stream:
+                time.sleep(latency)
+                self._send(200, MP3_FRAME * frames, 'audio/mpeg')
+                return
+
+            self._start_chunked('audio/mpeg')
+            time.sleep(latency / 2)
+            batch = max(1, frames // 8)
+            for start in range(0, frames, batch):
+                self._write_chunk(MP3_FRAME * min(batch, frames - start))
+                time.sleep(latency / 16)
+            self._end_chunked()
+
+    return StubHandler
+
+
+def start_stub_server(config: StubConfig, host: str = '127.0.0.1', port: int = 0):
+    """
+    Serve the stubs from a daemon thread
+    Output: (server, base URL)
+    """
+    server = ThreadingHTTPServer((host, port), make_handler(config))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='ai-stubs', daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def add_stub_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument('--gemini-latency', default='lognormal:0.8,0.5',
+                        help="fixed:S, uniform:A,B or lognormal:MEDIAN,SIGMA (seconds)")
+    parser.add_argument('--gemini-error-rate', type=float, default=0.0)
+    parser.add_argument('--tts-latency', default='lognormal:0.4,0.4')
+    parser.add_argument('--tts-error-rate', type=float, default=0.0)
+
+
+def stub_config_from_args(args) -> StubConfig:
+    return StubConfig(gemini_latency=args.gemini_latency,
+                      gemini_error_rate=args.gemini_error_rate,
+                      tts_latency=args.tts_latency,
+                      tts_error_rate=args.tts_error_rate)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8900)
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    server, base_url = start_stub_server(stub_config_from_args(args), args.host, args.port)
+    logging.info(f"AI stubs listening on {base_url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,8 @@
-from app import app
+import os
+from app import app, start_background_services
 
 if __name__ == '__main__':
+    # With the reloader, only the child process serves requests
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_background_services(app)
     app.run(host='0.0.0.0', port=5000, debug=True)
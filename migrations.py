@@ -0,0 +1,220 @@
+import ast
+import json
+import logging
+import os
+import re
+from datetime import datetime
+from sqlalchemy import inspect, text
+from app import db
+from models import AssessmentSession, BackgroundJob, QuestionAnswer, ReportArtifact
+from services.gemini_service import build_analysis_context
+
+
+def add_missing_columns() -> list:
+    """
+    Add nullable columns declared on the models but missing from existing
+    tables (db.create_all() only creates missing tables)
+    Output: list of "table.column" names added
+    """
+    inspector = inspect(db.engine)
+    existing_tables = set(inspector.get_table_names())
+    added = []
+
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing_columns = {col['name'] for col in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing_columns or not column.nullable:
+                continue
+            column_type = column.type.compile(dialect=db.engine.dialect)
+            with db.engine.begin() as connection:
+                connection.execute(
+                    text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+            added.append(f"{table.name}.{column.name}")
+
+    if added:
+        logging.info(f"Added columns: {', '.join(added)}")
+    return added
+
+
+def add_missing_indexes() -> list:
+    """
+    Create indexes declared on the models but missing from existing tables
+    Output: list of index names created
+    """
+    inspector = inspect(db.engine)
+    existing_tables = set(inspector.get_table_names())
+    created = []
+
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing_indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name in existing_indexes:
+                continue
+            index.create(bind=db.engine)
+            created.append(index.name)
+
+    if created:
+        logging.info(f"Created indexes: {', '.join(created)}")
+    return created
+
+
+def migrate_questions_answers() -> int:
+    """
+    Move Q&A pairs from the legacy AssessmentSession.questions_answers JSON
+    blob into QuestionAnswer rows. Idempotent: migrated sessions have their
+    blob cleared, so subsequent runs find nothing to do.
+    Output: number of sessions migrated
+    """
+    migrated = 0
+    legacy_sessions = AssessmentSession.query.options(
+        db.undefer_group('legacy')).filter(
+            AssessmentSession.questions_answers.isnot(None)).all()
+
+    for assessment_session in legacy_sessions:
+        try:
+            qa_list = json.loads(assessment_session.questions_answers or '[]')
+        except ValueError:
+            logging.error(
+                f"Skipping session {assessment_session.session_id}: invalid questions_answers JSON")
+            continue
+
+        existing = QuestionAnswer.query.filter_by(
+            session_id=assessment_session.session_id).count()
+        if not existing:
+            for sequence, qa in enumerate(qa_list, 1):
+                try:
+                    created_at = datetime.fromisoformat(qa.get('timestamp'))
+                except (TypeError, ValueError):
+                    created_at = assessment_session.updated_at or datetime.utcnow()
+                db.session.add(
+                    QuestionAnswer(session_id=assessment_session.session_id,
+                                   sequence=sequence,
+                                   question=qa.get('question', ''),
+                                   answer=qa.get('answer', ''),
+                                   created_at=created_at))
+
+        assessment_session.questions_answers = None
+        migrated += 1
+
+    db.session.commit()
+    if migrated:
+        logging.info(f"Migrated Q&A for {migrated} sessions")
+    return migrated
+
+
+def migrate_cv_analysis() -> int:
+    """
+    Convert legacy str(dict) CV analyses into the JSON cv_analysis column and
+    precompute their prompt context. Parsed with ast.literal_eval, never eval.
+    Output: number of sessions migrated
+    """
+    migrated = 0
+    legacy_sessions = AssessmentSession.query.options(
+        db.undefer_group('legacy'), db.undefer_group('analysis')).filter(
+            AssessmentSession.legacy_cv_analysis.isnot(None)).all()
+
+    for assessment_session in legacy_sessions:
+        raw = assessment_session.legacy_cv_analysis
+        try:
+            cv_analysis = ast.literal_eval(raw)
+        except (ValueError, SyntaxError):
+            try:
+                cv_analysis = json.loads(raw)
+            except ValueError:
+                logging.error(
+                    f"Skipping session {assessment_session.session_id}: unparseable cv_analysis")
+                continue
+        if not isinstance(cv_analysis, dict):
+            logging.error(
+                f"Skipping session {assessment_session.session_id}: cv_analysis is not a mapping")
+            continue
+
+        if not assessment_session.cv_analysis:
+            assessment_session.cv_analysis = cv_analysis
+            assessment_session.analysis_context = build_analysis_context(cv_analysis)
+        assessment_session.legacy_cv_analysis = None
+        migrated += 1
+
+    db.session.commit()
+    if migrated:
+        logging.info(f"Migrated CV analysis for {migrated} sessions")
+    return migrated
+
+
+def migrate_final_summaries() -> int:
+    """
+    Copy the final summary of each session's latest successful report job
+    onto AssessmentSession.final_summary, where reports generated before
+    that column existed left it only in the job result
+    Output: number of sessions migrated
+    """
+    migrated = 0
+    jobs = BackgroundJob.query.join(
+        AssessmentSession,
+        AssessmentSession.session_id == BackgroundJob.session_id).filter(
+            BackgroundJob.kind == 'report', BackgroundJob.status == 'done',
+            AssessmentSession.final_summary.is_(None)).order_by(
+                BackgroundJob.finished_at.asc()).all()
+    summaries = {job.session_id: job.get_result().get('summary') for job in jobs}
+
+    for session_id, summary in summaries.items():
+        if not summary:
+            continue
+        AssessmentSession.query.filter_by(session_id=session_id).update(
+            {'final_summary': summary})
+        migrated += 1
+
+    db.session.commit()
+    if migrated:
+        logging.info(f"Migrated final summaries for {migrated} sessions")
+    return migrated
+
+
+REPORT_FILENAME_PATTERN = re.compile(
+    r'^assessment_report_(?P<session_id>.+)_(?P<timestamp>\d{8}_\d{6})\.pdf$')
+
+
+def index_existing_reports(reports_folder: str) -> int:
+    """
+    Register report PDFs generated before ReportArtifact existed
+    Output: number of reports registered
+    """
+    from services.report_service import register_report_artifact
+
+    if not os.path.isdir(reports_folder):
+        return 0
+
+    known_paths = {path for (path, ) in db.session.query(ReportArtifact.file_path)}
+    known_sessions = {sid for (sid, ) in db.session.query(AssessmentSession.session_id)}
+    registered = 0
+
+    for filename in sorted(os.listdir(reports_folder)):
+        match = REPORT_FILENAME_PATTERN.match(filename)
+        file_path = os.path.join(reports_folder, filename)
+        if not match or file_path in known_paths:
+            continue
+        if match.group('session_id') not in known_sessions:
+            continue
+        created_at = datetime.strptime(match.group('timestamp'), '%Y%m%d_%H%M%S')
+        register_report_artifact(match.group('session_id'), file_path, created_at)
+        registered += 1
+
+    if registered:
+        logging.info(f"Registered {registered} existing reports")
+    return registered
+
+
+def run_migrations(app):
+    """Apply schema and data migrations that db.create_all() cannot express"""
+    add_missing_columns()
+    add_missing_indexes()
+    migrate_questions_answers()
+    migrate_cv_analysis()
+    migrate_final_summaries()
+    # Backfill the report registry once, when it is still empty
+    if not ReportArtifact.query.first():
+        index_existing_reports(app.config['REPORTS_FOLDER'])
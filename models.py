@@ -1,40 +1,215 @@
 from app import db
 from datetime import datetime
+from sqlalchemy.exc import IntegrityError
 import json
 
+# Tries at the next QuestionAnswer.sequence when answers arrive concurrently
+QA_INSERT_ATTEMPTS = 5
+
+class AnswerConflict(Exception):
+    pass
+
 class AssessmentSession(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     session_id = db.Column(db.String(100), unique=True, nullable=False)
     cv_filename = db.Column(db.String(255), nullable=False)
-    cv_content = db.Column(db.Text, nullable=False)
-    cv_analysis = db.Column(db.Text, nullable=True)
-    questions_answers = db.Column(db.Text, nullable=True)  # JSON string
+    # Large payloads are deferred so status lookups only load the small row;
+    # routes that need them undefer the 'cv_text' or 'analysis' group
+    cv_content = db.deferred(db.Column(db.Text, nullable=False), group='cv_text')
+    cv_analysis = db.deferred(db.Column('cv_analysis_json', db.JSON(none_as_null=True), nullable=True), group='analysis')  # dict matching gemini_service.CVAnalysis
+    analysis_context = db.deferred(db.Column(db.JSON(none_as_null=True), nullable=True), group='analysis')  # Prompt fields precomputed from cv_analysis
+    rolling_summary = db.deferred(db.Column(db.JSON(none_as_null=True), nullable=True), group='analysis')  # dict matching gemini_service.RollingSummary
+    rolling_summary_sequence = db.Column(db.Integer, nullable=True)  # Last QuestionAnswer.sequence folded into rolling_summary
+    final_summary = db.deferred(db.Column(db.Text, nullable=True), group='report')  # Summary of the latest generated report, reused to re-render it
+    legacy_cv_analysis = db.deferred(db.Column('cv_analysis', db.Text, nullable=True), group='legacy')  # Legacy str(dict), migrated to cv_analysis
+    questions_answers = db.deferred(db.Column(db.Text, nullable=True), group='legacy')  # Legacy JSON string, migrated to QuestionAnswer
     current_question_index = db.Column(db.Integer, default=0)
     status = db.Column(db.String(50), default='started')  # started, in_progress, completed
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    def get_cv_analysis(self):
+        return self.cv_analysis or {}
+
+    def get_analysis_context(self):
+        return self.analysis_context or {}
+
+    def get_rolling_summary(self):
+        return self.rolling_summary or {}
+
+    def get_questions_answers_after(self, sequence):
+        rows = QuestionAnswer.query.filter(
+            QuestionAnswer.session_id == self.session_id,
+            QuestionAnswer.sequence > (sequence or 0)).order_by(
+                QuestionAnswer.sequence.asc()).all()
+        return rows
+
     def get_questions_answers(self):
-        if self.questions_answers:
-            return json.loads(self.questions_answers)
-        return []
+        rows = QuestionAnswer.query.filter_by(session_id=self.session_id).order_by(
+            QuestionAnswer.sequence.asc()).all()
+        return [row.to_dict() for row in rows]
 
-    def set_questions_answers(self, qa_list):
-        self.questions_answers = json.dumps(qa_list)
+    def get_recent_questions_answers(self, limit):
+        rows = QuestionAnswer.query.filter_by(session_id=self.session_id).order_by(
+            QuestionAnswer.sequence.desc()).limit(limit).all()
+        return [row.to_dict() for row in reversed(rows)]
+
+    def count_questions_answers(self):
+        return QuestionAnswer.query.filter_by(session_id=self.session_id).count()
 
     def add_question_answer(self, question, answer):
-        qa_list = self.get_questions_answers()
-        qa_list.append({
-            'question': question,
-            'answer': answer,
-            'timestamp': datetime.utcnow().isoformat()
-        })
-        self.set_questions_answers(qa_list)
+        """
+        Append an answer at the next sequence number. Concurrent submissions
+        for the same session race for that number: the loser rolls back to a
+        savepoint and tries the following one, up to QA_INSERT_ATTEMPTS times
+        before raising AnswerConflict.
+        """
+        for _ in range(QA_INSERT_ATTEMPTS):
+            last_sequence = db.session.query(db.func.max(QuestionAnswer.sequence)).filter(
+                QuestionAnswer.session_id == self.session_id).scalar()
+            qa = QuestionAnswer(session_id=self.session_id,
+                                sequence=(last_sequence or 0) + 1,
+                                question=question,
+                                answer=answer,
+                                created_at=datetime.utcnow())
+            try:
+                with db.session.begin_nested():
+                    db.session.add(qa)
+            except IntegrityError:
+                continue
+            return qa
+        raise AnswerConflict(f"Could not store answer for session {self.session_id}")
+
+class QuestionAnswer(db.Model):
+    __table_args__ = (db.UniqueConstraint('session_id', 'sequence', name='uq_question_answer_sequence'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    session_id = db.Column(db.String(100), db.ForeignKey('assessment_session.session_id'), nullable=False, index=True)
+    sequence = db.Column(db.Integer, nullable=False)  # 1-based position in the interview
+    question = db.Column(db.Text, nullable=False)
+    answer = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'question': self.question,
+            'answer': self.answer,
+            'timestamp': self.created_at.isoformat() if self.created_at else None
+        }
 
 class AudioFile(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     session_id = db.Column(db.String(100), nullable=False)
     filename = db.Column(db.String(255), nullable=False)
     file_path = db.Column(db.String(500), nullable=False)
-    transcription = db.Column(db.Text, nullable=True)
+    transcription = db.Column(db.Text, nullable=True)  # None until transcribed, '' if it failed
+    # Chunked recordings: one row per segment, ordered by sequence
+    recording_id = db.Column(db.String(64), nullable=True)
+    sequence = db.Column(db.Integer, nullable=True)
+    # Read from the file headers by services.audio_metadata (None if unknown)
+    audio_format = db.Column(db.String(20), nullable=True)
+    duration_seconds = db.Column(db.Float, nullable=True)
+    bitrate = db.Column(db.Integer, nullable=True)  # bit/s
+    sample_rate = db.Column(db.Integer, nullable=True)
+    channels = db.Column(db.Integer, nullable=True)
+    size_bytes = db.Column(db.Integer, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_audio_file_recording', 'recording_id', 'sequence'),
+        db.Index('ix_audio_file_session_duration', 'session_id', 'duration_seconds'),
+    )
+
+    def set_metadata(self, metadata: dict):
+        """Store the output of audio_metadata.probe_audio"""
+        metadata = metadata or {}
+        self.audio_format = metadata.get('format')
+        self.duration_seconds = metadata.get('duration_seconds')
+        self.bitrate = metadata.get('bitrate')
+        self.sample_rate = metadata.get('sample_rate')
+        self.channels = metadata.get('channels')
+
+    @classmethod
+    def speaking_time_stats(cls, session_id: str) -> dict:
+        """Total and average recorded answer time for a session"""
+        count, total, longest = db.session.query(
+            db.func.count(cls.duration_seconds),
+            db.func.sum(cls.duration_seconds),
+            db.func.max(cls.duration_seconds)).filter(
+                cls.session_id == session_id).one()
+        recordings = db.session.query(
+            db.func.count(db.distinct(cls.recording_id))).filter(
+                cls.session_id == session_id,
+                cls.duration_seconds.isnot(None)).scalar()
+        return {
+            'segments': count,
+            'recordings': recordings,
+            'total_seconds': round(total or 0.0, 2),
+            'average_seconds_per_recording': round((total or 0.0) / recordings, 2) if recordings else 0.0,
+            'longest_segment_seconds': round(longest or 0.0, 2)
+        }
+
+class CVAnalysisCache(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    cache_key = db.Column(db.String(64), unique=True, nullable=False)  # sha256 of normalized CV + model + prompt version
+    model = db.Column(db.String(100), nullable=False)
+    prompt_version = db.Column(db.String(20), nullable=False)
+    analysis = db.Column(db.Text, nullable=False)  # JSON string
+    hit_count = db.Column(db.Integer, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    last_accessed_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+    def get_analysis(self):
+        return json.loads(self.analysis)
+
+    def set_analysis(self, analysis):
+        self.analysis = json.dumps(analysis, ensure_ascii=False)
+
+class BackgroundJob(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    job_id = db.Column(db.String(36), unique=True, nullable=False)
+    kind = db.Column(db.String(50), nullable=False)  # e.g. report
+    session_id = db.Column(db.String(100), nullable=True, index=True)
+    status = db.Column(db.String(20), default='queued', index=True)  # queued, running, done, failed
+    progress = db.Column(db.Integer, default=0)  # 0-100
+    stage = db.Column(db.String(100), nullable=True)
+    payload = db.Column(db.Text, nullable=True)  # JSON string
+    result = db.Column(db.Text, nullable=True)  # JSON string
+    error = db.Column(db.Text, nullable=True)
+    attempts = db.Column(db.Integer, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    started_at = db.Column(db.DateTime, nullable=True)
+    heartbeat_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    def get_payload(self):
+        if self.payload:
+            return json.loads(self.payload)
+        return {}
+
+    def set_payload(self, payload):
+        self.payload = json.dumps(payload, ensure_ascii=False)
+
+    def get_result(self):
+        if self.result:
+            return json.loads(self.result)
+        return {}
+
+    def set_result(self, result):
+        self.result = json.dumps(result, ensure_ascii=False)
+
+class ReportArtifact(db.Model):
+    __table_args__ = (db.Index('ix_report_artifact_session_created', 'session_id', 'created_at'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    session_id = db.Column(db.String(100), db.ForeignKey('assessment_session.session_id'), nullable=False)
+    filename = db.Column(db.String(255), nullable=False)
+    file_path = db.Column(db.String(500), nullable=False)
+    size_bytes = db.Column(db.Integer, nullable=False)
+    content_hash = db.Column(db.String(64), nullable=False)  # sha256, used as the download ETag
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    @classmethod
+    def latest_for_session(cls, session_id):
+        return cls.query.filter_by(session_id=session_id).order_by(
+            cls.created_at.desc(), cls.id.desc()).first()
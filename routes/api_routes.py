@@ -1,17 +1,40 @@
-from flask import Blueprint, request, jsonify, session, send_file
+from flask import Blueprint, request, jsonify, session, send_file, Response, stream_with_context
 import os
 import logging
-import uuid
+import hashlib
+import hmac
 import json
-from datetime import datetime
+import re
+import time
+from werkzeug.utils import secure_filename
 from app import db, app
-from models import AssessmentSession, AudioFile
-from services.gemini_service import analyze_cv_content, generate_first_question, generate_followup_question, generate_final_summary
-from services.speech_service import text_to_speech, speech_to_text
-from services.document_service import generate_assessment_report, create_report_filename
+from models import AssessmentSession, AudioFile, AnswerConflict
+from services.gemini_service import generate_first_question, generate_followup_question, generate_final_summary, build_analysis_context, stream_followup_question, stream_final_summary, FALLBACK_FIRST_QUESTION, FALLBACK_FOLLOWUP_QUESTIONS
+from services.analysis_cache import analyze_cv_cached
+from services.job_queue import enqueue_job, get_job
+from services.rolling_summary import queue_rolling_summary
+from services.audio_metadata import probe_audio
+from services.transcription_service import (get_backend_name, transcribe_segment, get_recording_transcription,
+                                            TranscriptionQueueFull)
+from services.audio_cache import get_or_create_speech, stream_speech, synthesize_speech_async, wait_for_speech, is_speech_pending, CACHE_FILE_PREFIX
+from services.resilience import remaining_budget, with_request_deadline, MIN_CALL_SECONDS
+from concurrent.futures import TimeoutError as FutureTimeoutError
 
 api_bp = Blueprint('api', __name__)
 
+MAX_QUESTIONS = 8
+RECORDING_ID_PATTERN = re.compile(r'^[A-Za-z0-9-]{1,64}$')
+
+
+def _speech_token(session_id: str, text: str) -> str:
+    """
+    Signature of a question text issued to its session, required by
+    /api/stream/speech so the endpoint only voices questions this app asked
+    """
+    message = f"{session_id}\n{text}".encode('utf-8')
+    return hmac.new(app.secret_key.encode('utf-8'), message,
+                    hashlib.sha256).hexdigest()
+
 
 @api_bp.route('/analyze_cv', methods=['POST'])
 def analyze_cv():
@@ -21,14 +44,16 @@ def analyze_cv():
         if not session_id:
             return jsonify({'error': 'No active session'}), 400
 
-        assessment_session = AssessmentSession.query.filter_by(
+        assessment_session = AssessmentSession.query.options(
+            db.undefer_group('cv_text')).filter_by(
             session_id=session_id).first()
         if not assessment_session:
             return jsonify({'error': 'Session not found'}), 404
 
         try:
-            # Analyze CV content with Gemini
-            cv_analysis = analyze_cv_content(assessment_session.cv_content)
+            # Analyze CV content with Gemini (cached by normalized CV text)
+            cv_analysis = analyze_cv_cached(
+                assessment_session.cv_content)
 
             # Generate first question
             first_question = generate_first_question(cv_analysis)
@@ -49,17 +74,20 @@ def analyze_cv():
                 'potential_areas_for_growth':
                 ['Technical skills', 'Leadership development']
             }
-            first_question = "I'd like to understand your career journey better. What are your current professional goals and what motivates you in your work?"
+            first_question = FALLBACK_FIRST_QUESTION
 
         # Update session with analysis
-        assessment_session.cv_analysis = str(cv_analysis)
+        assessment_session.cv_analysis = cv_analysis
+        assessment_session.analysis_context = build_analysis_context(
+            cv_analysis)
         assessment_session.status = 'in_progress'
         db.session.commit()
 
         return jsonify({
             'success': True,
             'cv_analysis': cv_analysis,
-            'first_question': first_question
+            'first_question': first_question,
+            'speech_token': _speech_token(session_id, first_question)
         })
 
     except Exception as e:
@@ -77,14 +105,10 @@ def generate_audio():
         if not text:
             return jsonify({'error': 'No text provided'}), 400
 
-        # Generate unique filename
-        audio_filename = f"question_{uuid.uuid4().hex}.mp3"
-        audio_path = os.path.join(app.config['UPLOAD_FOLDER'], audio_filename)
-
-        # Convert text to speech
-        success = text_to_speech(text, audio_path)
+        # Convert text to speech, reusing a cached clip for identical text
+        audio_filename = get_or_create_speech(text)
 
-        if success:
+        if audio_filename:
             return jsonify({
                 'success': True,
                 'audio_url': f'/api/audio/{audio_filename}'
@@ -97,11 +121,63 @@ def generate_audio():
         return jsonify({'error': 'Audio generation failed'}), 500
 
 
+@api_bp.route('/stream/speech')
+def stream_speech_route():
+    """
+    Stream speech for ?text= as a chunked audio/mpeg body so playback starts
+    with the provider's first chunk. The clip is cached for later requests.
+    Only question texts issued to the caller's session are voiced: ?token=
+    must be the speech_token returned with the question.
+    """
+    try:
+        session_id = session.get('assessment_session_id')
+        if not session_id:
+            return jsonify({'error': 'No active session'}), 400
+
+        text = request.args.get('text', '').strip()
+        if not text:
+            return jsonify({'error': 'No text provided'}), 400
+
+        token = request.args.get('token', '')
+        if not hmac.compare_digest(token.encode('utf-8'),
+                                   _speech_token(session_id, text).encode('utf-8')):
+            return jsonify({'error': 'Invalid speech token'}), 403
+
+        audio_filename, chunks = stream_speech(text)
+        if chunks is None:
+            return send_file(os.path.join(app.config['AUDIO_CACHE_FOLDER'],
+                                          audio_filename),
+                             mimetype='audio/mpeg')
+
+        return Response(stream_with_context(with_request_deadline(chunks)),
+                        mimetype='audio/mpeg',
+                        headers={
+                            'Cache-Control': 'no-cache',
+                            'X-Accel-Buffering': 'no'
+                        })
+
+    except Exception as e:
+        logging.error(f"Error in stream_speech: {str(e)}")
+        return jsonify({'error': 'Audio streaming failed'}), 500
+
+
 @api_bp.route('/audio/<filename>')
 def serve_audio(filename):
     """Serve audio files"""
     try:
-        file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+        filename = os.path.basename(filename)
+        folder = app.config['AUDIO_CACHE_FOLDER'] if filename.startswith(
+            CACHE_FILE_PREFIX) else app.config['UPLOAD_FOLDER']
+        file_path = os.path.join(folder, filename)
+        if not os.path.exists(file_path) and filename.startswith(
+                CACHE_FILE_PREFIX) and is_speech_pending(filename):
+            # Still synthesizing for a /submit_turn request, possibly in
+            # another worker. With nothing pending the 404 comes at once and
+            # the client streams the clip instead.
+            budget = remaining_budget()
+            timeout = app.config['TURN_AUDIO_WAIT_SECONDS'] * 3 if budget is None \
+                else budget - MIN_CALL_SECONDS
+            wait_for_speech(filename, max(0, timeout))
         if os.path.exists(file_path):
             return send_file(file_path, mimetype='audio/mpeg')
         else:
@@ -111,6 +187,106 @@ def serve_audio(filename):
         return jsonify({'error': 'Failed to serve audio'}), 500
 
 
+def _save_answer(assessment_session, question, answer):
+    """
+    Persist an answer and mark the session completed after the last question
+    Output: (qa_count, recent_qa, completed)
+    """
+    # Add Q&A to session
+    assessment_session.add_question_answer(question, answer)
+    assessment_session.current_question_index += 1
+
+    # Count answers and fetch the latest exchange for the follow-up prompt
+    qa_count = assessment_session.count_questions_answers()
+    recent_qa = assessment_session.get_recent_questions_answers(1)
+    logging.info(f"Answers recorded for session: {qa_count}")
+
+    # Check if we should continue with more questions (limit to 8 questions)
+    completed = qa_count >= MAX_QUESTIONS
+    if completed:
+        assessment_session.status = 'completed'
+    return qa_count, recent_qa, completed
+
+
+def _queue_rolling_summary(session_id: str):
+    """Update the rolling summary in the background after an answer"""
+    if not app.config['ROLLING_SUMMARY_ENABLED']:
+        return
+    try:
+        queue_rolling_summary(session_id)
+    except Exception as e:
+        logging.warning(f"Could not queue rolling summary: {str(e)}")
+
+
+def _fallback_question(qa_count: int) -> str:
+    # Fallback questions when API is not available
+    question_index = min(qa_count, len(FALLBACK_FOLLOWUP_QUESTIONS) - 1)
+    return FALLBACK_FOLLOWUP_QUESTIONS[question_index]
+
+
+def _record_answer(assessment_session, question, answer):
+    """
+    Persist an answer and work out the next question
+    Output: (qa_count, completed, next_question)
+    """
+    qa_count, recent_qa, completed = _save_answer(assessment_session,
+                                                  question, answer)
+    if completed:
+        db.session.commit()
+        return qa_count, True, None
+
+    cv_analysis = assessment_session.get_cv_analysis()
+    analysis_context = assessment_session.get_analysis_context()
+    db.session.commit()
+    _queue_rolling_summary(assessment_session.session_id)
+
+    # Generate next question
+    try:
+        next_question = generate_followup_question(
+            cv_analysis, recent_qa, analysis_context)
+    except Exception as api_error:
+        logging.warning(
+            f"API error generating question, using fallback: {str(api_error)}"
+        )
+        next_question = _fallback_question(qa_count)
+
+    return qa_count, False, next_question
+
+
+def _synthesize_turn_audio(text: str) -> tuple:
+    """
+    Start synthesizing a question and wait up to TURN_AUDIO_WAIT_SECONDS
+    Output: (audio_url or None if synthesis failed, audio_ready)
+    """
+    audio_filename, audio_future = synthesize_speech_async(text)
+    try:
+        audio_ready = bool(
+            audio_future.result(timeout=app.config['TURN_AUDIO_WAIT_SECONDS']))
+    except FutureTimeoutError:
+        audio_ready = False
+    except Exception as tts_error:
+        logging.warning(f"Speech synthesis failed: {str(tts_error)}")
+        audio_ready = False
+
+    audio_failed = audio_future.done() and not audio_ready
+    audio_url = None if audio_failed else f'/api/audio/{audio_filename}'
+    return audio_url, audio_ready
+
+
+def _sse(event: str, data: dict) -> str:
+    """Format one Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def _sse_response(events):
+    return Response(stream_with_context(with_request_deadline(events)),
+                    mimetype='text/event-stream',
+                    headers={
+                        'Cache-Control': 'no-cache',
+                        'X-Accel-Buffering': 'no'
+                    })
+
+
 @api_bp.route('/submit_answer', methods=['POST'])
 def submit_answer():
     """Submit answer and get next question"""
@@ -119,7 +295,8 @@ def submit_answer():
         if not session_id:
             return jsonify({'error': 'No active session'}), 400
 
-        assessment_session = AssessmentSession.query.filter_by(
+        assessment_session = AssessmentSession.query.options(
+            db.undefer_group('analysis')).filter_by(
             session_id=session_id).first()
         if not assessment_session:
             return jsonify({'error': 'Session not found'}), 404
@@ -131,71 +308,285 @@ def submit_answer():
         if not question or not answer:
             return jsonify({'error': 'Question and answer are required'}), 400
 
-        # Add Q&A to session
-        assessment_session.add_question_answer(question, answer)
-        assessment_session.current_question_index += 1
-
-        # Get current Q&A list
-        qa_list = assessment_session.get_questions_answers()
-        logging.info(f"Current Q&A list: {qa_list}")
-
-        # Check if we should continue with more questions (limit to 8 questions)
-        if len(qa_list) >= 8:
-            assessment_session.status = 'completed'
-            db.session.commit()
+        qa_count, completed, next_question = _record_answer(
+            assessment_session, question, answer)
 
+        if completed:
             return jsonify({
                 'success': True,
                 'completed': True,
                 'message': 'Assessment completed successfully!'
             })
-        else:
-            # Generate next question
-            try:
-                print(type(assessment_session.cv_analysis))
-                cv_analysis = eval(assessment_session.cv_analysis
-                                   ) if assessment_session.cv_analysis else {}
-                logging.info(f"CV analysis: {cv_analysis}")
-                next_question = generate_followup_question(
-                    cv_analysis, qa_list)
-            except Exception as api_error:
-                logging.warning(
-                    f"API error generating question, using fallback: {str(api_error)}"
-                )
-                # Fallback questions when API is not available
-                fallback_questions = [
-                    "Quels défis avez-vous rencontrés dans votre carrière, et comment les avez-vous surmontés ?",
-                    "Quelles compétences ou domaines aimeriez-vous développer davantage ?",
-                    "Décrivez un projet ou une réalisation dont vous êtes particulièrement fier(ère).",
-                    "Qu'est-ce qui vous motive le plus dans votre travail professionnel ?",
-                    "Où voyez-vous votre carrière se diriger dans les prochaines années ?",
-                    "Comment gérez-vous le travail sous pression ou avec des délais serrés ?",
-                    "Quelle expérience de leadership avez-vous, et qu'en avez-vous appris ?",
-                    "Quelle est selon vous votre plus grande force et faiblesse professionnelle ?"
-                ]
-                question_index = min(len(qa_list), len(fallback_questions) - 1)
-                next_question = fallback_questions[question_index]
 
-            db.session.commit()
+        return jsonify({
+            'success': True,
+            'completed': False,
+            'next_question': next_question,
+            'speech_token': _speech_token(session_id, next_question),
+            'question_number': qa_count + 1
+        })
+
+    except AnswerConflict as e:
+        db.session.rollback()
+        logging.warning(f"Answer conflict in submit_answer: {str(e)}")
+        return jsonify({'error': 'Answer conflicts with a concurrent submission'}), 409
+    except Exception as e:
+        logging.error(f"Error in submit_answer: {str(e)}")
+        return jsonify({'error': 'Failed to submit answer'}), 500
+
 
+@api_bp.route('/submit_turn', methods=['POST'])
+def submit_turn():
+    """
+    Submit an answer and get the next question together with its audio.
+    Synthesis starts as soon as the question text is known; if it is not
+    finished within TURN_AUDIO_WAIT_SECONDS the audio URL is returned anyway
+    and /api/audio/<filename> waits for it.
+    """
+    try:
+        session_id = session.get('assessment_session_id')
+        if not session_id:
+            return jsonify({'error': 'No active session'}), 400
+
+        assessment_session = AssessmentSession.query.options(
+            db.undefer_group('analysis')).filter_by(
+            session_id=session_id).first()
+        if not assessment_session:
+            return jsonify({'error': 'Session not found'}), 404
+
+        data = request.get_json()
+        question = data.get('question', '')
+        answer = data.get('answer', '')
+
+        if not question or not answer:
+            return jsonify({'error': 'Question and answer are required'}), 400
+
+        qa_count, completed, next_question = _record_answer(
+            assessment_session, question, answer)
+
+        if completed:
             return jsonify({
                 'success': True,
-                'completed': False,
-                'next_question': next_question,
-                'question_number': len(qa_list) + 1
+                'completed': True,
+                'message': 'Assessment completed successfully!'
             })
 
+        audio_url, audio_ready = _synthesize_turn_audio(next_question)
+
+        return jsonify({
+            'success': True,
+            'completed': False,
+            'next_question': next_question,
+            'speech_token': _speech_token(session_id, next_question),
+            'question_number': qa_count + 1,
+            'audio_url': audio_url,
+            'audio_ready': audio_ready
+        })
+
+    except AnswerConflict as e:
+        db.session.rollback()
+        logging.warning(f"Answer conflict in submit_turn: {str(e)}")
+        return jsonify({'error': 'Answer conflicts with a concurrent submission'}), 409
     except Exception as e:
-        logging.error(f"Error in submit_answer: {str(e)}")
+        logging.error(f"Error in submit_turn: {str(e)}")
+        return jsonify({'error': 'Failed to submit answer'}), 500
+
+
+@api_bp.route('/stream/turn', methods=['POST'])
+def stream_turn():
+    """
+    Submit an answer and stream the next question as Server-Sent Events:
+    'token' events carry text as it is generated, 'reset' discards partial
+    text when falling back, 'done' carries the final question and 'audio'
+    its URL once synthesis has started or finished.
+    """
+    try:
+        session_id = session.get('assessment_session_id')
+        if not session_id:
+            return jsonify({'error': 'No active session'}), 400
+
+        assessment_session = AssessmentSession.query.options(
+            db.undefer_group('analysis')).filter_by(
+            session_id=session_id).first()
+        if not assessment_session:
+            return jsonify({'error': 'Session not found'}), 404
+
+        data = request.get_json()
+        question = data.get('question', '')
+        answer = data.get('answer', '')
+
+        if not question or not answer:
+            return jsonify({'error': 'Question and answer are required'}), 400
+
+        qa_count, recent_qa, completed = _save_answer(assessment_session,
+                                                      question, answer)
+        cv_analysis = assessment_session.get_cv_analysis()
+        analysis_context = assessment_session.get_analysis_context()
+        db.session.commit()
+        if not completed:
+            _queue_rolling_summary(session_id)
+
+    except AnswerConflict as e:
+        db.session.rollback()
+        logging.warning(f"Answer conflict in stream_turn: {str(e)}")
+        return jsonify({'error': 'Answer conflicts with a concurrent submission'}), 409
+    except Exception as e:
+        logging.error(f"Error in stream_turn: {str(e)}")
         return jsonify({'error': 'Failed to submit answer'}), 500
 
+    def events():
+        if completed:
+            yield _sse('done', {
+                'completed': True,
+                'message': 'Assessment completed successfully!'
+            })
+            return
+
+        chunks = []
+        try:
+            for chunk in stream_followup_question(cv_analysis, recent_qa,
+                                                  analysis_context):
+                chunks.append(chunk)
+                yield _sse('token', {'text': chunk})
+            next_question = ''.join(chunks).strip()
+            if not next_question:
+                raise ValueError("Réponse vide de Gemini")
+        except Exception as stream_error:
+            logging.warning(
+                f"Streaming question failed, using non-streaming path: {str(stream_error)}"
+            )
+            if chunks:
+                yield _sse('reset', {})
+            next_question = generate_followup_question(
+                cv_analysis, recent_qa, analysis_context)
+
+        yield _sse('done', {
+            'completed': False,
+            'next_question': next_question,
+            'speech_token': _speech_token(session_id, next_question),
+            'question_number': qa_count + 1
+        })
+
+        audio_url, audio_ready = _synthesize_turn_audio(next_question)
+        yield _sse('audio', {'audio_url': audio_url, 'audio_ready': audio_ready})
+
+    return _sse_response(events())
+
+
+@api_bp.route('/transcription/<recording_id>/chunk', methods=['POST'])
+def upload_recording_chunk(recording_id):
+    """
+    Receive one self-contained segment of an answer recording ('audio' file
+    and 'sequence' form fields) and start transcribing it right away
+    """
+    try:
+        session_id = session.get('assessment_session_id')
+        if not session_id:
+            return jsonify({'error': 'No active session'}), 400
+
+        if not RECORDING_ID_PATTERN.match(recording_id):
+            return jsonify({'error': 'Invalid recording id'}), 400
+
+        if get_backend_name() is None:
+            return jsonify({'error': 'Server transcription unavailable'}), 503
+
+        sequence = request.form.get('sequence', type=int)
+        audio = request.files.get('audio')
+        if sequence is None or sequence < 0 or not audio:
+            return jsonify({'error': 'Audio segment and sequence are required'}), 400
+
+        # Segments may be retried by the client; keep the first upload, and
+        # restart its transcription if that never got going
+        existing = AudioFile.query.filter_by(session_id=session_id,
+                                             recording_id=recording_id,
+                                             sequence=sequence).first()
+        if existing:
+            if existing.transcription is None:
+                transcribe_segment(existing.id, existing.file_path)
+            return jsonify({'success': True, 'sequence': sequence})
+
+        extension = os.path.splitext(secure_filename(audio.filename or ''))[1] or '.webm'
+        filename = f"{session_id}_{recording_id}_{sequence:04d}{extension}"
+        file_path = os.path.join(app.config['RECORDINGS_FOLDER'], filename)
+        audio.save(file_path)
+
+        audio_file = AudioFile(session_id=session_id,
+                               filename=filename,
+                               file_path=file_path,
+                               recording_id=recording_id,
+                               sequence=sequence,
+                               size_bytes=os.path.getsize(file_path))
+        audio_file.set_metadata(probe_audio(file_path))
+        db.session.add(audio_file)
+        db.session.commit()
+
+        try:
+            transcribe_segment(audio_file.id, file_path)
+        except Exception:
+            # Forget the segment so that the client's retry starts over
+            db.session.delete(audio_file)
+            db.session.commit()
+            if os.path.exists(file_path):
+                os.remove(file_path)
+            raise
+
+        return jsonify({'success': True, 'sequence': sequence})
+
+    except TranscriptionQueueFull:
+        logging.warning(f"Transcription queue full, refusing segment of {recording_id}")
+        return jsonify({'error': 'Transcription queue is full'}), 503, {'Retry-After': '1'}
+    except Exception as e:
+        logging.error(f"Error in upload_recording_chunk: {str(e)}")
+        return jsonify({'error': 'Failed to store audio segment'}), 500
+
+
+@api_bp.route('/transcription/<recording_id>/finish', methods=['POST'])
+def finish_recording(recording_id):
+    """
+    Wait for the remaining segments of a recording to be transcribed (up to
+    STT_FINISH_TIMEOUT_SECONDS) and return the full text
+    """
+    try:
+        session_id = session.get('assessment_session_id')
+        if not session_id:
+            return jsonify({'error': 'No active session'}), 400
+
+        data = request.get_json(silent=True) or {}
+        expected = data.get('segments')
+        deadline = time.monotonic() + app.config['STT_FINISH_TIMEOUT_SECONDS']
+
+        while True:
+            transcription, done, received = get_recording_transcription(
+                session_id, recording_id)
+            complete = done == received and (expected is None
+                                             or received >= expected)
+            if complete or time.monotonic() >= deadline:
+                break
+            # End the read transaction so the next poll sees new commits
+            db.session.rollback()
+            time.sleep(0.1)
+
+        return jsonify({
+            'success': True,
+            'transcription': transcription,
+            'complete': complete,
+            'segments': received
+        })
+
+    except Exception as e:
+        logging.error(f"Error in finish_recording: {str(e)}")
+        return jsonify({'error': 'Failed to get transcription'}), 500
+
 
 @api_bp.route('/generate_report', methods=['POST'])
 def generate_report():
-    """Generate final assessment report"""
+    """
+    Queue final assessment report generation.
+    Returns a job id immediately; poll /api/jobs/<job_id> for progress.
+    """
     try:
 
-        logging.info("Starting report generation process")
+        logging.info("Queueing report generation")
         session_id = session.get('assessment_session_id')
         if not session_id:
             logging.error("No active session found")
@@ -211,74 +602,101 @@ def generate_report():
         if assessment_session.status != 'completed':
             return jsonify({'error': 'Assessment not completed'}), 400
 
-        # Get CV analysis and Q&A pairs
-        try:
-            cv_analysis = eval(assessment_session.cv_analysis
-                               ) if assessment_session.cv_analysis else {}
-        except Exception as e:
-            # Fallback if JSON parsing fails
-            cv_analysis = {
-                'summary': 'CV analysis completed',
-                'key_skills': [],
-                'experience_years': 0,
-                'career_stage': 'Professional',
-                'notable_achievements': [],
-                'potential_areas_for_growth': []
-            }
-        qa_pairs = assessment_session.get_questions_answers()
+        job = enqueue_job('report', session_id=session_id)
 
-        # Generate final summary using Gemini API
-        logging.info("Generating final summary using Gemini API")
-        try:
-            final_summary = generate_final_summary(cv_analysis, qa_pairs)
-        except Exception as summary_error:
-            logging.warning(
-                f"Error generating summary with API, using fallback: {str(summary_error)}"
-            )
-            final_summary = f"""Résumé de l'Évaluation Professionnelle
+        return jsonify({
+            'success': True,
+            'job_id': job.job_id,
+            'status': job.status,
+            'status_url': f'/api/jobs/{job.job_id}'
+        }), 202
 
-Cette évaluation complète a été réalisée avec {len(qa_pairs)} questions d'entretien basées sur l'analyse du CV du candidat.
+    except Exception as e:
+        logging.error(f"Error in generate_report: {str(e)}")
+        import traceback
+        logging.error(f"Full traceback: {traceback.format_exc()}")
+        return jsonify({'error': 'Report generation failed'}), 500
 
-Points Clés de l'Évaluation :
-• Compétences de Communication : Réponses claires et articulées démontrées tout au long de l'entretien
-• Expérience Professionnelle : Les réponses ont montré une bonne compréhension de la progression de carrière et des défis
-• Compétence Technique : Les réponses reflètent des connaissances appropriées pour le niveau de carrière
-• Orientation Future : Le candidat a montré une réflexion approfondie sur le développement professionnel
 
-Évaluation Globale :
-Le candidat a bien performé lors de cette évaluation vocale, fournissant des réponses réfléchies et complètes à toutes les questions. Les réponses démontrent de solides compétences en communication et une conscience professionnelle. Basé sur la performance de l'entretien, le candidat montre un excellent potentiel pour une croissance et un développement professionnel continus.
+@api_bp.route('/jobs/<job_id>')
+def job_status(job_id):
+    """Get the status and progress of a background job"""
+    try:
+        job = get_job(job_id)
+        if not job or job.session_id != session.get('assessment_session_id'):
+            return jsonify({'error': 'Job not found'}), 404
+
+        response = {
+            'job_id': job.job_id,
+            'kind': job.kind,
+            'status': job.status,
+            'progress': job.progress,
+            'stage': job.stage
+        }
+        if job.status == 'done':
+            result = job.get_result()
+            response['report_url'] = result.get('report_url')
+            response['summary'] = result.get('summary')
+        elif job.status == 'failed':
+            response['error'] = 'Report generation failed'
+
+        return jsonify(response)
 
-Évaluation complétée le {datetime.now().strftime('%d %B %Y à %H:%M')}"""
+    except Exception as e:
+        logging.error(f"Error in job_status: {str(e)}")
+        return jsonify({'error': 'Failed to get job status'}), 500
 
-        # Generate PDF report
-        logging.info("Generating PDF report")
-        report_filename = create_report_filename(session_id)
-        report_path = os.path.join(app.config['REPORTS_FOLDER'],
-                                   report_filename)
 
-        # Ensure reports directory exists
-        os.makedirs(app.config['REPORTS_FOLDER'], exist_ok=True)
-        logging.info(f"Report will be saved to: {report_path}")
+@api_bp.route('/stream/final_summary')
+def stream_final_summary_route():
+    """
+    Stream the final assessment summary as Server-Sent Events ('token',
+    'reset' and 'done'), falling back to the non-streaming generator
+    """
+    try:
+        session_id = session.get('assessment_session_id')
+        if not session_id:
+            return jsonify({'error': 'No active session'}), 400
 
-        success = generate_assessment_report(cv_analysis, qa_pairs,
-                                             final_summary, report_path)
+        assessment_session = AssessmentSession.query.options(
+            db.undefer_group('analysis')).filter_by(
+            session_id=session_id).first()
+        if not assessment_session:
+            return jsonify({'error': 'Session not found'}), 404
 
-        if success:
-            logging.info("Report generated successfully")
-            return jsonify({
-                'success': True,
-                'report_url': f'/download_report/{session_id}',
-                'summary': final_summary
-            })
-        else:
-            logging.error("Failed to generate PDF report")
-            return jsonify({'error': 'Failed to generate report'}), 500
+        if assessment_session.status != 'completed':
+            return jsonify({'error': 'Assessment not completed'}), 400
+
+        cv_analysis = assessment_session.get_cv_analysis()
+        qa_pairs = assessment_session.get_questions_answers()
+        rolling_summary = assessment_session.get_rolling_summary()
 
     except Exception as e:
-        logging.error(f"Error in generate_report: {str(e)}")
-        import traceback
-        logging.error(f"Full traceback: {traceback.format_exc()}")
-        return jsonify({'error': 'Report generation failed'}), 500
+        logging.error(f"Error in stream_final_summary: {str(e)}")
+        return jsonify({'error': 'Failed to generate summary'}), 500
+
+    def events():
+        chunks = []
+        try:
+            for chunk in stream_final_summary(cv_analysis, qa_pairs,
+                                              rolling_summary):
+                chunks.append(chunk)
+                yield _sse('token', {'text': chunk})
+            summary = ''.join(chunks).strip()
+            if not summary:
+                raise ValueError("Réponse vide de Gemini")
+        except Exception as stream_error:
+            logging.warning(
+                f"Streaming summary failed, using non-streaming path: {str(stream_error)}"
+            )
+            if chunks:
+                yield _sse('reset', {})
+            summary = generate_final_summary(cv_analysis, qa_pairs,
+                                             rolling_summary)
+
+        yield _sse('done', {'summary': summary})
+
+    return _sse_response(events())
 
 
 @api_bp.route('/debug_session')
@@ -295,9 +713,11 @@ def debug_session():
                 'status':
                 assessment_session.status,
                 'questions_count':
-                len(assessment_session.get_questions_answers()),
+                assessment_session.count_questions_answers(),
                 'has_cv_analysis':
-                bool(assessment_session.cv_analysis)
+                db.session.query(AssessmentSession.cv_analysis.isnot(
+                    None)).filter(AssessmentSession.id ==
+                                  assessment_session.id).scalar()
             })
         else:
             return jsonify({'error': 'Session not found in database'})
@@ -318,14 +738,15 @@ def session_status():
         if not assessment_session:
             return jsonify({'error': 'Session not found'}), 404
 
-        qa_pairs = assessment_session.get_questions_answers()
+        qa_count = assessment_session.count_questions_answers()
 
         return jsonify({
             'session_id': session_id,
             'status': assessment_session.status,
             'current_question': assessment_session.current_question_index,
-            'total_questions': len(qa_pairs),
-            'cv_filename': assessment_session.cv_filename
+            'total_questions': qa_count,
+            'cv_filename': assessment_session.cv_filename,
+            'speaking_time': AudioFile.speaking_time_stats(session_id)
         })
 
     except Exception as e:
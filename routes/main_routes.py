@@ -1,12 +1,11 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session, send_file
-from werkzeug.utils import secure_filename
+from flask import Blueprint, Response, render_template, request, redirect, url_for, flash, session, send_file
 import os
 import uuid
 import logging
 from app import db
-from models import AssessmentSession
-from services.cv_processor import save_uploaded_file, process_cv_file, allowed_file
-from services.gemini_service import analyze_cv_content, generate_first_question
+from models import AssessmentSession, ReportArtifact
+from services.cv_processor import read_cv_upload, content_hash_filename, persist_upload_async, allowed_file
+from services.metrics import render_metrics
 
 main_bp = Blueprint('main', __name__)
 
@@ -32,19 +31,18 @@ def upload_cv():
             flash('Invalid file type. Please upload a PDF or DOCX file.', 'error')
             return redirect(url_for('main.index'))
 
-        # Save the uploaded file
-        from app import app
-        success, filename, file_path = save_uploaded_file(file, app.config['UPLOAD_FOLDER'])
-
-        if not success:
-            flash('Error uploading file. Please try again.', 'error')
+        # Extract text straight from the upload stream (type is sniffed first)
+        cv_content, content, error = read_cv_upload(file)
+        if error:
+            flash(error, 'error')
             return redirect(url_for('main.index'))
 
-        # Extract text from CV
-        cv_content = process_cv_file(file_path, filename)
-        if not cv_content:
-            flash('Could not extract text from CV. Please ensure it\'s a valid PDF or DOCX file.', 'error')
-            return redirect(url_for('main.index'))
+        filename = content_hash_filename(file.filename, content)
+
+        # Optionally keep the original file, written off the request path
+        from app import app
+        if app.config['PERSIST_UPLOADS']:
+            persist_upload_async(content, app.config['UPLOAD_FOLDER'], filename)
 
         # Generate session ID
         session_id = str(uuid.uuid4())
@@ -104,7 +102,7 @@ def report():
             flash('No active assessment session. Please upload your CV first.', 'error')
             return redirect(url_for('main.index'))
 
-        assessment_session = AssessmentSession.query.filter_by(session_id=session_id).first()
+        assessment_session = AssessmentSession.query.options(db.undefer_group('analysis')).filter_by(session_id=session_id).first()
         if not assessment_session:
             flash('Assessment session not found. Please start a new assessment.', 'error')
             return redirect(url_for('main.index'))
@@ -140,23 +138,30 @@ def download_report(session_id):
     """Download assessment report"""
     try:
         from app import app
-        # Find the report file
-        report_filename = None
-        reports_dir = app.config['REPORTS_FOLDER']
-        
-        for filename in os.listdir(reports_dir):
-            if filename.startswith(f'assessment_report_{session_id}'):
-                report_filename = filename
-                break
-        
-        if not report_filename:
+        # Find the latest report registered for this session
+        artifact = ReportArtifact.latest_for_session(session_id)
+
+        if not artifact or not os.path.exists(artifact.file_path):
             flash('Report not found. Please generate the report first.', 'error')
             return redirect(url_for('main.report'))
-        
-        report_path = os.path.join(reports_dir, report_filename)
-        return send_file(report_path, as_attachment=True, download_name=f'assessment_report_{session_id}.pdf')
+
+        # conditional=True answers If-None-Match / If-Modified-Since with 304
+        # and serves Range requests as 206 partial content
+        return send_file(artifact.file_path,
+                         mimetype='application/pdf',
+                         as_attachment=True,
+                         download_name=f'assessment_report_{session_id}.pdf',
+                         conditional=True,
+                         etag=artifact.content_hash,
+                         last_modified=artifact.created_at,
+                         max_age=0)
         
     except Exception as e:
         logging.error(f"Error in download_report: {str(e)}")
         flash('Error downloading report. Please try again.', 'error')
-        return redirect(url_for('main.report'))
\ No newline at end of file
+        return redirect(url_for('main.report'))
+
+@main_bp.route('/metrics')
+def metrics():
+    """Prometheus scrape endpoint (per-process metrics)"""
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
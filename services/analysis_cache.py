@@ -0,0 +1,195 @@
+import hashlib
+import logging
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from flask import current_app
+from app import db
+from models import CVAnalysisCache
+from services.gemini_service import analyze_cv_content, CV_ANALYSIS_MODEL, CV_ANALYSIS_PROMPT_VERSION
+
+
+class LRUCache:
+    """
+    Small thread-safe LRU cache with a per-entry TTL
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_memory_cache = None
+_memory_cache_lock = threading.Lock()
+
+
+def _get_memory_cache() -> LRUCache:
+    global _memory_cache
+    if _memory_cache is None:
+        with _memory_cache_lock:
+            if _memory_cache is None:
+                _memory_cache = LRUCache(
+                    current_app.config.get('CV_CACHE_MEMORY_ENTRIES', 256),
+                    current_app.config.get('CV_CACHE_TTL_SECONDS', 7 * 24 * 3600))
+    return _memory_cache
+
+
+def normalize_cv_text(cv_text: str) -> str:
+    """
+    Normalize CV text so that trivially different extractions of the same
+    document (unicode forms, spacing, blank lines) share a cache key
+    """
+    text = unicodedata.normalize('NFC', cv_text or '')
+    lines = (re.sub(r'\s+', ' ', line).strip() for line in text.splitlines())
+    return '\n'.join(line for line in lines if line)
+
+
+def make_cache_key(cv_text: str,
+                   model: str = CV_ANALYSIS_MODEL,
+                   prompt_version: str = CV_ANALYSIS_PROMPT_VERSION) -> str:
+    digest = hashlib.sha256()
+    digest.update(f"{model}\0{prompt_version}\0".encode('utf-8'))
+    digest.update(normalize_cv_text(cv_text).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def get_cached_analysis(cv_text: str):
+    """
+    Look up a CV analysis in the memory tier, then the database tier
+    Output: analysis dict, or None on a miss
+    """
+    cache_key = make_cache_key(cv_text)
+    memory_cache = _get_memory_cache()
+
+    analysis = memory_cache.get(cache_key)
+    if analysis is not None:
+        logging.info(f"CV analysis cache hit (memory): {cache_key[:12]}")
+        return analysis
+
+    try:
+        ttl = timedelta(seconds=current_app.config.get('CV_CACHE_TTL_SECONDS', 7 * 24 * 3600))
+        entry = CVAnalysisCache.query.filter_by(cache_key=cache_key).first()
+        if not entry:
+            return None
+        if entry.created_at < datetime.utcnow() - ttl:
+            db.session.delete(entry)
+            db.session.commit()
+            return None
+
+        analysis = entry.get_analysis()
+        entry.hit_count = (entry.hit_count or 0) + 1
+        entry.last_accessed_at = datetime.utcnow()
+        db.session.commit()
+
+        memory_cache.set(cache_key, analysis)
+        logging.info(f"CV analysis cache hit (database): {cache_key[:12]}")
+        return analysis
+    except Exception as e:
+        db.session.rollback()
+        logging.warning(f"CV analysis cache lookup failed: {str(e)}")
+        return None
+
+
+def store_analysis(cv_text: str, analysis: dict):
+    """
+    Store a CV analysis in both cache tiers and evict expired or excess rows
+    """
+    cache_key = make_cache_key(cv_text)
+    _get_memory_cache().set(cache_key, analysis)
+
+    try:
+        entry = CVAnalysisCache.query.filter_by(cache_key=cache_key).first()
+        if not entry:
+            entry = CVAnalysisCache(cache_key=cache_key,
+                                    model=CV_ANALYSIS_MODEL,
+                                    prompt_version=CV_ANALYSIS_PROMPT_VERSION)
+            db.session.add(entry)
+        entry.set_analysis(analysis)
+        entry.created_at = datetime.utcnow()
+        entry.last_accessed_at = datetime.utcnow()
+        db.session.commit()
+
+        evict_expired_entries()
+    except Exception as e:
+        db.session.rollback()
+        logging.warning(f"Failed to persist CV analysis cache entry: {str(e)}")
+
+
+def evict_expired_entries() -> int:
+    """
+    Delete expired rows, then the least recently used rows above the size cap
+    Output: number of rows deleted
+    """
+    ttl = timedelta(seconds=current_app.config.get('CV_CACHE_TTL_SECONDS', 7 * 24 * 3600))
+    max_rows = current_app.config.get('CV_CACHE_MAX_ROWS', 5000)
+
+    deleted = CVAnalysisCache.query.filter(
+        CVAnalysisCache.created_at < datetime.utcnow() - ttl).delete(
+            synchronize_session=False)
+
+    excess = CVAnalysisCache.query.count() - max_rows
+    if excess > 0:
+        stale_ids = [
+            row.id for row in CVAnalysisCache.query.with_entities(
+                CVAnalysisCache.id).order_by(
+                    CVAnalysisCache.last_accessed_at.asc()).limit(excess)
+        ]
+        deleted += CVAnalysisCache.query.filter(
+            CVAnalysisCache.id.in_(stale_ids)).delete(synchronize_session=False)
+
+    db.session.commit()
+    if deleted:
+        logging.info(f"Evicted {deleted} CV analysis cache entries")
+    return deleted
+
+
+def _store_if_primary(cv_text: str, analysis: dict, model: str):
+    # An analysis from the downgrade model is used once but not cached, so
+    # the next upload of the same CV gets the primary model again
+    if model == CV_ANALYSIS_MODEL:
+        store_analysis(cv_text, analysis)
+    else:
+        logging.info(f"Not caching CV analysis produced by {model}")
+
+
+def analyze_cv_cached(cv_text: str) -> dict:
+    """
+    Analyze CV content, reusing a previous result for the same normalized text,
+    model and prompt version when one is available
+    """
+    analysis = get_cached_analysis(cv_text)
+    if analysis is not None:
+        return analysis
+
+    analysis, model = analyze_cv_content(cv_text, return_model=True)
+    _store_if_primary(cv_text, analysis, model)
+    return analysis
+
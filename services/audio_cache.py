@@ -0,0 +1,280 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from flask import current_app
+from services.speech_service import text_to_speech, stream_text_to_speech, ELEVENLABS_VOICE_ID, ELEVENLABS_MODEL_ID, ELEVENLABS_VOICE_SETTINGS
+from services.gemini_service import FALLBACK_FIRST_QUESTION, FALLBACK_FOLLOWUP_QUESTIONS
+
+CACHE_FILE_PREFIX = 'tts_'
+# Background syntheses leave a '<clip>.pending.part' marker so that every
+# gunicorn worker can tell the clip is on its way. Markers older than this
+# were left by a process that died.
+PENDING_MARKER_SUFFIX = '.pending.part'
+PENDING_MARKER_MAX_AGE_SECONDS = 120
+PENDING_POLL_SECONDS = 0.1
+
+# Striped locks so concurrent requests for the same clip synthesize it once
+_key_locks = [threading.Lock() for _ in range(64)]
+
+
+def _lock_for(cache_key: str) -> threading.Lock:
+    return _key_locks[int(cache_key[:8], 16) % len(_key_locks)]
+
+
+# Background synthesis for requests that return before the audio is ready
+_synthesis_executor = ThreadPoolExecutor(max_workers=4,
+                                         thread_name_prefix='tts')
+_pending = {}  # filename -> Future
+_pending_lock = threading.Lock()
+
+
+def get_static_questions() -> list:
+    """Questions that are the same for every candidate"""
+    return [FALLBACK_FIRST_QUESTION] + list(FALLBACK_FOLLOWUP_QUESTIONS)
+
+
+def audio_cache_key(text: str,
+                    voice_id: str = ELEVENLABS_VOICE_ID,
+                    model_id: str = ELEVENLABS_MODEL_ID,
+                    voice_settings: dict = None) -> str:
+    """
+    Content address of a synthesized clip: voice, model, settings and text hash
+    """
+    text_hash = hashlib.sha256(text.strip().encode('utf-8')).hexdigest()
+    identity = json.dumps({
+        'voice_id': voice_id,
+        'model_id': model_id,
+        'voice_settings': voice_settings or ELEVENLABS_VOICE_SETTINGS,
+        'text': text_hash
+    }, sort_keys=True)
+    return hashlib.sha256(identity.encode('utf-8')).hexdigest()
+
+
+def cache_filename(cache_key: str) -> str:
+    return f"{CACHE_FILE_PREFIX}{cache_key}.mp3"
+
+
+def get_cache_folder() -> str:
+    folder = current_app.config['AUDIO_CACHE_FOLDER']
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+
+def _marker_path(filename: str) -> str:
+    return os.path.join(get_cache_folder(), filename + PENDING_MARKER_SUFFIX)
+
+
+def _marker_is_fresh(marker_path: str) -> bool:
+    try:
+        return time.time() - os.path.getmtime(marker_path) < PENDING_MARKER_MAX_AGE_SECONDS
+    except OSError:
+        return False
+
+
+def is_speech_pending(filename: str) -> bool:
+    """Whether any process is synthesizing this clip in the background"""
+    with _pending_lock:
+        if filename in _pending:
+            return True
+    return _marker_is_fresh(_marker_path(filename))
+
+
+def get_or_create_speech(text: str):
+    """
+    Return the cached audio filename for this text, synthesizing it on a miss
+    Output: filename inside AUDIO_CACHE_FOLDER, or None if synthesis failed
+    """
+    cache_key = audio_cache_key(text)
+    filename = cache_filename(cache_key)
+    file_path = os.path.join(get_cache_folder(), filename)
+
+    with _lock_for(cache_key):
+        if os.path.exists(file_path):
+            # Refresh the modification time so eviction is least-recently-used
+            os.utime(file_path, None)
+            logging.info(f"TTS cache hit: {filename}")
+            return filename
+
+        tmp_path = f"{file_path}.{uuid.uuid4().hex}.part"
+        if not text_to_speech(text, tmp_path):
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return None
+        os.replace(tmp_path, file_path)
+
+    evict_audio_cache()
+    return filename
+
+
+def synthesize_speech_async(text: str) -> tuple:
+    """
+    Start synthesizing a clip in the background
+    Output: (filename, future resolving to the filename or None on failure)
+    """
+    filename = cache_filename(audio_cache_key(text))
+    if os.path.exists(os.path.join(get_cache_folder(), filename)):
+        future = Future()
+        future.set_result(filename)
+        return filename, future
+
+    app = current_app._get_current_object()
+    marker_path = _marker_path(filename)
+
+    def run():
+        with app.app_context():
+            try:
+                return get_or_create_speech(text)
+            finally:
+                with _pending_lock:
+                    _pending.pop(filename, None)
+                try:
+                    os.remove(marker_path)
+                except OSError:
+                    pass
+
+    with _pending_lock:
+        future = _pending.get(filename)
+        if future is None:
+            try:
+                open(marker_path, 'a').close()
+            except OSError as e:
+                logging.warning(f"Could not mark {filename} as pending: {str(e)}")
+            future = _synthesis_executor.submit(run)
+            _pending[filename] = future
+    return filename, future
+
+
+def wait_for_speech(filename: str, timeout: float) -> bool:
+    """
+    Wait for an in-flight synthesis of this clip, if any, in this process or
+    (through its pending marker) in another one
+    Output: True if the clip exists when the call returns
+    """
+    file_path = os.path.join(get_cache_folder(), filename)
+    with _pending_lock:
+        future = _pending.get(filename)
+    if future is not None:
+        try:
+            future.result(timeout=timeout)
+        except Exception as e:
+            logging.warning(f"Waiting for audio {filename} failed: {str(e)}")
+        return os.path.exists(file_path)
+
+    deadline = time.monotonic() + timeout
+    marker_path = _marker_path(filename)
+    while not os.path.exists(file_path) and _marker_is_fresh(marker_path) \
+            and time.monotonic() < deadline:
+        time.sleep(PENDING_POLL_SECONDS)
+    return os.path.exists(file_path)
+
+
+def stream_speech(text: str, pending_wait_seconds: float = 30) -> tuple:
+    """
+    Stream a clip from the provider while teeing it into the cache
+    Output: (filename, chunk iterator), or (filename, None) when the clip is
+    already cached and can be served from disk
+    """
+    filename = cache_filename(audio_cache_key(text))
+    file_path = os.path.join(get_cache_folder(), filename)
+
+    # A background synthesis of the same clip finishes sooner than a new one
+    if wait_for_speech(filename, pending_wait_seconds):
+        os.utime(file_path, None)
+        logging.info(f"TTS cache hit: {filename}")
+        return filename, None
+
+    chunks = stream_text_to_speech(text)
+    tmp_path = f"{file_path}.{uuid.uuid4().hex}.part"
+
+    def tee():
+        completed = False
+        try:
+            with open(tmp_path, 'wb') as f:
+                for chunk in chunks:
+                    f.write(chunk)
+                    yield chunk
+            os.replace(tmp_path, file_path)
+            completed = True
+            logging.info(f"Streamed audio cached as {filename}")
+        finally:
+            # Also runs when the client disconnects mid-stream
+            chunks.close()
+            if not completed and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        evict_audio_cache()
+
+    return filename, tee()
+
+
+def evict_audio_cache() -> int:
+    """
+    Delete least recently used clips until the cache fits AUDIO_CACHE_MAX_BYTES.
+    Pre-rendered static questions are never evicted.
+    Output: number of bytes reclaimed
+    """
+    folder = get_cache_folder()
+    max_bytes = current_app.config.get('AUDIO_CACHE_MAX_BYTES', 200 * 1024 * 1024)
+    pinned = {cache_filename(audio_cache_key(q)) for q in get_static_questions()}
+
+    entries = []
+    total_bytes = 0
+    for entry in os.scandir(folder):
+        if not entry.is_file() or not entry.name.startswith(CACHE_FILE_PREFIX) \
+                or not entry.name.endswith('.mp3'):
+            continue
+        stat = entry.stat()
+        total_bytes += stat.st_size
+        if entry.name not in pinned:
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+    reclaimed = 0
+    for _, size, path in sorted(entries):
+        if total_bytes <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            total_bytes -= size
+            reclaimed += size
+        except OSError as e:
+            logging.warning(f"Failed to evict cached audio {path}: {str(e)}")
+
+    if reclaimed:
+        logging.info(f"Evicted {reclaimed} bytes from the TTS cache")
+    return reclaimed
+
+
+def warm_audio_cache(texts: list = None) -> dict:
+    """
+    Pre-render audio for the static questions (or the given texts)
+    Output: counts of rendered, cached and failed clips
+    """
+    stats = {'rendered': 0, 'cached': 0, 'failed': 0}
+    for text in texts or get_static_questions():
+        file_path = os.path.join(get_cache_folder(),
+                                 cache_filename(audio_cache_key(text)))
+        if os.path.exists(file_path):
+            stats['cached'] += 1
+        elif get_or_create_speech(text):
+            stats['rendered'] += 1
+        else:
+            stats['failed'] += 1
+    logging.info(f"TTS cache warm-up finished: {stats}")
+    return stats
+
+
+def start_background_warmup(app):
+    """Warm the audio cache in a daemon thread so startup is not delayed"""
+
+    def run():
+        with app.app_context():
+            try:
+                warm_audio_cache()
+            except Exception as e:
+                logging.error(f"TTS cache warm-up failed: {str(e)}")
+
+    threading.Thread(target=run, name='tts-warmup', daemon=True).start()
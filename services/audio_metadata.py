@@ -0,0 +1,333 @@
+import logging
+import os
+import struct
+
+# Reads only container and frame headers (never decodes audio) to get the
+# exact duration, bitrate, sample rate and channel count of MP3, WAV, Ogg
+# (Opus/Vorbis) and WebM/Matroska files.
+
+MP3_SCAN_BYTES = 64 * 1024
+OGG_TAIL_BYTES = 64 * 1024
+
+# Bitrates in kbit/s indexed by [version group][layer][bitrate index]
+_MP3_BITRATES = {
+    'v1': {
+        1: [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+        2: [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+        3: [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320]
+    },
+    'v2': {
+        1: [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+        2: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+        3: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160]
+    }
+}
+_MP3_SAMPLE_RATES = {1: [44100, 48000, 32000], 2: [22050, 24000, 16000], 2.5: [11025, 12000, 8000]}
+_MP3_VERSIONS = {0: 2.5, 2: 2, 3: 1}
+_MP3_LAYERS = {1: 3, 2: 2, 3: 1}
+
+# Matroska element ids
+EBML_MASTER_IDS = {
+    0x1A45DFA3,  # EBML header
+    0x18538067,  # Segment
+    0x1549A966,  # Info
+    0x1654AE6B,  # Tracks
+    0xAE,  # TrackEntry
+    0xE1,  # Audio
+    0x1F43B675,  # Cluster
+    0xA0  # BlockGroup
+}
+EBML_TIMECODE_SCALE = 0x2AD7B1
+EBML_DURATION = 0x4489
+EBML_SAMPLING_FREQUENCY = 0xB5
+EBML_CHANNELS = 0x9F
+EBML_CLUSTER_TIMECODE = 0xE7
+EBML_BLOCKS = {0xA3, 0xA1}  # SimpleBlock, Block
+
+
+def _parse_mp3_header(header: bytes):
+    """
+    Decode a 4-byte MPEG audio frame header
+    Output: dict, or None if the bytes are not a valid header
+    """
+    value = struct.unpack('>I', header)[0]
+    if value >> 21 != 0x7FF:
+        return None
+    version = _MP3_VERSIONS.get((value >> 19) & 0x3)
+    layer = _MP3_LAYERS.get((value >> 17) & 0x3)
+    bitrate_index = (value >> 12) & 0xF
+    sample_rate_index = (value >> 10) & 0x3
+    if version is None or layer is None or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None
+
+    bitrate = _MP3_BITRATES['v1' if version == 1 else 'v2'][layer][bitrate_index] * 1000
+    sample_rate = _MP3_SAMPLE_RATES[version][sample_rate_index]
+    padding = (value >> 9) & 0x1
+    channels = 1 if ((value >> 6) & 0x3) == 3 else 2
+
+    if layer == 1:
+        samples_per_frame = 384
+        frame_length = (12 * bitrate // sample_rate + padding) * 4
+    elif layer == 3 and version != 1:
+        samples_per_frame = 576
+        frame_length = 72 * bitrate // sample_rate + padding
+    else:
+        samples_per_frame = 1152
+        frame_length = 144 * bitrate // sample_rate + padding
+
+    return {
+        'version': version,
+        'layer': layer,
+        'bitrate': bitrate,
+        'sample_rate': sample_rate,
+        'channels': channels,
+        'samples_per_frame': samples_per_frame,
+        'frame_length': frame_length
+    }
+
+
+def _probe_mp3(f, file_size: int):
+    f.seek(0)
+    head = f.read(10)
+    audio_start = 0
+    if head[:3] == b'ID3' and len(head) == 10:
+        # ID3v2 size is a 28-bit syncsafe integer, plus an optional footer
+        tag_size = (head[6] << 21) | (head[7] << 14) | (head[8] << 7) | head[9]
+        audio_start = 10 + tag_size + (10 if head[5] & 0x10 else 0)
+
+    f.seek(audio_start)
+    data = f.read(MP3_SCAN_BYTES)
+    audio_end = file_size
+    f.seek(max(0, file_size - 128))
+    if f.read(3) == b'TAG':
+        audio_end -= 128
+
+    for offset in range(max(0, len(data) - 4)):
+        if data[offset] != 0xFF:
+            continue
+        frame = _parse_mp3_header(data[offset:offset + 4])
+        if frame is None:
+            continue
+        # Require the next frame to start where this one ends
+        next_offset = offset + frame['frame_length']
+        if next_offset + 4 <= len(data) and _parse_mp3_header(data[next_offset:next_offset + 4]) is None:
+            continue
+        first_frame = audio_start + offset
+        break
+    else:
+        return None
+
+    audio_bytes = audio_end - first_frame
+    frame_count = None
+    side_info = (32 if frame['channels'] == 2 else 17) if frame['version'] == 1 else (
+        17 if frame['channels'] == 2 else 9)
+    xing = data[offset + 4 + side_info:offset + 4 + side_info + 16]
+    vbri = data[offset + 36:offset + 36 + 18]
+    if xing[:4] in (b'Xing', b'Info'):
+        flags = struct.unpack('>I', xing[4:8])[0]
+        if flags & 0x1:
+            frame_count = struct.unpack('>I', xing[8:12])[0]
+        if flags & 0x2:
+            audio_bytes = struct.unpack('>I', xing[12:16] if flags & 0x1 else xing[8:12])[0]
+    elif vbri[:4] == b'VBRI':
+        audio_bytes = struct.unpack('>I', vbri[10:14])[0]
+        frame_count = struct.unpack('>I', vbri[14:18])[0]
+
+    if frame_count:
+        duration = frame_count * frame['samples_per_frame'] / frame['sample_rate']
+        bitrate = int(audio_bytes * 8 / duration) if duration else frame['bitrate']
+    else:
+        # Constant bitrate: the byte count gives the duration directly
+        bitrate = frame['bitrate']
+        duration = audio_bytes * 8 / bitrate
+
+    return {
+        'format': 'mp3',
+        'duration_seconds': duration,
+        'bitrate': bitrate,
+        'sample_rate': frame['sample_rate'],
+        'channels': frame['channels']
+    }
+
+
+def _probe_wav(f, file_size: int):
+    f.seek(12)
+    fmt = None
+    while True:
+        chunk_header = f.read(8)
+        if len(chunk_header) < 8:
+            return None
+        chunk_id, chunk_size = struct.unpack('<4sI', chunk_header)
+        if chunk_id == b'fmt ':
+            fmt = struct.unpack('<HHIIHH', f.read(16))
+            f.seek(chunk_size - 16 + (chunk_size & 1), os.SEEK_CUR)
+        elif chunk_id == b'data':
+            if fmt is None:
+                return None
+            _, channels, sample_rate, byte_rate, _, _ = fmt
+            data_size = chunk_size
+            if data_size in (0, 0xFFFFFFFF):
+                # Streamed WAV without a final size: use what is on disk
+                data_size = file_size - f.tell()
+            return {
+                'format': 'wav',
+                'duration_seconds': data_size / byte_rate if byte_rate else None,
+                'bitrate': byte_rate * 8,
+                'sample_rate': sample_rate,
+                'channels': channels
+            }
+        else:
+            f.seek(chunk_size + (chunk_size & 1), os.SEEK_CUR)
+
+
+def _probe_ogg(f, file_size: int):
+    f.seek(0)
+    header = f.read(27)
+    if len(header) < 27:
+        return None
+    serial = header[14:18]
+    segment_count = header[26]
+    f.seek(27 + segment_count)
+    packet = f.read(32)
+
+    if packet[:8] == b'OpusHead':
+        channels = packet[9]
+        pre_skip = struct.unpack('<H', packet[10:12])[0]
+        sample_rate = struct.unpack('<I', packet[12:16])[0]
+        # Opus granule positions always count 48 kHz samples
+        granule_rate, granule_offset = 48000, pre_skip
+        codec = 'opus'
+    elif packet[:7] == b'\x01vorbis':
+        channels = packet[11]
+        sample_rate = struct.unpack('<I', packet[12:16])[0]
+        granule_rate, granule_offset = sample_rate, 0
+        codec = 'vorbis'
+    else:
+        return None
+
+    # The last page of the stream carries the final granule position
+    f.seek(max(0, file_size - OGG_TAIL_BYTES))
+    tail = f.read()
+    position = tail.rfind(b'OggS')
+    while position != -1 and tail[position + 14:position + 18] != serial:
+        position = tail.rfind(b'OggS', 0, position)
+    if position == -1 or len(tail) < position + 14:
+        return None
+    granule = struct.unpack('<q', tail[position + 6:position + 14])[0]
+
+    duration = max(0, granule - granule_offset) / granule_rate
+    return {
+        'format': f'ogg/{codec}',
+        'duration_seconds': duration,
+        'bitrate': int(file_size * 8 / duration) if duration else None,
+        'sample_rate': sample_rate,
+        'channels': channels
+    }
+
+
+def _read_vint(f, keep_marker: bool):
+    """
+    Read an EBML variable-length integer
+    Output: (value, is_unknown_size), or (None, False) at end of file
+    """
+    first = f.read(1)
+    if not first:
+        return None, False
+    first = first[0]
+    length = 1
+    mask = 0x80
+    while length <= 8 and not first & mask:
+        mask >>= 1
+        length += 1
+    if length > 8:
+        raise ValueError("Invalid EBML integer")
+
+    rest = f.read(length - 1)
+    if len(rest) < length - 1:
+        return None, False
+    value = first if keep_marker else first & (mask - 1)
+    for byte in rest:
+        value = (value << 8) | byte
+    unknown = not keep_marker and value == (1 << (7 * length)) - 1
+    return value, unknown
+
+
+def _probe_webm(f, file_size: int):
+    f.seek(0)
+    timecode_scale = 1000000
+    duration = None
+    sample_rate = None
+    channels = None
+    cluster_timecode = 0
+    last_block_timecode = None
+
+    # Flat walk: descend into master elements (whose children follow
+    # directly, even when the size is unknown) and skip everything else
+    while f.tell() < file_size:
+        element_id, _ = _read_vint(f, keep_marker=True)
+        size, unknown = _read_vint(f, keep_marker=False)
+        if element_id is None or size is None:
+            break
+        if element_id in EBML_MASTER_IDS:
+            continue
+        if unknown:
+            break
+
+        if element_id == EBML_TIMECODE_SCALE:
+            timecode_scale = int.from_bytes(f.read(size), 'big')
+        elif element_id == EBML_DURATION:
+            duration = struct.unpack('>f' if size == 4 else '>d', f.read(size))[0]
+        elif element_id == EBML_SAMPLING_FREQUENCY and sample_rate is None:
+            sample_rate = int(struct.unpack('>f' if size == 4 else '>d', f.read(size))[0])
+        elif element_id == EBML_CHANNELS and channels is None:
+            channels = int.from_bytes(f.read(size), 'big')
+        elif element_id == EBML_CLUSTER_TIMECODE:
+            cluster_timecode = int.from_bytes(f.read(size), 'big')
+        elif element_id in EBML_BLOCKS:
+            block_start = f.tell()
+            _read_vint(f, keep_marker=False)  # track number
+            relative = struct.unpack('>h', f.read(2))[0]
+            block_timecode = cluster_timecode + relative
+            if last_block_timecode is None or block_timecode > last_block_timecode:
+                last_block_timecode = block_timecode
+            f.seek(block_start + size)
+        else:
+            f.seek(size, os.SEEK_CUR)
+
+    if duration is None:
+        # Recorders that stream WebM (e.g. MediaRecorder) omit the Duration
+        # element; the last block's timestamp is within a frame of the end
+        if last_block_timecode is None:
+            return None
+        duration = last_block_timecode
+    duration_seconds = duration * timecode_scale / 1e9
+
+    return {
+        'format': 'webm',
+        'duration_seconds': duration_seconds,
+        'bitrate': int(file_size * 8 / duration_seconds) if duration_seconds else None,
+        'sample_rate': sample_rate,
+        'channels': channels
+    }
+
+
+def probe_audio(file_path: str):
+    """
+    Read duration, bitrate, sample rate and channels from an audio file's headers
+    Output: dict with format, duration_seconds, bitrate (bit/s), sample_rate
+    and channels, or None if the format is not recognised
+    """
+    try:
+        file_size = os.path.getsize(file_path)
+        with open(file_path, 'rb') as f:
+            magic = f.read(12)
+            if magic[:4] == b'RIFF' and magic[8:12] == b'WAVE':
+                return _probe_wav(f, file_size)
+            if magic[:4] == b'OggS':
+                return _probe_ogg(f, file_size)
+            if magic[:4] == b'\x1a\x45\xdf\xa3':
+                return _probe_webm(f, file_size)
+            return _probe_mp3(f, file_size)
+    except Exception as e:
+        logging.warning(f"Could not read audio metadata from {file_path}: {str(e)}")
+        return None
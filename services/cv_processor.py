@@ -1,85 +1,240 @@
+import hashlib
+import io
 import os
 import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
 import PyPDF2
 import docx
 from werkzeug.utils import secure_filename
+from services.metrics import timed
 
 ALLOWED_EXTENSIONS = {'pdf', 'docx', 'doc'}
 
+# PDF extraction limits: enough text for CV analysis, bounded work per upload
+PDF_MAX_PAGES = int(os.environ.get("PDF_MAX_PAGES", 20))
+PDF_MAX_CHARS = int(os.environ.get("PDF_MAX_CHARS", 60000))
+PDF_TIMEOUT_SECONDS = float(os.environ.get("PDF_TIMEOUT_SECONDS", 10))
+PDF_WORKERS = int(os.environ.get("PDF_WORKERS", min(4, os.cpu_count() or 1)))
+PDF_PAGES_PER_TASK = 4
+# Below this many pages the process pool costs more than it saves
+PDF_PARALLEL_MIN_PAGES = 8
+
+_pdf_pool = None
+_pdf_pool_lock = threading.Lock()
+
+# Leading bytes of supported containers
+ZIP_MAGIC = b'PK\x03\x04'  # DOCX
+OLE_MAGIC = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'  # legacy .doc
+
+_persist_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='upload-persist')
+
 def allowed_file(filename):
     """Check if file extension is allowed"""
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def extract_text_from_pdf(file_path: str) -> str:
+def _extract_page_range(pdf_bytes: bytes, start: int, end: int) -> list:
+    """
+    Extract text from pages [start, end) - runs in a worker process
+    """
+    pdf_reader = PyPDF2.PdfReader(io.BytesIO(pdf_bytes))
+    return [(pdf_reader.pages[i].extract_text() or "") for i in range(start, end)]
+
+
+def _get_pdf_pool() -> ProcessPoolExecutor:
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is None:
+            _pdf_pool = ProcessPoolExecutor(max_workers=PDF_WORKERS)
+        return _pdf_pool
+
+
+def _reset_pdf_pool(pool: ProcessPoolExecutor = None):
+    """
+    Drop a pool whose workers may be stuck on a pathological document or
+    have died, killing its worker processes. With pool given, only that
+    pool is dropped (another caller may already have replaced it).
+    """
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is None or (pool is not None and _pdf_pool is not pool):
+            return
+        processes = list((_pdf_pool._processes or {}).values())
+        _pdf_pool.shutdown(wait=False, cancel_futures=True)
+        _pdf_pool = None
+    for process in processes:
+        if process.is_alive():
+            process.terminate()
+
+
+def extract_text_from_pdf(file_path: str,
+                          max_pages: int = None,
+                          max_chars: int = None,
+                          timeout: float = None) -> str:
     """
     Extract text from PDF file
     """
     try:
-        text = ""
         with open(file_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
-        
-        return text.strip()
+            pdf_bytes = file.read()
+    except Exception as e:
+        logging.error(f"Error reading PDF file: {str(e)}")
+        return ""
+    return extract_text_from_pdf_bytes(pdf_bytes, max_pages, max_chars, timeout)
+
+
+def extract_text_from_pdf_bytes(pdf_bytes: bytes,
+                                max_pages: int = None,
+                                max_chars: int = None,
+                                timeout: float = None) -> str:
+    """
+    Extract text from an in-memory PDF.
+    At most max_pages pages are read and extraction stops early once
+    max_chars characters are collected or the timeout expires. Large
+    documents are split into page ranges extracted in a process pool.
+    """
+    max_pages = max_pages or PDF_MAX_PAGES
+    max_chars = max_chars or PDF_MAX_CHARS
+    timeout = timeout or PDF_TIMEOUT_SECONDS
+    deadline = time.monotonic() + timeout
+
+    try:
+        pdf_reader = PyPDF2.PdfReader(io.BytesIO(pdf_bytes))
+        page_count = min(len(pdf_reader.pages), max_pages)
+
+        parts = []
+        collected = 0
+
+        if page_count < PDF_PARALLEL_MIN_PAGES:
+            for i in range(page_count):
+                page_text = pdf_reader.pages[i].extract_text() or ""
+                parts.append(page_text)
+                collected += len(page_text) + 1
+                if collected >= max_chars or time.monotonic() > deadline:
+                    break
+        else:
+            # A pool whose worker died is replaced and the document retried once
+            for attempt in range(2):
+                pool = _get_pdf_pool()
+                parts, collected = [], 0
+                futures = []
+                try:
+                    futures = [
+                        pool.submit(_extract_page_range, pdf_bytes, start,
+                                    min(start + PDF_PAGES_PER_TASK, page_count))
+                        for start in range(0, page_count, PDF_PAGES_PER_TASK)
+                    ]
+                    # Consume ranges in page order so an early exit keeps a prefix
+                    for future in futures:
+                        for page_text in future.result(
+                                timeout=max(0, deadline - time.monotonic())):
+                            parts.append(page_text)
+                            collected += len(page_text) + 1
+                        if collected >= max_chars:
+                            break
+                    break
+                except FutureTimeoutError:
+                    logging.warning(
+                        f"PDF extraction timed out after {timeout}s, keeping {len(parts)} pages")
+                    _reset_pdf_pool(pool)
+                    break
+                except BrokenProcessPool:
+                    logging.warning(
+                        f"PDF worker died (attempt {attempt + 1}), restarting the pool")
+                    _reset_pdf_pool(pool)
+                finally:
+                    for future in futures:
+                        future.cancel()
+
+        return "\n".join(parts).strip()[:max_chars]
     except Exception as e:
         logging.error(f"Error extracting text from PDF: {str(e)}")
         return ""
 
-def extract_text_from_docx(file_path: str) -> str:
+def extract_text_from_docx(file_path) -> str:
     """
-    Extract text from DOCX file
+    Extract text from DOCX file (a path or a binary file-like object)
     """
     try:
         doc = docx.Document(file_path)
-        text = ""
-        for paragraph in doc.paragraphs:
-            text += paragraph.text + "\n"
-        
+        text = "\n".join(paragraph.text for paragraph in doc.paragraphs)
         return text.strip()
     except Exception as e:
         logging.error(f"Error extracting text from DOCX: {str(e)}")
         return ""
 
-def process_cv_file(file_path: str, filename: str) -> str:
+def sniff_file_type(header: bytes):
     """
-    Process uploaded CV file and extract text content
+    Identify a CV document from its leading bytes
+    Output: 'pdf', 'docx', 'doc' (legacy Word, not parseable) or None
     """
-    try:
-        file_extension = filename.rsplit('.', 1)[1].lower()
-        
-        if file_extension == 'pdf':
-            return extract_text_from_pdf(file_path)
-        elif file_extension in ['docx', 'doc']:
-            return extract_text_from_docx(file_path)
-        else:
-            logging.error(f"Unsupported file format: {file_extension}")
-            return ""
-            
-    except Exception as e:
-        logging.error(f"Error processing CV file: {str(e)}")
-        return ""
+    # The PDF header may be preceded by junk bytes, within the first 1 KB
+    if b'%PDF-' in header[:1024]:
+        return 'pdf'
+    if header.startswith(ZIP_MAGIC):
+        return 'docx'
+    if header.startswith(OLE_MAGIC):
+        return 'doc'
+    return None
+
+
+def content_hash_filename(filename: str, content: bytes) -> str:
+    """Collision-free storage name derived from the file content"""
+    name, ext = os.path.splitext(secure_filename(filename) or 'cv')
+    digest = hashlib.sha256(content).hexdigest()[:16]
+    return f"{name}_{digest}{ext.lower()}"
 
-def save_uploaded_file(file, upload_folder: str) -> tuple:
+
+@timed('cv_extraction', succeeded=lambda result: result[2] is None)
+def read_cv_upload(file) -> tuple:
     """
-    Save uploaded file and return (success, filename, file_path)
+    Read an uploaded CV from its in-memory or spooled stream and extract
+    its text, without touching the upload folder.
+    Output: (cv_content, content, error) where error is None on success
     """
-    try:
-        if file and file.filename and allowed_file(file.filename):
-            filename = secure_filename(file.filename)
-            # Add timestamp to avoid conflicts
-            timestamp = str(int(os.path.getmtime(__file__) * 1000))
-            name, ext = os.path.splitext(filename)
-            filename = f"{name}_{timestamp}{ext}"
-            
-            file_path = os.path.join(upload_folder, filename)
-            file.save(file_path)
-            
-            return True, filename, file_path
-        else:
-            return False, None, None
-            
-    except Exception as e:
-        logging.error(f"Error saving uploaded file: {str(e)}")
-        return False, None, None
+    if not file or not file.filename or not allowed_file(file.filename):
+        return "", None, 'Invalid file type. Please upload a PDF or DOCX file.'
+
+    header = file.stream.read(1024)
+    file_type = sniff_file_type(header)
+    if file_type not in ('pdf', 'docx'):
+        logging.warning(f"Rejected upload {file.filename}: sniffed type {file_type}")
+        return "", None, 'Invalid file type. Please upload a PDF or DOCX file.'
+
+    content = header + file.stream.read()
+
+    if file_type == 'pdf':
+        cv_content = extract_text_from_pdf_bytes(content)
+    else:
+        cv_content = extract_text_from_docx(io.BytesIO(content))
+
+    if not cv_content:
+        return "", content, 'Could not extract text from CV. Please ensure it\'s a valid PDF or DOCX file.'
+    return cv_content, content, None
+
+
+def persist_upload_async(content: bytes, upload_folder: str, filename: str):
+    """
+    Write the original upload to disk in the background. Identical content
+    maps to the same name, so re-uploads are written once.
+    Output: future resolving to the file path, or None on failure
+    """
+
+    def write():
+        file_path = os.path.join(upload_folder, filename)
+        try:
+            if not os.path.exists(file_path):
+                tmp_path = f"{file_path}.{uuid.uuid4().hex}.part"
+                with open(tmp_path, 'wb') as f:
+                    f.write(content)
+                os.replace(tmp_path, file_path)
+            return file_path
+        except Exception as e:
+            logging.error(f"Error saving uploaded file: {str(e)}")
+            return None
+
+    return _persist_executor.submit(write)
@@ -1,7 +1,9 @@
 import os
 import logging
 import re
+import threading
 from datetime import datetime
+from functools import lru_cache
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
@@ -11,6 +13,7 @@ from reportlab.platypus import (
 )
 from reportlab.lib import colors
 from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY
+from services.metrics import timed
 
 
 def header_footer(canvas, doc):
@@ -29,6 +32,71 @@ def header_footer(canvas, doc):
     canvas.restoreState()
 
 
+PAGE_MARGIN = 72
+
+# Markdown emphasis used in Gemini summaries, compiled once
+BOLD_PATTERN = re.compile(r'\*\*(.*?)\*\*')
+ITALIC_PATTERN = re.compile(r'\*(.*?)\*')
+
+# Frames carry layout state while a document is built, so page templates
+# are reused per thread rather than shared between concurrent builds
+_thread_local = threading.local()
+
+
+@lru_cache(maxsize=1)
+def get_report_styles() -> dict:
+    """
+    Paragraph styles for the assessment report, built once per process
+    """
+    styles = getSampleStyleSheet()
+
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=24,
+        spaceAfter=30,
+        alignment=TA_CENTER,
+        textColor=colors.HexColor('#2E86AB')
+    )
+
+    heading_style = ParagraphStyle(
+        'CustomHeading',
+        parent=styles['Heading2'],
+        fontSize=16,
+        spaceAfter=12,
+        textColor=colors.HexColor('#2E86AB')
+    )
+
+    body_style = ParagraphStyle(
+        'CustomBody',
+        parent=styles['Normal'],
+        fontSize=11,
+        spaceAfter=12,
+        alignment=TA_JUSTIFY
+    )
+
+    return {'title': title_style, 'heading': heading_style, 'body': body_style}
+
+
+def get_page_template(doc) -> PageTemplate:
+    """
+    Page template with header/footer, reused across builds on this thread
+    """
+    template = getattr(_thread_local, 'page_template', None)
+    if template is None:
+        frame = Frame(doc.leftMargin, doc.bottomMargin, doc.width, doc.height - 20, id='normal')
+        template = PageTemplate(id='with-header-footer', frames=frame, onPage=header_footer)
+        _thread_local.page_template = template
+    return template
+
+
+def replace_markdown(text: str) -> str:
+    text = BOLD_PATTERN.sub(r'<b>\1</b>', text)
+    text = ITALIC_PATTERN.sub(r'<i>\1</i>', text)
+    return text
+
+
+@timed('report_pdf', succeeded=bool)
 def generate_assessment_report(cv_analysis: dict, qa_pairs: list, summary: str, output_path: str) -> bool:
     try:
         logging.info(f"Starting PDF generation for: {output_path}")
@@ -37,39 +105,14 @@ def generate_assessment_report(cv_analysis: dict, qa_pairs: list, summary: str,
 
         # Setup document with frame and page template for header/footer
         doc = SimpleDocTemplate(output_path, pagesize=A4,
-                                rightMargin=72, leftMargin=72,
-                                topMargin=72, bottomMargin=72)
+                                rightMargin=PAGE_MARGIN, leftMargin=PAGE_MARGIN,
+                                topMargin=PAGE_MARGIN, bottomMargin=PAGE_MARGIN)
+        doc.addPageTemplates([get_page_template(doc)])
 
-        frame = Frame(doc.leftMargin, doc.bottomMargin, doc.width, doc.height - 20, id='normal')
-        template = PageTemplate(id='with-header-footer', frames=frame, onPage=header_footer)
-        doc.addPageTemplates([template])
-
-        styles = getSampleStyleSheet()
-
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=24,
-            spaceAfter=30,
-            alignment=TA_CENTER,
-            textColor=colors.HexColor('#2E86AB')
-        )
-
-        heading_style = ParagraphStyle(
-            'CustomHeading',
-            parent=styles['Heading2'],
-            fontSize=16,
-            spaceAfter=12,
-            textColor=colors.HexColor('#2E86AB')
-        )
-
-        body_style = ParagraphStyle(
-            'CustomBody',
-            parent=styles['Normal'],
-            fontSize=11,
-            spaceAfter=12,
-            alignment=TA_JUSTIFY
-        )
+        styles = get_report_styles()
+        title_style = styles['title']
+        heading_style = styles['heading']
+        body_style = styles['body']
 
         story = []
 
@@ -118,11 +161,6 @@ def generate_assessment_report(cv_analysis: dict, qa_pairs: list, summary: str,
                         story.append(Spacer(1, 6))
                         bullet_buffer.clear()
 
-                def replace_markdown(text):
-                    text = re.sub(r'\*\*(.*?)\*\*', r'<b>\1</b>', text)
-                    text = re.sub(r'\*(.*?)\*', r'<i>\1</i>', text)
-                    return text
-
                 for line in lines:
                     clean = line.strip()
                     if not clean:
@@ -1,9 +1,22 @@
 import json
 import logging
 import os
+import time
 from google import genai
 from google.genai import types
 from pydantic import BaseModel
+from services.model_router import (route_call, MODEL_ROUTES,
+                                   latency_percentile, record_latency)
+from services.resilience import get_breaker, call_timeout, DeadlineExceeded
+from services.metrics import timed, set_outcome
+from services.prompt_builder import (compact_whitespace, compact_json,
+                                     truncate_to_tokens, estimate_tokens,
+                                     format_qa_pairs, analysis_keywords,
+                                     CV_ANALYSIS_INPUT_TOKENS,
+                                     FOLLOWUP_INPUT_TOKENS,
+                                     SUMMARY_INPUT_TOKENS,
+                                     ROLLING_SUMMARY_INPUT_TOKENS,
+                                     MIN_ANSWER_TOKENS)
 
 # IMPORTANT: KEEP THIS COMMENT
 # Follow these instructions when using this blueprint:
@@ -13,7 +26,60 @@ from pydantic import BaseModel
 # This API key is from Gemini Developer API Key, not vertex AI API Key
 # Initialize client only if API key is available
 gemini_api_key = os.environ.get("GEMINI_API_KEY")
-client = genai.Client(api_key=gemini_api_key)
+# Alternative API endpoint, e.g. the local stub used by loadtest/
+GEMINI_BASE_URL = os.environ.get("GEMINI_BASE_URL")
+
+
+client = genai.Client(
+    api_key=gemini_api_key,
+    http_options=types.HttpOptions(
+        base_url=GEMINI_BASE_URL) if GEMINI_BASE_URL else None)
+
+# Opens after repeated Gemini outages so callers fall back without waiting
+gemini_breaker = get_breaker('gemini')
+
+# Model and prompt revision used for CV analysis. Bump the prompt version
+# whenever the analysis prompt or schema changes so cached results are
+# not reused across incompatible revisions.
+CV_ANALYSIS_MODEL = MODEL_ROUTES['cv_analysis'].primary
+CV_ANALYSIS_PROMPT_VERSION = "2"
+
+# Budget for the CV summary interpolated into question prompts
+CONTEXT_SUMMARY_TOKENS = 200
+
+# Canned questions used whenever Gemini is unavailable. They are identical
+# for every candidate, so their audio can be pre-rendered.
+FALLBACK_FIRST_QUESTION = "J’aimerais mieux comprendre votre parcours professionnel. Quels sont vos objectifs actuels et ce qui vous motive dans votre travail ?"
+FALLBACK_FOLLOWUP_QUESTIONS = [
+    "Quels défis avez-vous rencontrés dans votre carrière, et comment les avez-vous surmontés ?",
+    "Quelles compétences ou domaines aimeriez-vous développer davantage ?",
+    "Décrivez un projet ou une réalisation dont vous êtes particulièrement fier(ère).",
+    "Qu'est-ce qui vous motive le plus dans votre travail professionnel ?",
+    "Où voyez-vous votre carrière se diriger dans les prochaines années ?",
+    "Comment gérez-vous le travail sous pression ou avec des délais serrés ?",
+    "Quelle expérience de leadership avez-vous, et qu'en avez-vous appris ?",
+    "Quelle est selon vous votre plus grande force et faiblesse professionnelle ?"
+]
+
+
+def _with_timeout(config, timeout: float):
+    """Copy of a request config with its HTTP timeout set to timeout seconds"""
+    http_options = types.HttpOptions(timeout=int(timeout * 1000))
+    if config is None:
+        return types.GenerateContentConfig(http_options=http_options)
+    return config.model_copy(update={'http_options': http_options})
+
+
+def _generate(operation: str, contents, config=None) -> tuple:
+    """
+    Generate content on the model chosen by model_router for operation
+    Output: (response, model used)
+    """
+    return route_call(
+        operation, lambda model, timeout: gemini_breaker.call(
+            client.models.generate_content,
+            model=model, contents=contents,
+            config=_with_timeout(config, timeout)))
 
 
 class CVAnalysis(BaseModel):
@@ -25,17 +91,35 @@ class CVAnalysis(BaseModel):
     potential_areas_for_growth: list
 
 
-def analyze_cv_content(cv_text: str) -> dict:
+class RollingSummary(BaseModel):
+    strengths: list[str]
+    gaps: list[str]
+    evidence: list[str]
+    overall: str
+
+
+# Items kept per list in the rolling summary, so its size stays constant
+ROLLING_SUMMARY_MAX_ITEMS = 6
+
+
+def build_analysis_context(cv_analysis: dict) -> dict:
     """
-    Analyze CV content using Gemini AI
-    Input: CV text content
-    Output: Structured analysis of the CV
+    Precompute the CV analysis fields interpolated into every follow-up prompt
     """
-    try:
-        if not client:
-            raise Exception("Gemini API key not configured")
+    return {
+        'summary': str(cv_analysis.get('summary', '')),
+        'career_stage': str(cv_analysis.get('career_stage', '')),
+        'key_skills': ', '.join(str(skill) for skill in cv_analysis.get('key_skills', [])),
+        'growth_areas': ', '.join(
+            str(area) for area in cv_analysis.get('potential_areas_for_growth', []))
+    }
 
-        system_prompt = """
+
+def _analysis_request(cv_text: str) -> tuple:
+    """
+    Build the contents and config for a CV analysis request
+    """
+    system_prompt = """
         Vous êtes un expert professionnel en évaluation de carrière. Analysez le contenu du CV fourni et fournissez une analyse complète.
 
         Extraites et analysez :
@@ -55,22 +139,39 @@ def analyze_cv_content(cv_text: str) -> dict:
         - potential_areas_for_growth : Axes d'amélioration
         """
 
-        response = client.models.generate_content(
-            model="gemini-2.5-pro",
-            contents=[
-                types.Content(
-                    role="user",
-                    parts=[types.Part(text=f"Contenu du CV :\n\n{cv_text}")])
-            ],
-            config=types.GenerateContentConfig(
-                system_instruction=system_prompt,
-                response_mime_type="application/json",
-                response_schema=CVAnalysis,
-            ),
-        )
+    # Long CVs keep their beginning, where the recent experience usually is
+    cv_text = truncate_to_tokens(compact_whitespace(cv_text),
+                                 CV_ANALYSIS_INPUT_TOKENS)
+    contents = [
+        types.Content(role="user",
+                      parts=[types.Part(text=f"Contenu du CV :\n\n{cv_text}")])
+    ]
+    config = types.GenerateContentConfig(
+        system_instruction=compact_whitespace(system_prompt),
+        response_mime_type="application/json",
+        response_schema=CVAnalysis,
+    )
+    return contents, config
+
+
+@timed('gemini.cv_analysis')
+def analyze_cv_content(cv_text: str, return_model: bool = False):
+    """
+    Analyze CV content using Gemini AI
+    Input: CV text content
+    Output: Structured analysis of the CV, or (analysis, model used) with
+    return_model
+    """
+    try:
+        if not client:
+            raise Exception("Gemini API key not configured")
+
+        contents, config = _analysis_request(cv_text)
+        response, model = _generate('cv_analysis', contents, config)
 
         if response.text:
-            return json.loads(response.text)
+            analysis = json.loads(response.text)
+            return (analysis, model) if return_model else analysis
         else:
             raise ValueError("Réponse vide de Gemini")
 
@@ -79,19 +180,15 @@ def analyze_cv_content(cv_text: str) -> dict:
         raise Exception(f"Échec de l'analyse du CV : {str(e)}")
 
 
-def generate_first_question(cv_analysis: dict) -> str:
-    """
-    Generate the first assessment question based on CV analysis
-    """
-    try:
-        if not client:
-            return "J’aimerais mieux comprendre votre parcours professionnel. Quels sont vos objectifs actuels et ce qui vous motive dans votre travail ?"
-
-        prompt = f"""
+def _first_question_prompt(cv_analysis: dict) -> str:
+    summary = truncate_to_tokens(
+        ' '.join(str(cv_analysis.get('summary', '')).split()),
+        CONTEXT_SUMMARY_TOKENS)
+    return compact_whitespace(f"""
         À partir de cette analyse de CV, générez une question d'ouverture engageante pour un entretien d'évaluation professionnelle.
 
         Analyse du CV :
-        Résumé : {cv_analysis.get('summary', '')}
+        Résumé : {summary}
         Stade de carrière : {cv_analysis.get('career_stage', '')}
         Compétences clés : {', '.join(cv_analysis.get('key_skills', []))}
 
@@ -102,10 +199,21 @@ def generate_first_question(cv_analysis: dict) -> str:
         4. Encourage une réflexion détaillée
 
         Retournez uniquement le texte de la question, sans mise en forme supplémentaire.
-        """
+        """)
+
+
+@timed('gemini.first_question')
+def generate_first_question(cv_analysis: dict) -> str:
+    """
+    Generate the first assessment question based on CV analysis
+    """
+    try:
+        if not client:
+            set_outcome('fallback')
+            return FALLBACK_FIRST_QUESTION
 
-        response = client.models.generate_content(model="gemini-2.5-flash",
-                                                  contents=prompt)
+        response, _ = _generate('first_question',
+                                _first_question_prompt(cv_analysis))
 
         return response.text.strip(
         ) if response.text else "Parlez-moi de vos objectifs professionnels et de ce qui vous motive dans votre travail."
@@ -113,29 +221,27 @@ def generate_first_question(cv_analysis: dict) -> str:
     except Exception as e:
         logging.error(
             f"Erreur lors de la génération de la première question : {str(e)}")
-        return "J’aimerais mieux comprendre votre parcours professionnel. Quels sont vos objectifs actuels et ce qui vous motive dans votre travail ?"
+        set_outcome('fallback')
+        return FALLBACK_FIRST_QUESTION
 
 
-def generate_followup_question(cv_analysis: dict, previous_qa: list) -> str:
+def _followup_request(cv_analysis: dict, previous_qa: list,
+                      analysis_context: dict = None) -> tuple:
     """
-    Generate follow-up questions based on CV analysis and previous answers
+    Build the contents and config for a follow-up question request
     """
-    try:
-        if not client:
-            return "Quels défis avez-vous rencontrés dans votre carrière, et comment les avez-vous surmontés asba ?"
-
-        # Prepare context from previous Q&A - take last Q&A pairs
-        recent_qa = previous_qa[len(previous_qa) - 1]
-        qa_context = "\n".join(
-            f"Q : {recent_qa['question']}\nR : {recent_qa['answer']}")
+    context = analysis_context or build_analysis_context(cv_analysis)
+    summary = truncate_to_tokens(' '.join(context['summary'].split()),
+                                 CONTEXT_SUMMARY_TOKENS)
 
-        prompt = f"""Vous menez un entretien d'évaluation professionnelle. En vous basant sur l'analyse du CV et les échanges précédents, générez la prochaine question pertinente dans une phrase.
+    def build(qa_context: str) -> str:
+        return compact_whitespace(f"""Vous menez un entretien d'évaluation professionnelle. En vous basant sur l'analyse du CV et les échanges précédents, générez la prochaine question pertinente dans une phrase.
 
 Analyse du CV :
-Résumé : {cv_analysis.get('summary', '')}
-Stade de carrière : {cv_analysis.get('career_stage', '')}
-Compétences clés : {', '.join(cv_analysis.get('key_skills', []))}
-Axes d'amélioration : {', '.join(cv_analysis.get('potential_areas_for_growth', []))}
+Résumé : {summary}
+Stade de carrière : {context['career_stage']}
+Compétences clés : {context['key_skills']}
+Axes d'amélioration : {context['growth_areas']}
 
 Conversation précédente :
 {qa_context}
@@ -147,47 +253,50 @@ Générez une question de suivi qui :
 4. Maintient une tonalité conversationnelle et bienveillante
 5. Encourage des exemples concrets et une réflexion approfondie
 
-Retournez uniquement le texte de la question, sans mise en forme supplémentaire."""
-
-        response = client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=[
-                types.Content(role="user", parts=[types.Part(text=prompt)])
-            ],
-            config=types.GenerateContentConfig(
-                system_instruction=
-                "Vous êtes un expert en entretiens professionnels. Générez une question claire et engageante.",
-                temperature=0.7))
-        logging.info(f"Gemini response: {response}")
-        if response.text and response.text.strip():
-            return response.text.strip()
-        else:
-            raise ValueError("Réponse vide de Gemini")
+Retournez uniquement le texte de la question, sans mise en forme supplémentaire.""")
 
-    except Exception as e:
-        logging.error(
-            f"Erreur lors de la génération de la question de suivi : {str(e)}")
-        return "Quels défis avez-vous rencontrés dans votre carrière, et comment les avez-vous surmontés ?"
+    # The latest exchange gets whatever the rest of the prompt leaves
+    qa_budget = max(MIN_ANSWER_TOKENS,
+                    FOLLOWUP_INPUT_TOKENS - estimate_tokens(build("")))
+    prompt = build(format_qa_pairs(previous_qa[-1:], qa_budget))
 
+    contents = [types.Content(role="user", parts=[types.Part(text=prompt)])]
+    config = types.GenerateContentConfig(
+        system_instruction=
+        "Vous êtes un expert en entretiens professionnels. Générez une question claire et engageante.",
+        temperature=0.7)
+    return contents, config
 
-def generate_final_summary(cv_analysis: dict, qa_pairs: list) -> str:
+
+def _summary_request(cv_analysis: dict, qa_pairs: list,
+                     rolling_summary: dict = None) -> tuple:
     """
-    Generate a comprehensive professional assessment summary
+    Build the contents and config for a final summary request. With a
+    rolling summary, only the answers it does not cover yet are sent.
     """
-    try:
-        if not client:
-            return "Évaluation professionnelle terminée. Configuration de l'API requise pour un résumé détaillé généré par l'IA."
-
-        qa_text = "\n".join(
-            [f"Q : {qa['question']}\nR : {qa['answer']}" for qa in qa_pairs])
-
-        prompt = f"""En tant que consultant professionnel en carrière, créez un rapport d'évaluation complet basé sur les éléments suivants :
+    analysis_json = compact_json(cv_analysis)
+    covered = (rolling_summary or {}).get('answers_covered', 0)
+    if rolling_summary and 0 < covered <= len(qa_pairs):
+        state_json = compact_json({
+            key: rolling_summary.get(key)
+            for key in ('strengths', 'gaps', 'evidence', 'overall')
+        })
+        source = f"""Synthèse cumulée des {covered} premières réponses de l'entretien :
+{state_json}
+
+Réponses suivantes, pas encore synthétisées :"""
+        qa_pairs = qa_pairs[covered:]
+    else:
+        source = "Questions & Réponses de l'entretien :"
+
+    def build(qa_text: str) -> str:
+        return compact_whitespace(f"""En tant que consultant professionnel en carrière, créez un rapport d'évaluation complet basé sur les éléments suivants :
 
 Analyse initiale du CV :
-{json.dumps(cv_analysis, indent=2, ensure_ascii=False)}
+{analysis_json}
 
-Questions & Réponses de l'entretien :
-{qa_text}
+{source}
+{qa_text or '(aucune)'}
 
 Créez un rapport d'évaluation professionnel détaillé qui inclut :
 1. Résumé exécutif du profil du candidat
@@ -198,17 +307,179 @@ Créez un rapport d'évaluation professionnel détaillé qui inclut :
 6. Prochaines étapes concrètes
 7. Évaluation globale
 
-Basez le rapport sur les réponses fournies et le contenu du CV. Soyez précis et donnez des recommandations actionnables. Rédigez en français et de manière professionnelle."""
-
-        response = client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=[
-                types.Content(role="user", parts=[types.Part(text=prompt)])
-            ],
-            config=types.GenerateContentConfig(
-                system_instruction=
-                "Vous êtes un consultant expert en développement professionnel. Créez un rapport d'évaluation complet et structuré.",
-                temperature=0.3))
+Basez le rapport sur les réponses fournies et le contenu du CV. Soyez précis et donnez des recommandations actionnables. Rédigez en français et de manière professionnelle.""")
+
+    # Answers share what the rest of the prompt leaves, most relevant first
+    qa_budget = max(MIN_ANSWER_TOKENS * len(qa_pairs),
+                    SUMMARY_INPUT_TOKENS - estimate_tokens(build("")))
+    prompt = build(
+        format_qa_pairs(qa_pairs, qa_budget, analysis_keywords(cv_analysis)))
+
+    contents = [types.Content(role="user", parts=[types.Part(text=prompt)])]
+    config = types.GenerateContentConfig(
+        system_instruction=
+        "Vous êtes un consultant expert en développement professionnel. Créez un rapport d'évaluation complet et structuré.",
+        temperature=0.3)
+    return contents, config
+
+
+def _rolling_summary_request(cv_analysis: dict, rolling_summary: dict,
+                             new_qa_pairs: list) -> tuple:
+    """
+    Build the contents and config for a rolling summary update
+    """
+    state_json = compact_json({
+        key: rolling_summary.get(key)
+        for key in ('strengths', 'gaps', 'evidence', 'overall')
+    }) if rolling_summary else '(vide)'
+    analysis_json = compact_json({
+        key: cv_analysis.get(key)
+        for key in ('summary', 'career_stage', 'key_skills',
+                    'potential_areas_for_growth')
+    })
+
+    def build(qa_text: str) -> str:
+        return compact_whitespace(f"""Vous tenez à jour la synthèse d'un entretien d'évaluation professionnelle en cours.
+
+Profil du candidat :
+{analysis_json}
+
+Synthèse actuelle :
+{state_json}
+
+Nouveaux échanges :
+{qa_text}
+
+Mettez à jour la synthèse en intégrant les nouveaux échanges :
+- strengths : forces démontrées
+- gaps : lacunes ou points à approfondir
+- evidence : exemples concrets et chiffres cités par le candidat
+- overall : appréciation globale en deux phrases maximum
+
+Fusionnez les éléments redondants et gardez au plus {ROLLING_SUMMARY_MAX_ITEMS} éléments courts par liste, les plus significatifs. Rédigez en français.""")
+
+    qa_budget = max(MIN_ANSWER_TOKENS * len(new_qa_pairs),
+                    ROLLING_SUMMARY_INPUT_TOKENS - estimate_tokens(build("")))
+    prompt = build(
+        format_qa_pairs(new_qa_pairs, qa_budget,
+                        analysis_keywords(cv_analysis)))
+
+    contents = [types.Content(role="user", parts=[types.Part(text=prompt)])]
+    config = types.GenerateContentConfig(
+        system_instruction=
+        "Vous êtes un évaluateur professionnel rigoureux. Répondez uniquement avec le JSON demandé.",
+        response_mime_type="application/json",
+        response_schema=RollingSummary,
+        temperature=0.2)
+    return contents, config
+
+
+@timed('gemini.rolling_summary')
+def update_rolling_summary(cv_analysis: dict, rolling_summary: dict,
+                           new_qa_pairs: list) -> dict:
+    """
+    Fold new Q&A pairs into the rolling interview summary
+    Output: updated summary (strengths, gaps, evidence, overall)
+    Errors are raised so the update can be retried with the next answer.
+    """
+    if not client:
+        raise Exception("Gemini API key not configured")
+
+    contents, config = _rolling_summary_request(cv_analysis, rolling_summary,
+                                                new_qa_pairs)
+    response, _ = _generate('rolling_summary', contents, config)
+    if not response.text:
+        raise ValueError("Réponse vide de Gemini")
+
+    summary = json.loads(response.text)
+    for key in ('strengths', 'gaps', 'evidence'):
+        summary[key] = list(summary.get(key) or [])[:ROLLING_SUMMARY_MAX_ITEMS]
+    return summary
+
+
+def _stream_text(operation: str, contents: list, config):
+    """
+    Yield text chunks from a streaming generation on the operation's primary
+    model, within its deadline (shortened to the remaining request budget).
+    Streams cannot switch models midway, so DeadlineExceeded is raised up
+    front when the primary's recent p95 does not fit the deadline, and
+    whenever a chunk arrives after it; callers then fall back to the routed
+    non-streaming call.
+    """
+    if not client:
+        raise Exception("Gemini API key not configured")
+
+    route = MODEL_ROUTES[operation]
+    timeout = call_timeout(route.deadline)
+    p95 = latency_percentile(operation, route.primary, 95)
+    if p95 is not None and p95 >= timeout:
+        raise DeadlineExceeded(
+            f"{route.primary} p95 {p95:.2f}s exceeds the {timeout:.2f}s deadline")
+
+    started = time.monotonic()
+    with gemini_breaker.guard():
+        for chunk in client.models.generate_content_stream(
+                model=route.primary, contents=contents,
+                config=_with_timeout(config, timeout)):
+            if time.monotonic() - started > timeout:
+                raise DeadlineExceeded(f"Stream exceeded its {timeout:.2f}s deadline")
+            if chunk.text:
+                yield chunk.text
+    record_latency(operation, route.primary, time.monotonic() - started)
+
+
+@timed('gemini.followup_question')
+def generate_followup_question(cv_analysis: dict, previous_qa: list,
+                               analysis_context: dict = None) -> str:
+    """
+    Generate follow-up questions based on CV analysis and previous answers
+    """
+    try:
+        if not client:
+            set_outcome('fallback')
+            return "Quels défis avez-vous rencontrés dans votre carrière, et comment les avez-vous surmontés asba ?"
+
+        contents, config = _followup_request(cv_analysis, previous_qa,
+                                             analysis_context)
+        response, _ = _generate('followup_question', contents, config)
+        logging.info(f"Gemini response: {response}")
+        if response.text and response.text.strip():
+            return response.text.strip()
+        else:
+            raise ValueError("Réponse vide de Gemini")
+
+    except Exception as e:
+        logging.error(
+            f"Erreur lors de la génération de la question de suivi : {str(e)}")
+        set_outcome('fallback')
+        return FALLBACK_FOLLOWUP_QUESTIONS[0]
+
+
+def stream_followup_question(cv_analysis: dict, previous_qa: list,
+                             analysis_context: dict = None):
+    """
+    Stream a follow-up question as text chunks.
+    Errors are raised so callers can fall back to generate_followup_question.
+    """
+    contents, config = _followup_request(cv_analysis, previous_qa,
+                                         analysis_context)
+    yield from _stream_text('followup_question', contents, config)
+
+
+@timed('gemini.final_summary')
+def generate_final_summary(cv_analysis: dict, qa_pairs: list,
+                           rolling_summary: dict = None) -> str:
+    """
+    Generate a comprehensive professional assessment summary
+    """
+    try:
+        if not client:
+            set_outcome('fallback')
+            return "Évaluation professionnelle terminée. Configuration de l'API requise pour un résumé détaillé généré par l'IA."
+
+        contents, config = _summary_request(cv_analysis, qa_pairs,
+                                            rolling_summary)
+        response, _ = _generate('final_summary', contents, config)
         logging.info(f"Gemini response: {response}")
         if response.text and response.text.strip():
             return response.text.strip()
@@ -218,4 +489,16 @@ Basez le rapport sur les réponses fournies et le contenu du CV. Soyez précis e
     except Exception as e:
         logging.error(
             f"Erreur lors de la génération du résumé final : {str(e)}")
+        set_outcome('fallback')
         return "Erreur lors de la génération du résumé de l'évaluation. Veuillez réessayer."
+
+
+def stream_final_summary(cv_analysis: dict, qa_pairs: list,
+                         rolling_summary: dict = None):
+    """
+    Stream the final assessment summary as text chunks.
+    Errors are raised so callers can fall back to generate_final_summary.
+    """
+    contents, config = _summary_request(cv_analysis, qa_pairs,
+                                        rolling_summary)
+    yield from _stream_text('final_summary', contents, config)
@@ -0,0 +1,274 @@
+import logging
+import threading
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from app import db
+from models import BackgroundJob
+
+# kind -> handler(job, report_progress) returning a JSON-serializable result
+JOB_HANDLERS = {}
+# kind -> claim priority; queued jobs of higher priority are claimed first
+JOB_PRIORITIES = {}
+# Kinds that only keep their latest finished job per session
+COLLAPSED_KINDS = set()
+
+ACTIVE_STATUSES = ('queued', 'running')
+
+_wakeup = threading.Event()
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def job_handler(kind: str, priority: int = 0, keep_history: bool = True):
+    """
+    Register a function as the handler for a job kind. Queued jobs are
+    claimed by descending priority, then oldest first. With keep_history
+    False, finishing a job deletes the earlier finished jobs of that kind
+    for the session.
+    """
+
+    def decorator(func):
+        JOB_HANDLERS[kind] = func
+        JOB_PRIORITIES[kind] = priority
+        if not keep_history:
+            COLLAPSED_KINDS.add(kind)
+        return func
+
+    return decorator
+
+
+def enqueue_job(kind: str, session_id: str = None, payload: dict = None,
+                reuse_statuses: tuple = ACTIVE_STATUSES) -> BackgroundJob:
+    """
+    Persist a queued job, reusing a job of the same kind for the session
+    whose status is in reuse_statuses (queued or running by default)
+    """
+    if session_id:
+        existing = BackgroundJob.query.filter(
+            BackgroundJob.kind == kind,
+            BackgroundJob.session_id == session_id,
+            BackgroundJob.status.in_(reuse_statuses)).first()
+        if existing:
+            return existing
+
+    job = BackgroundJob(job_id=str(uuid.uuid4()),
+                        kind=kind,
+                        session_id=session_id,
+                        status='queued',
+                        progress=0,
+                        stage='queued')
+    job.set_payload(payload or {})
+    db.session.add(job)
+    db.session.commit()
+
+    _wakeup.set()
+    return job
+
+
+def get_job(job_id: str):
+    return BackgroundJob.query.filter_by(job_id=job_id).first()
+
+
+def update_job_progress(job_id: str, progress: int, stage: str):
+    """Record progress and refresh the heartbeat of a running job"""
+    BackgroundJob.query.filter_by(job_id=job_id).update({
+        'progress': progress,
+        'stage': stage,
+        'heartbeat_at': datetime.utcnow()
+    })
+    db.session.commit()
+
+
+def _claim_next_job():
+    """
+    Atomically move the next queued job (highest priority, then oldest) to
+    running
+    Output: job_id, or None if the queue is empty
+    """
+    order = [BackgroundJob.created_at.asc()]
+    if JOB_PRIORITIES:
+        order.insert(0, db.case(JOB_PRIORITIES, value=BackgroundJob.kind,
+                                else_=0).desc())
+    candidates = BackgroundJob.query.with_entities(
+        BackgroundJob.job_id).filter_by(status='queued').order_by(
+            *order).limit(5).all()
+
+    for (job_id, ) in candidates:
+        now = datetime.utcnow()
+        claimed = BackgroundJob.query.filter_by(
+            job_id=job_id, status='queued').update(
+                {
+                    'status': 'running',
+                    'stage': 'starting',
+                    'started_at': now,
+                    'heartbeat_at': now,
+                    'attempts': BackgroundJob.attempts + 1
+                },
+                synchronize_session=False)
+        db.session.commit()
+        if claimed:
+            return job_id
+    return None
+
+
+def _run_job(job_id: str):
+    job = get_job(job_id)
+    handler = JOB_HANDLERS.get(job.kind)
+    try:
+        if handler is None:
+            raise ValueError(f"No handler registered for job kind '{job.kind}'")
+
+        result = handler(
+            job, lambda progress, stage: update_job_progress(
+                job_id, progress, stage))
+
+        job = get_job(job_id)
+        job.set_result(result or {})
+        job.status = 'done'
+        job.progress = 100
+        job.stage = 'done'
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+        logging.info(f"Job {job_id} ({job.kind}) completed")
+
+    except Exception as e:
+        db.session.rollback()
+        logging.error(f"Job {job_id} failed: {str(e)}")
+        logging.error(f"Full traceback: {traceback.format_exc()}")
+        job = get_job(job_id)
+        job.status = 'failed'
+        job.stage = 'failed'
+        job.error = str(e)
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+
+    if job.kind in COLLAPSED_KINDS and job.session_id:
+        _collapse_finished_jobs(job)
+
+
+def _collapse_finished_jobs(job):
+    """Delete the other finished jobs of job's kind for its session"""
+    try:
+        BackgroundJob.query.filter(
+            BackgroundJob.kind == job.kind,
+            BackgroundJob.session_id == job.session_id,
+            BackgroundJob.status.in_(('done', 'failed')),
+            BackgroundJob.id != job.id).delete(synchronize_session=False)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logging.error(f"Failed to prune {job.kind} jobs of session {job.session_id}: {str(e)}")
+
+
+def recover_stale_jobs(stale_after_seconds: int, max_attempts: int) -> int:
+    """
+    Requeue running jobs whose worker stopped sending heartbeats (e.g. after a
+    restart). Jobs that already used all their attempts are marked failed.
+    Output: number of jobs requeued
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=stale_after_seconds)
+    stale_jobs = BackgroundJob.query.filter(
+        BackgroundJob.status == 'running',
+        BackgroundJob.heartbeat_at < cutoff).all()
+
+    requeued = 0
+    for job in stale_jobs:
+        if (job.attempts or 0) >= max_attempts:
+            job.status = 'failed'
+            job.stage = 'failed'
+            job.error = 'Worker stopped responding'
+            job.finished_at = datetime.utcnow()
+        else:
+            job.status = 'queued'
+            job.stage = 'requeued'
+            requeued += 1
+    db.session.commit()
+
+    if stale_jobs:
+        logging.warning(
+            f"Recovered {len(stale_jobs)} stale jobs ({requeued} requeued)")
+    return requeued
+
+
+class JobDispatcher:
+    """
+    Claims queued jobs from the database and runs them on a bounded thread
+    pool. Because all state lives in the job table, any number of web or
+    standalone worker processes can run a dispatcher side by side.
+    """
+
+    def __init__(self, app, max_workers: int, poll_interval: float,
+                 stale_after_seconds: int, max_attempts: int):
+        self.app = app
+        self.max_workers = max_workers
+        self.poll_interval = poll_interval
+        self.stale_after_seconds = stale_after_seconds
+        self.max_attempts = max_attempts
+        self._slots = threading.Semaphore(max_workers)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix='job-worker')
+        self._stopped = threading.Event()
+
+    def _execute(self, job_id: str):
+        try:
+            with self.app.app_context():
+                _run_job(job_id)
+        finally:
+            self._slots.release()
+            _wakeup.set()
+
+    def run_forever(self):
+        last_recovery = None
+        while not self._stopped.is_set():
+            _wakeup.clear()
+            try:
+                with self.app.app_context():
+                    now = datetime.utcnow()
+                    if last_recovery is None or (
+                            now - last_recovery).total_seconds() > 30:
+                        recover_stale_jobs(self.stale_after_seconds,
+                                           self.max_attempts)
+                        last_recovery = now
+
+                    while self._slots.acquire(blocking=False):
+                        job_id = _claim_next_job()
+                        if job_id is None:
+                            self._slots.release()
+                            break
+                        self._executor.submit(self._execute, job_id)
+            except Exception as e:
+                logging.error(f"Job dispatcher error: {str(e)}")
+
+            _wakeup.wait(self.poll_interval)
+
+    def stop(self):
+        self._stopped.set()
+        _wakeup.set()
+        self._executor.shutdown(wait=True)
+
+
+def create_dispatcher(app) -> JobDispatcher:
+    # Import handler modules so they register themselves
+    import services.report_service  # noqa: F401
+    import services.rolling_summary  # noqa: F401
+
+    return JobDispatcher(app,
+                         max_workers=app.config['JOB_WORKERS'],
+                         poll_interval=app.config['JOB_POLL_INTERVAL_SECONDS'],
+                         stale_after_seconds=app.config['JOB_STALE_SECONDS'],
+                         max_attempts=app.config['JOB_MAX_ATTEMPTS'])
+
+
+def start_background_workers(app):
+    """Start a job dispatcher in a daemon thread of the current process"""
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is not None:
+            return _dispatcher
+        _dispatcher = create_dispatcher(app)
+        threading.Thread(target=_dispatcher.run_forever,
+                         name='job-dispatcher',
+                         daemon=True).start()
+        return _dispatcher
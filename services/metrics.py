@@ -0,0 +1,272 @@
+import contextvars
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+# Latency buckets in seconds, from a DB commit up to a slow Gemini call
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0, 30.0, 60.0)
+
+METRIC_PREFIX = 'assessment_'
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace(
+        '\n', '\\n')
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter with labels, kept in process memory"""
+
+    type = 'counter'
+
+    def __init__(self, name: str, description: str, label_names: tuple = ()):
+        self.name = METRIC_PREFIX + name
+        self.description = description
+        self.label_names = label_names
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(labels[name] for name in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> list:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+            for key, value in values
+        ]
+
+
+class Histogram:
+    """Cumulative-bucket histogram with labels, kept in process memory"""
+
+    type = 'histogram'
+
+    def __init__(self, name: str, description: str, label_names: tuple = (),
+                 buckets: tuple = DEFAULT_BUCKETS):
+        self.name = METRIC_PREFIX + name
+        self.description = description
+        self.label_names = label_names
+        self.buckets = tuple(buckets) + (float('inf'), )
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels[name] for name in self.label_names)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._values[key] = (counts, total + value)
+
+    def render(self) -> list:
+        with self._lock:
+            values = sorted((key, (list(counts), total))
+                            for key, (counts, total) in self._values.items())
+        lines = []
+        for key, (counts, total) in values:
+            for bound, count in zip(self.buckets, counts):
+                le = f'le="{_format_value(bound)}"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {count}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {total!r}")
+            lines.append(f"{self.name}_count{labels} {counts[-1]}")
+        return lines
+
+
+HTTP_REQUEST_SECONDS = Histogram(
+    'http_request_duration_seconds',
+    'Time to produce a response (headers only for streamed responses)',
+    ('route', 'method', 'status'))
+STAGE_SECONDS = Histogram(
+    'stage_duration_seconds',
+    'Time spent in a processing stage (CV extraction, Gemini, TTS, DB commit, PDF)',
+    ('stage', 'route', 'outcome'))
+STAGE_OUTCOMES = Counter('stage_outcomes_total',
+                         'Completed processing stages by outcome',
+                         ('stage', 'route', 'outcome'))
+
+METRICS = [HTTP_REQUEST_SECONDS, STAGE_SECONDS, STAGE_OUTCOMES]
+
+
+def _route_label() -> str:
+    if has_request_context():
+        return request.endpoint or 'unknown'
+    return 'background'
+
+
+def observe_stage(stage: str, outcome: str, seconds: float, route: str = None):
+    route = route or _route_label()
+    STAGE_SECONDS.observe(seconds, stage=stage, route=route, outcome=outcome)
+    STAGE_OUTCOMES.inc(stage=stage, route=route, outcome=outcome)
+
+
+class Span:
+    def __init__(self, stage: str):
+        self.stage = stage
+        self.outcome = 'success'
+
+
+_current_span = contextvars.ContextVar('current_span', default=None)
+
+
+@contextmanager
+def span(stage: str):
+    """
+    Time the enclosed block as a stage. The outcome is 'success' unless an
+    exception escapes ('error') or set_outcome changes it.
+    """
+    current = Span(stage)
+    token = _current_span.set(current)
+    started = time.perf_counter()
+    try:
+        yield current
+    except Exception:
+        current.outcome = 'error'
+        raise
+    finally:
+        _current_span.reset(token)
+        observe_stage(stage, current.outcome, time.perf_counter() - started)
+
+
+def set_outcome(outcome: str):
+    """Set the outcome of the innermost running span (e.g. 'fallback')"""
+    current = _current_span.get()
+    if current is not None:
+        current.outcome = outcome
+
+
+def timed(stage: str, succeeded=None, failure_outcome: str = 'error'):
+    """
+    Decorator running a function inside span(stage). succeeded(result)
+    returning False marks the call failure_outcome, for functions that
+    report failure through their return value.
+    """
+
+    def check(current, result):
+        if succeeded is not None and not succeeded(result):
+            current.outcome = failure_outcome
+        return result
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(stage) as current:
+                return check(current, func(*args, **kwargs))
+
+        return wrapper
+
+    return decorator
+
+
+def _collected_lines() -> list:
+    """Counters and gauges kept by other services, read at scrape time"""
+    from services.model_router import ROUTER_METRICS
+    from services.resilience import BREAKERS, CLOSED, HALF_OPEN
+    from services.storage_janitor import JANITOR_METRICS
+
+    lines = []
+    name = f"{METRIC_PREFIX}model_route_decisions_total"
+    lines += [f"# HELP {name} Gemini routing decisions (primary, hedged, downgraded)",
+              f"# TYPE {name} counter"]
+    for (operation, decision), count in sorted(ROUTER_METRICS.items()):
+        lines.append(
+            f"{name}{_format_labels(('operation', 'decision'), (operation, decision))} {count}")
+
+    state_name = f"{METRIC_PREFIX}circuit_breaker_state"
+    rejected_name = f"{METRIC_PREFIX}circuit_breaker_rejected_total"
+    lines += [f"# HELP {state_name} Circuit breaker state (0 closed, 1 half-open, 2 open)",
+              f"# TYPE {state_name} gauge"]
+    state_values = {CLOSED: 0, HALF_OPEN: 1}
+    for dependency, breaker in sorted(BREAKERS.items()):
+        lines.append(f'{state_name}{{dependency="{_escape(dependency)}"}} '
+                     f'{state_values.get(breaker.state, 2)}')
+    lines += [f"# HELP {rejected_name} Calls rejected by an open circuit breaker",
+              f"# TYPE {rejected_name} counter"]
+    for dependency, breaker in sorted(BREAKERS.items()):
+        lines.append(
+            f'{rejected_name}{{dependency="{_escape(dependency)}"}} {breaker.rejected}')
+
+    for field, description in (('runs', 'Storage janitor runs'),
+                               ('files_evicted', 'Files deleted by the storage janitor'),
+                               ('bytes_reclaimed', 'Bytes freed by the storage janitor')):
+        name = f"{METRIC_PREFIX}janitor_{field}_total"
+        lines += [f"# HELP {name} {description}", f"# TYPE {name} counter"]
+        for folder, totals in sorted(JANITOR_METRICS.items()):
+            lines.append(f'{name}{{folder="{_escape(folder)}"}} {totals[field]}')
+    return lines
+
+
+def render_metrics() -> str:
+    """
+    All metrics in the Prometheus text exposition format. Values are per
+    process: under gunicorn each worker reports its own series.
+    """
+    lines = []
+    for metric in METRICS:
+        lines.append(f"# HELP {metric.name} {metric.description}")
+        lines.append(f"# TYPE {metric.name} {metric.type}")
+        lines.extend(metric.render())
+    lines.extend(_collected_lines())
+    return '\n'.join(lines) + '\n'
+
+
+def _before_commit(session):
+    session.info['commit_started'] = time.perf_counter()
+
+
+def _after_commit(session):
+    started = session.info.pop('commit_started', None)
+    if started is not None:
+        observe_stage('db_commit', 'success', time.perf_counter() - started)
+
+
+def _after_rollback(session):
+    # A commit that failed is rolled back before it could finish
+    started = session.info.pop('commit_started', None)
+    if started is not None:
+        observe_stage('db_commit', 'error', time.perf_counter() - started)
+
+
+def register_metrics(app):
+    """Time every request and every database commit"""
+    event.listen(Session, 'before_commit', _before_commit)
+    event.listen(Session, 'after_commit', _after_commit)
+    event.listen(Session, 'after_rollback', _after_rollback)
+
+    @app.before_request
+    def start_request_timer():
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def observe_request(response):
+        started = g.pop('request_started', None)
+        if started is not None:
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started,
+                                         route=_route_label(),
+                                         method=request.method,
+                                         status=str(response.status_code))
+        return response
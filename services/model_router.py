@@ -0,0 +1,162 @@
+import logging
+import math
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from services.resilience import DeadlineExceeded, call_timeout
+from services.metrics import set_outcome
+
+# Hedging sends a duplicate request to the primary model once a call has run
+# longer than that model's recent p95, and keeps whichever answer comes first.
+# It costs extra requests, so it is off unless MODEL_HEDGING_ENABLED=1.
+MODEL_HEDGING_ENABLED = os.environ.get("MODEL_HEDGING_ENABLED", "0") == "1"
+MODEL_HEDGE_MIN_SECONDS = float(os.environ.get("MODEL_HEDGE_MIN_SECONDS", 1.0))
+MODEL_HEDGE_MIN_SAMPLES = int(os.environ.get("MODEL_HEDGE_MIN_SAMPLES", 20))
+MODEL_LATENCY_WINDOW = int(os.environ.get("MODEL_LATENCY_WINDOW", 200))
+MODEL_ROUTER_THREADS = int(os.environ.get("MODEL_ROUTER_THREADS", 16))
+
+
+class ModelRoute:
+    """
+    Primary model and latency SLO of one operation, with the faster model
+    used when the primary misses its deadline
+    """
+
+    def __init__(self, operation: str, primary: str, downgrade: str,
+                 deadline: float, downgrade_deadline: float):
+        prefix = f"MODEL_{operation.upper()}"
+        self.operation = operation
+        self.primary = os.environ.get(f"{prefix}_PRIMARY", primary)
+        self.downgrade = os.environ.get(f"{prefix}_DOWNGRADE", downgrade)
+        self.deadline = float(
+            os.environ.get(f"{prefix}_DEADLINE_SECONDS", deadline))
+        self.downgrade_deadline = float(
+            os.environ.get(f"{prefix}_DOWNGRADE_DEADLINE_SECONDS",
+                           downgrade_deadline))
+
+
+MODEL_ROUTES = {
+    route.operation: route
+    for route in (
+        ModelRoute('cv_analysis', "gemini-2.5-pro", "gemini-2.5-flash", 40, 30),
+        ModelRoute('first_question', "gemini-2.5-flash", "gemini-2.5-flash-lite", 8, 6),
+        ModelRoute('followup_question', "gemini-2.5-flash", "gemini-2.5-flash-lite", 8, 6),
+        ModelRoute('rolling_summary', "gemini-2.5-flash", "gemini-2.5-flash-lite", 20, 15),
+        ModelRoute('final_summary', "gemini-2.5-flash", "gemini-2.5-flash-lite", 45, 30),
+    )
+}
+
+# (operation, decision) -> count, where decision is primary, hedged or downgraded
+ROUTER_METRICS = defaultdict(int)
+
+_latencies = defaultdict(lambda: deque(maxlen=MODEL_LATENCY_WINDOW))
+_latencies_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=MODEL_ROUTER_THREADS,
+                               thread_name_prefix='model-call')
+
+
+def record_latency(operation: str, model: str, seconds: float):
+    with _latencies_lock:
+        _latencies[(operation, model)].append(seconds)
+
+
+def latency_percentile(operation: str, model: str, percentile: float):
+    """
+    Percentile of recent successful call latencies
+    Output: seconds, or None before MODEL_HEDGE_MIN_SAMPLES calls
+    """
+    with _latencies_lock:
+        samples = sorted(_latencies.get((operation, model), ()))
+    if len(samples) < MODEL_HEDGE_MIN_SAMPLES:
+        return None
+    return samples[min(len(samples) - 1,
+                       math.ceil(percentile / 100 * len(samples)) - 1)]
+
+
+def _hedge_delay(route: ModelRoute, deadline: float):
+    """Seconds after which to hedge the primary call, or None"""
+    if not MODEL_HEDGING_ENABLED:
+        return None
+    p95 = latency_percentile(route.operation, route.primary, 95)
+    if p95 is None:
+        return None
+    delay = max(p95, MODEL_HEDGE_MIN_SECONDS)
+    return delay if delay < deadline else None
+
+
+def _log_decision(route: ModelRoute, decision: str, model: str,
+                  started: float, deadline: float, reason: str = ''):
+    ROUTER_METRICS[(route.operation, decision)] += 1
+    p95 = latency_percentile(route.operation, route.primary, 95)
+    logging.info(
+        f"Model route {route.operation}: {decision} via {model} in "
+        f"{time.monotonic() - started:.2f}s (deadline {deadline:.2g}s, "
+        f"primary p95 {f'{p95:.2f}s' if p95 is not None else 'n/a'})"
+        f"{f' - {reason}' if reason else ''}")
+
+
+def _timed(operation: str, model: str, call, timeout: float):
+    started = time.monotonic()
+    result = call(model, timeout)
+    record_latency(operation, model, time.monotonic() - started)
+    return result
+
+
+def route_call(operation: str, call) -> tuple:
+    """
+    Run call(model, timeout_seconds) on the operation's primary model within
+    its deadline (shortened to the remaining request budget), hedging after
+    the primary's p95 when enabled, and retry on the downgrade model if the
+    deadline passes first. Errors other than a missed deadline are raised,
+    as is DeadlineExceeded when the request budget is spent.
+    Output: (result, model that produced it)
+    """
+    route = MODEL_ROUTES[operation]
+    timeout = call_timeout(route.deadline)
+    started = time.monotonic()
+    deadline = started + timeout
+    hedge_delay = _hedge_delay(route, timeout)
+    hedge_at = started + hedge_delay if hedge_delay is not None else None
+
+    def submit():
+        return _executor.submit(_timed, operation, route.primary, call,
+                                timeout)
+
+    first = submit()
+    pending = {first}
+    last_error = None
+    try:
+        while pending:
+            wake_at = deadline if hedge_at is None else min(hedge_at, deadline)
+            done, pending = wait(pending,
+                                 timeout=max(0, wake_at - time.monotonic()),
+                                 return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    result = future.result()
+                except Exception as e:
+                    last_error = e
+                    continue
+                _log_decision(route, 'primary' if future is first else 'hedged',
+                              route.primary, started, timeout)
+                return result, route.primary
+
+            now = time.monotonic()
+            if pending and now >= deadline:
+                raise DeadlineExceeded()
+            if pending and hedge_at is not None and now >= hedge_at:
+                hedge_at = None
+                pending.add(submit())
+        raise last_error
+
+    except DeadlineExceeded:
+        # Abandoned attempts stop on their own request timeout
+        downgrade_timeout = call_timeout(route.downgrade_deadline)
+        result = _timed(operation, route.downgrade, call, downgrade_timeout)
+        _log_decision(route, 'downgraded', route.downgrade, started, timeout,
+                      f"{route.primary} missed its deadline")
+        set_outcome('downgraded')
+        return result, route.downgrade
+
@@ -0,0 +1,140 @@
+import json
+import math
+import os
+import re
+import textwrap
+
+# Rough local token estimate for Gemini models: about 4 characters per
+# token in English, a little less in French. Erring low keeps budgets safe.
+CHARS_PER_TOKEN = 3.5
+
+# Input token budgets per call (prompt text excluding the system instruction)
+CV_ANALYSIS_INPUT_TOKENS = int(os.environ.get("CV_ANALYSIS_INPUT_TOKENS", 8000))
+FOLLOWUP_INPUT_TOKENS = int(os.environ.get("FOLLOWUP_INPUT_TOKENS", 1500))
+SUMMARY_INPUT_TOKENS = int(os.environ.get("SUMMARY_INPUT_TOKENS", 6000))
+ROLLING_SUMMARY_INPUT_TOKENS = int(os.environ.get("ROLLING_SUMMARY_INPUT_TOKENS", 3000))
+
+# Every answer keeps at least this much, however low it ranks
+MIN_ANSWER_TOKENS = 40
+TRUNCATION_MARKER = " […]"
+
+_WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+_SENTENCE_END_PATTERN = re.compile(r"[.!?…](\s|$)")
+_STOPWORDS = {
+    'avec', 'dans', 'pour', 'que', 'qui', 'sur', 'une', 'des', 'les', 'est',
+    'sont', 'mais', 'plus', 'très', 'tout', 'nous', 'vous', 'leur', 'cette',
+    'comme', 'aussi', 'être', 'avoir', 'fait', 'faire', 'with', 'that',
+    'this', 'from', 'have', 'were', 'they', 'their', 'your', 'about', 'which'
+}
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text or '') / CHARS_PER_TOKEN)
+
+
+def compact_whitespace(text: str) -> str:
+    """
+    Strip indentation and trailing spaces, collapse runs of spaces and
+    blank lines
+    """
+    lines = (re.sub(r'[ \t ]+', ' ', line).strip()
+             for line in textwrap.dedent(text or '').splitlines())
+    return re.sub(r'\n{3,}', '\n\n', '\n'.join(lines)).strip()
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Cut text to about max_tokens, at a sentence end when one is close enough,
+    otherwise at a word boundary
+    """
+    max_chars = int(max_tokens * CHARS_PER_TOKEN) - len(TRUNCATION_MARKER)
+    if len(text) <= max_chars + len(TRUNCATION_MARKER):
+        return text
+    if max_chars <= 0:
+        return TRUNCATION_MARKER.strip()
+
+    cut = text[:max_chars]
+    sentence_ends = [m.end() for m in _SENTENCE_END_PATTERN.finditer(cut)]
+    if sentence_ends and sentence_ends[-1] >= max_chars * 0.6:
+        cut = cut[:sentence_ends[-1]]
+    elif ' ' in cut:
+        cut = cut[:cut.rfind(' ')]
+    return cut.rstrip() + TRUNCATION_MARKER
+
+
+def compact_json(data) -> str:
+    """Serialize without indentation or empty fields"""
+    if isinstance(data, dict):
+        data = {key: value for key, value in data.items() if value not in (None, '', [], {})}
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+
+def _keywords(text: str) -> set:
+    return {
+        word for word in _WORD_PATTERN.findall(text.lower())
+        if len(word) > 3 and word not in _STOPWORDS
+    }
+
+
+def analysis_keywords(cv_analysis: dict) -> set:
+    """Terms from the CV analysis used to rank answers by relevance"""
+    fields = ('key_skills', 'potential_areas_for_growth', 'notable_achievements')
+    parts = [str(cv_analysis.get('career_stage', ''))]
+    for field in fields:
+        parts.extend(str(item) for item in cv_analysis.get(field, []) or [])
+    return _keywords(' '.join(parts))
+
+
+def _relevance(qa: dict, keywords: set, position: int, count: int) -> float:
+    """
+    Score an answer by CV-term and question-term overlap, concrete detail
+    (figures) and recency
+    """
+    answer_words = _keywords(qa['answer'])
+    if not answer_words:
+        return 0.0
+    score = len(answer_words & keywords) * 2.0
+    score += len(answer_words & _keywords(qa['question']))
+    if re.search(r'\d', qa['answer']):
+        score += 1.0
+    return score / math.sqrt(len(answer_words)) + position / max(count, 1)
+
+
+def format_qa_pairs(qa_pairs: list, max_tokens: int, keywords: set = None) -> str:
+    """
+    Render Q&A pairs in interview order within max_tokens. When they do not
+    fit, every answer keeps MIN_ANSWER_TOKENS and the remaining budget goes
+    to the most relevant answers first.
+    """
+    pairs = [{
+        'question': compact_whitespace(qa['question']),
+        'answer': compact_whitespace(qa['answer'])
+    } for qa in qa_pairs]
+
+    def render(items):
+        return "\n".join(f"Q : {qa['question']}\nR : {qa['answer']}" for qa in items)
+
+    full_text = render(pairs)
+    if estimate_tokens(full_text) <= max_tokens or not pairs:
+        return full_text
+
+    keywords = keywords or set()
+    fixed_tokens = sum(estimate_tokens(f"Q : {qa['question']}\nR : \n") for qa in pairs)
+    answer_budget = max(0, max_tokens - fixed_tokens)
+    floor = min(MIN_ANSWER_TOKENS, answer_budget // len(pairs))
+    needs = [estimate_tokens(qa['answer']) for qa in pairs]
+    allocation = [min(need, floor) for need in needs]
+    remaining = answer_budget - sum(allocation)
+
+    ranked = sorted(range(len(pairs)),
+                    key=lambda i: _relevance(pairs[i], keywords, i, len(pairs)),
+                    reverse=True)
+    for i in ranked:
+        extra = min(needs[i] - allocation[i], remaining)
+        allocation[i] += extra
+        remaining -= extra
+
+    return render({
+        'question': qa['question'],
+        'answer': truncate_to_tokens(qa['answer'], allocation[i])
+    } for i, qa in enumerate(pairs))
@@ -0,0 +1,226 @@
+import contextvars
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from flask import request
+
+# Consecutive upstream failures that open a breaker, and how long it stays
+# open before a single trial call is let through (half-open)
+BREAKER_FAILURE_THRESHOLD = int(os.environ.get("BREAKER_FAILURE_THRESHOLD", 5))
+BREAKER_RECOVERY_SECONDS = float(os.environ.get("BREAKER_RECOVERY_SECONDS", 30))
+# Calls are skipped when less than this is left of the request budget
+MIN_CALL_SECONDS = float(os.environ.get("MIN_CALL_SECONDS", 0.5))
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+class UpstreamHTTPError(Exception):
+    """Non-success HTTP response from an external API"""
+
+    def __init__(self, message: str, status_code: int):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def is_upstream_failure(error: Exception) -> bool:
+    """
+    Whether an error says the dependency is unhealthy. Client errors other
+    than timeouts and rate limiting are the caller's fault and do not count.
+    """
+    status_code = getattr(error, 'status_code', None) or getattr(
+        error, 'code', None)
+    if isinstance(status_code, int) and 400 <= status_code < 500:
+        return status_code in (408, 429)
+    return True
+
+
+class CircuitBreaker:
+    """
+    Per-dependency circuit breaker. After BREAKER_FAILURE_THRESHOLD
+    consecutive failures it opens and rejects calls at once with
+    CircuitOpenError; after BREAKER_RECOVERY_SECONDS one trial call is
+    allowed, which closes it again on success or reopens it on failure.
+    """
+
+    def __init__(self, name: str, failure_threshold: int,
+                 recovery_seconds: float, is_failure=is_upstream_failure):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_seconds = recovery_seconds
+        self.is_failure = is_failure
+        self.failures = 0
+        self.opened_at = None
+        self.rejected = 0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return CLOSED
+        if time.monotonic() - self.opened_at >= self.recovery_seconds:
+            return HALF_OPEN
+        return OPEN
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go through now"""
+        with self._lock:
+            state = self.state
+            if state == CLOSED:
+                return
+            if state == HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                logging.info(f"Circuit {self.name} half-open, trying one call")
+                return
+            self.rejected += 1
+        raise CircuitOpenError(f"{self.name} circuit is open")
+
+    def _close(self):
+        if self.opened_at is not None:
+            logging.info(f"Circuit {self.name} closed")
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            self._close()
+
+    def record_failure(self, error: Exception):
+        with self._lock:
+            if not self.is_failure(error):
+                # The dependency answered; the request itself was at fault
+                self._close()
+                return
+            self._trial_in_flight = False
+            self.failures += 1
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+                logging.warning(
+                    f"Circuit {self.name} open for {self.recovery_seconds:g}s "
+                    f"after {self.failures} failures: {str(error)}")
+
+    def _release_trial(self):
+        with self._lock:
+            self._trial_in_flight = False
+
+    @contextmanager
+    def guard(self):
+        """Run the enclosed upstream call under this breaker"""
+        self.before_call()
+        try:
+            yield
+        except Exception as e:
+            self.record_failure(e)
+            raise
+        except BaseException:
+            # Cancelled or abandoned: no verdict on the dependency
+            self._release_trial()
+            raise
+        else:
+            self.record_success()
+
+    def call(self, func, *args, **kwargs):
+        with self.guard():
+            return func(*args, **kwargs)
+
+
+BREAKERS = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name: str, is_failure=is_upstream_failure) -> CircuitBreaker:
+    """Shared breaker for a dependency, created on first use"""
+    with _breakers_lock:
+        breaker = BREAKERS.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(name, BREAKER_FAILURE_THRESHOLD,
+                                     BREAKER_RECOVERY_SECONDS, is_failure)
+            BREAKERS[name] = breaker
+        return breaker
+
+
+# Absolute time.monotonic() deadline of the request being served, if any
+_request_deadline = contextvars.ContextVar('request_deadline', default=None)
+
+
+def set_request_deadline(budget_seconds: float):
+    _request_deadline.set(time.monotonic() + budget_seconds)
+
+
+def clear_request_deadline():
+    _request_deadline.set(None)
+
+
+def with_request_deadline(generator):
+    """
+    Carry the current request deadline into a streamed response body, which
+    Flask iterates after the request's own context is gone
+    """
+    deadline = _request_deadline.get()
+
+    def run():
+        _request_deadline.set(deadline)
+        try:
+            yield from generator
+        finally:
+            _request_deadline.set(None)
+
+    return run()
+
+
+def remaining_budget():
+    """Seconds left of the current request budget, or None outside a request"""
+    deadline = _request_deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def call_timeout(default: float) -> float:
+    """
+    Timeout for an upstream call: default, shortened to what is left of the
+    request budget. Raises DeadlineExceeded when too little is left to try.
+    """
+    budget = remaining_budget()
+    if budget is None:
+        return default
+    if budget < MIN_CALL_SECONDS:
+        raise DeadlineExceeded(f"Request budget exhausted ({budget:.2f}s left)")
+    return min(default, budget)
+
+
+def register_request_deadlines(app):
+    """
+    Give every request a time budget (REQUEST_BUDGET_SECONDS, or a per-endpoint
+    value from REQUEST_BUDGET_OVERRIDES). Clients may ask for less with an
+    X-Request-Timeout header in seconds.
+    """
+
+    @app.before_request
+    def start_request_deadline():
+        budget = app.config['REQUEST_BUDGET_OVERRIDES'].get(
+            request.endpoint, app.config['REQUEST_BUDGET_SECONDS'])
+        try:
+            requested = float(request.headers.get('X-Request-Timeout', ''))
+            if requested > 0:
+                budget = min(budget, requested)
+        except ValueError:
+            pass
+        set_request_deadline(budget)
+
+    @app.teardown_request
+    def end_request_deadline(error=None):
+        clear_request_deadline()
@@ -0,0 +1,88 @@
+import logging
+from app import db
+from models import AssessmentSession
+from services.gemini_service import update_rolling_summary
+from services.job_queue import job_handler, enqueue_job
+
+# Attempts at storing an update when another worker stored one first
+MAX_UPDATE_ATTEMPTS = 2
+
+
+def queue_rolling_summary(session_id: str):
+    """
+    Schedule a rolling summary update. A job still waiting in the queue will
+    pick up the new answer too, so only one is kept queued per session.
+    """
+    return enqueue_job('rolling_summary',
+                       session_id=session_id,
+                       reuse_statuses=('queued', ))
+
+
+def _store_rolling_summary(session_id: str, summary: dict,
+                           previous_sequence, sequence: int) -> bool:
+    """
+    Save an updated summary only if no other update was stored since it was
+    read (compare-and-set on rolling_summary_sequence)
+    Output: True if stored
+    """
+    if previous_sequence is None:
+        unchanged = AssessmentSession.rolling_summary_sequence.is_(None)
+    else:
+        unchanged = AssessmentSession.rolling_summary_sequence == previous_sequence
+
+    stored = AssessmentSession.query.filter(
+        AssessmentSession.session_id == session_id, unchanged).update(
+            {
+                'rolling_summary': summary,
+                'rolling_summary_sequence': sequence
+            },
+            synchronize_session=False)
+    db.session.commit()
+    return bool(stored)
+
+
+# Background bookkeeping: reports waiting on the same workers go first, and
+# only the latest finished update per session is kept
+@job_handler('rolling_summary', priority=-1, keep_history=False)
+def run_rolling_summary_job(job, report_progress) -> dict:
+    """
+    Fold the answers given since the last update into the session's
+    rolling summary
+    """
+    session_id = job.session_id
+
+    for _ in range(MAX_UPDATE_ATTEMPTS):
+        assessment_session = AssessmentSession.query.options(
+            db.undefer_group('analysis')).filter_by(
+                session_id=session_id).first()
+        if not assessment_session:
+            raise ValueError(f"Session not found for ID: {session_id}")
+
+        previous_sequence = assessment_session.rolling_summary_sequence
+        new_rows = assessment_session.get_questions_answers_after(
+            previous_sequence)
+        if not new_rows:
+            return {'sequence': previous_sequence, 'updated': False}
+
+        report_progress(20, 'summary')
+        summary = update_rolling_summary(
+            assessment_session.get_cv_analysis(),
+            assessment_session.get_rolling_summary(),
+            [row.to_dict() for row in new_rows])
+        sequence = new_rows[-1].sequence
+        summary['answers_covered'] = sequence
+
+        # End the read transaction so the conditional update sees the latest row
+        db.session.rollback()
+        if _store_rolling_summary(session_id, summary, previous_sequence,
+                                  sequence):
+            logging.info(
+                f"Rolling summary for session {session_id} updated to answer {sequence}"
+            )
+            return {'sequence': sequence, 'updated': True}
+
+        logging.info(
+            f"Rolling summary for session {session_id} changed concurrently, retrying"
+        )
+
+    return {'sequence': None, 'updated': False}
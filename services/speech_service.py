@@ -1,17 +1,99 @@
 import os
 import logging
+import threading
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from services.resilience import get_breaker, call_timeout, UpstreamHTTPError
+from services.metrics import timed
 
 # ElevenLabs configuration
 ELEVENLABS_API_KEY = os.environ.get("ELEVENLABS_API_KEY")
 ELEVENLABS_VOICE_ID = os.environ.get(
     "ELEVENLABS_VOICE_ID", "21m00Tcm4TlvDq8ikWAM")  # Default voice ID
+ELEVENLABS_MODEL_ID = "eleven_turbo_v2_5"
+ELEVENLABS_VOICE_SETTINGS = {"stability": 0.5, "similarity_boost": 0.5}
+ELEVENLABS_API_URL = os.environ.get("ELEVENLABS_API_URL",
+                                    "https://api.elevenlabs.io/v1")
+
+# HTTP client tuning: keep-alive pool size, (connect, read) timeouts in
+# seconds, and retries with jittered exponential backoff on 429/5xx
+ELEVENLABS_POOL_SIZE = int(os.environ.get("ELEVENLABS_POOL_SIZE", 8))
+ELEVENLABS_TIMEOUT = (float(os.environ.get("ELEVENLABS_CONNECT_TIMEOUT", 5)),
+                      float(os.environ.get("ELEVENLABS_READ_TIMEOUT", 30)))
+ELEVENLABS_MAX_RETRIES = int(os.environ.get("ELEVENLABS_MAX_RETRIES", 3))
+AUDIO_CHUNK_SIZE = 16 * 1024
 
 # Tavus configuration for speech recognition
 TAVUS_API_KEY = os.environ.get("TAVUS_API_KEY")
 TAVUS_API_URL = "https://tavusapi.com/v2"
 
 
+# Opens after repeated ElevenLabs outages so callers fall back without waiting
+elevenlabs_breaker = get_breaker('elevenlabs')
+
+_http_session = None
+_http_session_lock = threading.Lock()
+
+
+def get_http_session() -> requests.Session:
+    """
+    Shared keep-alive session for ElevenLabs calls, created on first use
+    """
+    global _http_session
+    if _http_session is None:
+        with _http_session_lock:
+            if _http_session is None:
+                retry = Retry(total=ELEVENLABS_MAX_RETRIES,
+                              connect=ELEVENLABS_MAX_RETRIES,
+                              # A read timeout may mean the clip was already
+                              # billed; let the caller's fallback handle it
+                              read=0,
+                              status=ELEVENLABS_MAX_RETRIES,
+                              status_forcelist=(429, 500, 502, 503, 504),
+                              allowed_methods=frozenset({'GET', 'POST'}),
+                              backoff_factor=0.5,
+                              backoff_jitter=0.5,
+                              respect_retry_after_header=True,
+                              raise_on_status=False)
+                adapter = HTTPAdapter(pool_connections=1,
+                                      pool_maxsize=ELEVENLABS_POOL_SIZE,
+                                      max_retries=retry)
+                session = requests.Session()
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _http_session = session
+    return _http_session
+
+
+def _tts_request(text: str) -> tuple:
+    """
+    Build the URL, headers and body of a synthesis request
+    """
+    url = f"{ELEVENLABS_API_URL}/text-to-speech/{ELEVENLABS_VOICE_ID}"
+
+    headers = {
+        "Accept": "audio/mpeg",
+        "Content-Type": "application/json",
+        "xi-api-key": ELEVENLABS_API_KEY
+    }
+
+    data = {
+        "text": text,
+        "model_id": ELEVENLABS_MODEL_ID,
+        "voice_settings": ELEVENLABS_VOICE_SETTINGS
+    }
+    return url, headers, data
+
+
+def _request_timeout() -> tuple:
+    """(connect, read) timeouts, shortened to the remaining request budget"""
+    connect_timeout, read_timeout = ELEVENLABS_TIMEOUT
+    read_timeout = call_timeout(read_timeout)
+    return min(connect_timeout, read_timeout), read_timeout
+
+
+@timed('tts', succeeded=bool, failure_outcome='fallback')
 def text_to_speech(text: str, output_path: str) -> bool:
     """
     Convert text to speech using ElevenLabs API
@@ -23,65 +105,76 @@ def text_to_speech(text: str, output_path: str) -> bool:
             logging.error("ElevenLabs API key not found")
             return False
 
-        url = f"https://api.elevenlabs.io/v1/text-to-speech/{ELEVENLABS_VOICE_ID}"
-
-        headers = {
-            "Accept": "audio/mpeg",
-            "Content-Type": "application/json",
-            "xi-api-key": ELEVENLABS_API_KEY
-        }
-
-        data = {
-            "text": text,
-            "model_id": "eleven_turbo_v2_5",
-            "voice_settings": {
-                "stability": 0.5,
-                "similarity_boost": 0.5
-            }
-        }
-
-        response = requests.post(url, json=data, headers=headers)
-
-        if response.status_code == 200:
+        url, headers, data = _tts_request(text)
+        timeout = _request_timeout()
+
+        # Stream the body to disk as it arrives instead of buffering it
+        with elevenlabs_breaker.guard(), get_http_session().post(
+                url, json=data, headers=headers, timeout=timeout,
+                stream=True) as response:
+            if response.status_code != 200:
+                raise UpstreamHTTPError(
+                    f"ElevenLabs API error: {response.status_code} - {response.text}",
+                    response.status_code)
             with open(output_path, 'wb') as f:
-                f.write(response.content)
-            logging.info(f"Audio saved to {output_path}")
-            return True
-        else:
-            logging.error(
-                f"ElevenLabs API error: {response.status_code} - {response.text}"
-            )
-            return False
+                for chunk in response.iter_content(chunk_size=AUDIO_CHUNK_SIZE):
+                    f.write(chunk)
+        logging.info(f"Audio saved to {output_path}")
+        return True
 
     except Exception as e:
         logging.error(f"Error in text_to_speech: {str(e)}")
         return False
 
 
+@timed('tts_stream')
+def stream_text_to_speech(text: str):
+    """
+    Start a synthesis on the ElevenLabs streaming endpoint
+    Output: iterator over MP3 chunks as the provider produces them
+    Errors before the first chunk are raised so callers can fall back.
+    """
+    if not ELEVENLABS_API_KEY:
+        raise Exception("ElevenLabs API key not found")
+
+    url, headers, data = _tts_request(text)
+    timeout = _request_timeout()
+    # The breaker judges the provider on whether the stream starts
+    with elevenlabs_breaker.guard():
+        response = get_http_session().post(f"{url}/stream",
+                                           json=data,
+                                           headers=headers,
+                                           timeout=timeout,
+                                           stream=True)
+        if response.status_code != 200:
+            detail = response.text
+            response.close()
+            raise UpstreamHTTPError(
+                f"ElevenLabs API error: {response.status_code} - {detail}",
+                response.status_code)
+
+    def chunks():
+        with response:
+            for chunk in response.iter_content(chunk_size=AUDIO_CHUNK_SIZE):
+                if chunk:
+                    yield chunk
+
+    return chunks()
+
+
 def speech_to_text(audio_file_path: str) -> str:
     """
-    Convert speech to text using Web Speech API fallback
+    Convert speech to text with the configured transcription backend
     Input: path to audio file
-    Output: transcribed text
-    
-    Note: Since Tavus is primarily a conversational AI video platform and not a standalone STT service,
-    this implementation uses a fallback approach that can be extended with other STT services.
+    Output: transcribed text, or an empty string if transcription failed
     """
     try:
         if not os.path.exists(audio_file_path):
             logging.error(f"Audio file not found: {audio_file_path}")
             return ""
 
-        # For now, return a placeholder that indicates the audio was received
-        # In a real implementation, you would integrate with a proper STT service
-        file_size = os.path.getsize(audio_file_path)
-        logging.info(
-            f"Audio file received: {audio_file_path} (size: {file_size} bytes)"
-        )
-
-        # This is a placeholder - in production you would call an actual STT service
-        # For demonstration purposes, we'll return a message indicating audio was processed
-        return "Audio received and ready for transcription. Please implement your preferred STT service."
+        from services.transcription_service import transcribe_file
+        return transcribe_file(audio_file_path)
 
     except Exception as e:
         logging.error(f"Error in speech_to_text: {str(e)}")
@@ -90,16 +183,12 @@ def speech_to_text(audio_file_path: str) -> str:
 
 def get_audio_duration(audio_file_path: str) -> float:
     """
-    Get duration of audio file in seconds
-    This is a simple implementation - in production you might want to use librosa or pydub
+    Get duration of audio file in seconds, read from its container/frame headers
+    Output: duration, or 0.0 if the format is not recognised
     """
-    try:
-        # For now, return a default duration
-        # In production, you would use a library like pydub or librosa
-        file_size = os.path.getsize(audio_file_path)
-        # Rough estimate: 1 second ≈ 16KB for basic audio
-        estimated_duration = file_size / 16000
-        return min(estimated_duration, 120)  # Cap at 2 minutes
-    except Exception as e:
-        logging.error(f"Error getting audio duration: {str(e)}")
-        return 30.0  # Default duration
+    from services.audio_metadata import probe_audio
+    metadata = probe_audio(audio_file_path)
+    if not metadata or metadata.get('duration_seconds') is None:
+        logging.warning(f"Unknown audio duration for {audio_file_path}")
+        return 0.0
+    return metadata['duration_seconds']
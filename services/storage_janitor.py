@@ -0,0 +1,220 @@
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from flask import current_app
+from app import db
+from models import AssessmentSession, AudioFile, ReportArtifact
+from services.audio_cache import audio_cache_key, cache_filename, get_static_questions
+
+# Temporary files younger than this may still be being written
+PARTIAL_FILE_GRACE_SECONDS = 3600
+
+# Cumulative totals since process start, per directory
+JANITOR_METRICS = {}
+_metrics_lock = threading.Lock()
+
+
+def _folders() -> dict:
+    return {
+        'uploads': current_app.config['UPLOAD_FOLDER'],
+        'audio_cache': current_app.config['AUDIO_CACHE_FOLDER'],
+        'recordings': current_app.config['RECORDINGS_FOLDER'],
+        'reports': current_app.config['REPORTS_FOLDER']
+    }
+
+
+def _protected_paths() -> set:
+    """
+    Files that must survive eviction: CVs, recorded answers and latest
+    reports of sessions active within JANITOR_ACTIVE_SESSION_HOURS, and
+    pre-rendered questions
+    """
+    cutoff = datetime.utcnow() - timedelta(
+        hours=current_app.config['JANITOR_ACTIVE_SESSION_HOURS'])
+    folders = _folders()
+    protected = set()
+
+    active_sessions = db.session.query(
+        AssessmentSession.session_id, AssessmentSession.cv_filename).filter(
+            AssessmentSession.updated_at >= cutoff).all()
+    for session_id, cv_filename in active_sessions:
+        protected.add(os.path.abspath(os.path.join(folders['uploads'], cv_filename)))
+        artifact = ReportArtifact.latest_for_session(session_id)
+        if artifact:
+            protected.add(os.path.abspath(artifact.file_path))
+
+    recordings = db.session.query(AudioFile.file_path).join(
+        AssessmentSession, AssessmentSession.session_id == AudioFile.session_id).filter(
+            AssessmentSession.updated_at >= cutoff).all()
+    for (file_path, ) in recordings:
+        protected.add(os.path.abspath(file_path))
+
+    for question in get_static_questions():
+        protected.add(os.path.abspath(os.path.join(
+            folders['audio_cache'], cache_filename(audio_cache_key(question)))))
+    return protected
+
+
+def _scan(folder: str) -> list:
+    """
+    List regular files directly inside folder
+    Output: [(last_access, modified, size, path, is_partial)] with times as epoch seconds
+    """
+    entries = []
+    if not os.path.isdir(folder):
+        return entries
+    for entry in os.scandir(folder):
+        if not entry.is_file(follow_symlinks=False):
+            continue
+        stat = entry.stat()
+        entries.append((max(stat.st_atime, stat.st_mtime), stat.st_mtime,
+                        stat.st_size, os.path.abspath(entry.path),
+                        entry.name.endswith('.part')))
+    return entries
+
+
+def _select_evictions(entries: list, policy: dict, protected: set, now: float) -> list:
+    """
+    Pick files to delete: stale partial writes, files past the age or idle
+    limits, then least recently accessed files until both quotas are met
+    """
+    max_age = policy.get('max_age_days')
+    max_idle = policy.get('max_idle_days')
+    evict = []
+    keep = []
+
+    for last_access, modified, size, path, is_partial in entries:
+        if path in protected:
+            continue
+        if is_partial:
+            if now - last_access > PARTIAL_FILE_GRACE_SECONDS:
+                evict.append((last_access, size, path))
+        elif max_age and now - modified > max_age * 86400:
+            evict.append((last_access, size, path))
+        elif max_idle and now - last_access > max_idle * 86400:
+            evict.append((last_access, size, path))
+        else:
+            keep.append((last_access, size, path))
+
+    total_bytes = sum(entry[2] for entry in entries) - sum(size for _, size, _ in evict)
+    total_files = len(entries) - len(evict)
+    max_bytes = policy.get('max_bytes')
+    max_files = policy.get('max_files')
+
+    for last_access, size, path in sorted(keep):
+        over_bytes = max_bytes is not None and total_bytes > max_bytes
+        over_files = max_files is not None and total_files > max_files
+        if not over_bytes and not over_files:
+            break
+        evict.append((last_access, size, path))
+        total_bytes -= size
+        total_files -= 1
+
+    return evict
+
+
+def _record_metrics(name: str, result: dict):
+    with _metrics_lock:
+        totals = JANITOR_METRICS.setdefault(name, {
+            'runs': 0, 'files_evicted': 0, 'bytes_reclaimed': 0
+        })
+        totals['runs'] += 1
+        totals['files_evicted'] += result['files_evicted']
+        totals['bytes_reclaimed'] += result['bytes_reclaimed']
+
+
+def run_janitor(dry_run: bool = False) -> dict:
+    """
+    Enforce the JANITOR_POLICIES quotas on uploads/, the TTS cache, recorded
+    answers and reports/
+    Output: per-directory counts of scanned, protected and evicted files and
+    bytes reclaimed (or reclaimable, in dry-run mode)
+    """
+    policies = current_app.config['JANITOR_POLICIES']
+    protected = _protected_paths()
+    now = time.time()
+    results = {}
+
+    for name, folder in _folders().items():
+        policy = policies.get(name)
+        if not policy:
+            continue
+
+        entries = _scan(folder)
+        evictions = _select_evictions(entries, policy, protected, now)
+        result = {
+            'folder': folder,
+            'files_scanned': len(entries),
+            'bytes_scanned': sum(entry[2] for entry in entries),
+            'files_protected': sum(1 for entry in entries if entry[3] in protected),
+            'files_evicted': 0,
+            'bytes_reclaimed': 0,
+            'dry_run': dry_run
+        }
+
+        removed_paths = []
+        for _, size, path in evictions:
+            if not dry_run:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    # Another process got there first
+                    continue
+                except OSError as e:
+                    logging.warning(f"Janitor could not remove {path}: {str(e)}")
+                    continue
+                removed_paths.append(path)
+            result['files_evicted'] += 1
+            result['bytes_reclaimed'] += size
+
+        if name == 'reports' and removed_paths:
+            _forget_report_artifacts(removed_paths)
+        if name == 'recordings' and removed_paths:
+            _forget_audio_files(removed_paths)
+
+        if not dry_run:
+            _record_metrics(name, result)
+        results[name] = result
+        if result['files_evicted']:
+            action = 'Would evict' if dry_run else 'Evicted'
+            logging.info(
+                f"Janitor: {action} {result['files_evicted']} files ({result['bytes_reclaimed']} bytes) from {folder}")
+
+    return results
+
+
+def _forget_report_artifacts(removed_paths: list):
+    removed = set(removed_paths)
+    filenames = [os.path.basename(path) for path in removed_paths]
+    for artifact in ReportArtifact.query.filter(
+            ReportArtifact.filename.in_(filenames)).all():
+        if os.path.abspath(artifact.file_path) in removed:
+            db.session.delete(artifact)
+    db.session.commit()
+
+
+def _forget_audio_files(removed_paths: list):
+    removed = set(removed_paths)
+    filenames = [os.path.basename(path) for path in removed_paths]
+    for audio_file in AudioFile.query.filter(
+            AudioFile.filename.in_(filenames)).all():
+        if os.path.abspath(audio_file.file_path) in removed:
+            db.session.delete(audio_file)
+    db.session.commit()
+
+
+def start_background_janitor(app):
+    """Run the janitor every JANITOR_INTERVAL_SECONDS in a daemon thread"""
+
+    def run():
+        while True:
+            time.sleep(app.config['JANITOR_INTERVAL_SECONDS'])
+            with app.app_context():
+                try:
+                    run_janitor()
+                except Exception as e:
+                    logging.error(f"Storage janitor failed: {str(e)}")
+
+    threading.Thread(target=run, name='storage-janitor', daemon=True).start()
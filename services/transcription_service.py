@@ -0,0 +1,250 @@
+import abc
+import logging
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from flask import current_app
+from app import db
+from models import AudioFile
+
+# Speech-to-text settings. STT_BACKEND is 'auto' (faster-whisper when it is
+# installed), 'faster_whisper', 'stub' (fixed text, for tests) or 'none'.
+STT_BACKEND = os.environ.get("STT_BACKEND", "auto")
+STT_WORKERS = int(os.environ.get("STT_WORKERS", 2))
+STT_MODEL_SIZE = os.environ.get("STT_MODEL_SIZE", "small")
+STT_LANGUAGE = os.environ.get("STT_LANGUAGE", "fr")
+STT_CPU_THREADS = int(
+    os.environ.get("STT_CPU_THREADS", max(1, (os.cpu_count() or 1) // STT_WORKERS)))
+STT_STUB_TEXT = os.environ.get("STT_STUB_TEXT", "Réponse de test")
+# Segments queued or running at once; further uploads are refused at once
+STT_MAX_PENDING = int(os.environ.get("STT_MAX_PENDING", STT_WORKERS * 8))
+
+
+class TranscriptionQueueFull(Exception):
+    pass
+
+
+class TranscriptionBackend(abc.ABC):
+    """Speech-to-text engine run inside a transcription worker process"""
+
+    name = None
+
+    @classmethod
+    def is_available(cls) -> bool:
+        return True
+
+    @abc.abstractmethod
+    def transcribe(self, audio_path: str) -> str:
+        pass
+
+
+class FasterWhisperBackend(TranscriptionBackend):
+    """CPU-only Whisper (CTranslate2, int8) via the optional faster-whisper package"""
+
+    name = 'faster_whisper'
+
+    @classmethod
+    def is_available(cls) -> bool:
+        try:
+            import faster_whisper  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    def __init__(self):
+        from faster_whisper import WhisperModel
+        self.model = WhisperModel(STT_MODEL_SIZE,
+                                  device='cpu',
+                                  compute_type='int8',
+                                  cpu_threads=STT_CPU_THREADS)
+
+    def transcribe(self, audio_path: str) -> str:
+        segments, _ = self.model.transcribe(audio_path,
+                                            language=STT_LANGUAGE,
+                                            vad_filter=True,
+                                            beam_size=1)
+        return ' '.join(segment.text.strip() for segment in segments).strip()
+
+
+class StubBackend(TranscriptionBackend):
+    """Returns STT_STUB_TEXT for every segment"""
+
+    name = 'stub'
+
+    def transcribe(self, audio_path: str) -> str:
+        return STT_STUB_TEXT
+
+
+BACKENDS = {
+    backend.name: backend
+    for backend in (FasterWhisperBackend, StubBackend)
+}
+
+
+def get_backend_name():
+    """
+    Resolve STT_BACKEND to an available backend
+    Output: backend name, or None if server transcription is disabled
+    """
+    if STT_BACKEND == 'auto':
+        return FasterWhisperBackend.name if FasterWhisperBackend.is_available() else None
+    backend = BACKENDS.get(STT_BACKEND)
+    if backend is None or not backend.is_available():
+        return None
+    return backend.name
+
+
+# Loaded once per worker process, on its first segment
+_worker_backend = None
+
+
+def _transcribe_in_worker(backend_name: str, audio_path: str) -> str:
+    global _worker_backend
+    if _worker_backend is None or _worker_backend.name != backend_name:
+        _worker_backend = BACKENDS[backend_name]()
+    return _worker_backend.transcribe(audio_path)
+
+
+_stt_pool = None
+_stt_pool_lock = threading.Lock()
+_pending_slots = threading.BoundedSemaphore(STT_MAX_PENDING)
+# AudioFile ids whose transcription is running in this process
+_segments_in_flight = set()
+_segments_lock = threading.Lock()
+
+
+def _get_stt_pool() -> ProcessPoolExecutor:
+    global _stt_pool
+    with _stt_pool_lock:
+        if _stt_pool is None:
+            _stt_pool = ProcessPoolExecutor(max_workers=STT_WORKERS)
+        return _stt_pool
+
+
+def _reset_stt_pool(pool: ProcessPoolExecutor):
+    """
+    Drop a pool broken by a dead worker (e.g. killed while loading the model),
+    killing its remaining processes. Does nothing if another caller already
+    replaced it.
+    """
+    global _stt_pool
+    with _stt_pool_lock:
+        if _stt_pool is not pool:
+            return
+        processes = list((pool._processes or {}).values())
+        pool.shutdown(wait=False, cancel_futures=True)
+        _stt_pool = None
+    for process in processes:
+        if process.is_alive():
+            process.terminate()
+
+
+def submit_transcription(audio_path: str):
+    """
+    Queue a file for transcription on the worker pool. Raises
+    TranscriptionQueueFull when STT_MAX_PENDING files are already queued.
+    Output: future resolving to the transcribed text
+    """
+    backend_name = get_backend_name()
+    if backend_name is None:
+        raise RuntimeError("No speech-to-text backend available")
+
+    if not _pending_slots.acquire(blocking=False):
+        raise TranscriptionQueueFull("Transcription queue is full")
+    result = Future()
+    result.add_done_callback(lambda _: _pending_slots.release())
+
+    def submit(attempt: int):
+        pool = _get_stt_pool()
+        try:
+            future = pool.submit(_transcribe_in_worker, backend_name, audio_path)
+        except BrokenProcessPool as e:
+            retry(pool, attempt, e)
+            return
+        future.add_done_callback(lambda future: finish(future, pool, attempt))
+
+    def retry(pool, attempt: int, error: Exception):
+        # A dead worker breaks the whole pool: replace it and resubmit once
+        _reset_stt_pool(pool)
+        if attempt > 0:
+            result.set_exception(error)
+            return
+        logging.warning(f"Transcription worker died, restarting the pool: {audio_path}")
+        try:
+            submit(attempt + 1)
+        except Exception as e:
+            result.set_exception(e)
+
+    def finish(future, pool, attempt: int):
+        if future.cancelled():
+            retry(pool, attempt, BrokenProcessPool("Transcription pool was reset"))
+        elif isinstance(future.exception(), BrokenProcessPool):
+            retry(pool, attempt, future.exception())
+        elif future.exception() is not None:
+            result.set_exception(future.exception())
+        else:
+            result.set_result(future.result())
+
+    try:
+        submit(0)
+    except Exception as e:
+        result.set_exception(e)
+        raise
+    return result
+
+
+def transcribe_file(audio_path: str, timeout: float = None) -> str:
+    """Transcribe a whole file and wait for the result"""
+    return submit_transcription(audio_path).result(timeout=timeout)
+
+
+def transcribe_segment(audio_file_id: int, audio_path: str):
+    """
+    Transcribe one recording segment in the background and store the text
+    on its AudioFile row ('' if transcription fails). Does nothing if the
+    segment is already being transcribed in this process; raises if it
+    cannot be queued.
+    """
+    app = current_app._get_current_object()
+    with _segments_lock:
+        if audio_file_id in _segments_in_flight:
+            return
+        _segments_in_flight.add(audio_file_id)
+
+    def store(future):
+        try:
+            transcription = future.result()
+        except Exception as e:
+            logging.error(f"Transcription failed for {audio_path}: {str(e)}")
+            transcription = ''
+        try:
+            with app.app_context():
+                AudioFile.query.filter_by(id=audio_file_id).update(
+                    {'transcription': transcription})
+                db.session.commit()
+        finally:
+            with _segments_lock:
+                _segments_in_flight.discard(audio_file_id)
+
+    try:
+        future = submit_transcription(audio_path)
+    except Exception:
+        with _segments_lock:
+            _segments_in_flight.discard(audio_file_id)
+        raise
+    future.add_done_callback(store)
+
+
+def get_recording_transcription(session_id: str, recording_id: str) -> tuple:
+    """
+    Join the transcribed segments of a recording in order
+    Output: (text, segments transcribed, segments received)
+    """
+    rows = AudioFile.query.with_entities(
+        AudioFile.sequence, AudioFile.transcription).filter_by(
+            session_id=session_id, recording_id=recording_id).order_by(
+                AudioFile.sequence.asc()).all()
+    texts = [transcription for _, transcription in rows if transcription]
+    done = sum(1 for _, transcription in rows if transcription is not None)
+    return ' '.join(texts).strip(), done, len(rows)
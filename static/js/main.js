@@ -3,7 +3,15 @@ let currentQuestion = 1;
 let isRecording = false;
 let speechRecognition = null;
 let currentQuestionText = "";
+// Signature of currentQuestionText, required to stream its speech
+let currentSpeechToken = "";
 let recognizedText = "";
+let serverRecording = null;
+
+// Length of each independently transcribed segment when the browser has no
+// speech recognition and answers are transcribed on the server
+const RECORDING_SEGMENT_MS = 5000;
+const SEGMENT_UPLOAD_ATTEMPTS = 4;
 
 const speakingAvatar = document.getElementById("avatar-speaking");
 const listeningAvatar = document.getElementById("avatar-listening");
@@ -63,8 +71,7 @@ async function analyzeCV() {
         const data = await response.json();
 
         if (data.success) {
-            currentQuestionText = data.first_question;
-            displayQuestion(data.first_question);
+            displayQuestion(data.first_question, data.speech_token);
             await generateQuestionAudio(data.first_question);
 
             document.getElementById("loading-screen").style.display = "none";
@@ -83,14 +90,29 @@ async function analyzeCV() {
 }
 
 // Display question
-function displayQuestion(question) {
+function displayQuestion(question, speechToken) {
     const questionElement = document.getElementById("current-question-text");
     questionElement.textContent = question;
     currentQuestionText = question;
+    currentSpeechToken = speechToken || "";
+}
+
+// Play a question's audio as it is synthesized, falling back to generating
+// the full clip first if the stream cannot be played
+function generateQuestionAudio(text) {
+    playQuestionAudio(
+        "/api/stream/speech?text=" +
+            encodeURIComponent(text) +
+            "&token=" +
+            encodeURIComponent(currentSpeechToken),
+        () => {
+            generateQuestionAudioBuffered(text);
+        },
+    );
 }
 
-// Generate audio for question
-async function generateQuestionAudio(text) {
+// Generate the full audio clip for a question, then play it
+async function generateQuestionAudioBuffered(text) {
     try {
         setAvatarState("talking");
 
@@ -105,20 +127,7 @@ async function generateQuestionAudio(text) {
         const data = await response.json();
 
         if (data.success) {
-            const audioElement = document.getElementById("question-audio");
-            audioElement.src = data.audio_url;
-            audioElement.load();
-            audioElement.play().catch((error) => {
-                console.error("Error playing audio:", error);
-                showError(
-                    "Unable to play audio. Please check your browser settings.",
-                );
-            });
-
-            audioElement.onended = () => {
-                setAvatarState("listening");
-                startVoiceRecognition();
-            };
+            playQuestionAudio(data.audio_url);
         } else {
             console.error("Failed to generate audio:", data.error);
         }
@@ -127,6 +136,29 @@ async function generateQuestionAudio(text) {
     }
 }
 
+// Play a question's audio, then start listening for the answer
+function playQuestionAudio(audioUrl, onLoadError) {
+    setAvatarState("talking");
+
+    const audioElement = document.getElementById("question-audio");
+    audioElement.onerror = onLoadError || null;
+    audioElement.src = audioUrl;
+    audioElement.load();
+    audioElement.play().catch((error) => {
+        console.error("Error playing audio:", error);
+        if (!onLoadError) {
+            showError(
+                "Unable to play audio. Please check your browser settings.",
+            );
+        }
+    });
+
+    audioElement.onended = () => {
+        setAvatarState("listening");
+        startVoiceRecognition();
+    };
+}
+
 // Play question audio manually
 function playQuestion() {
     const audioElement = document.getElementById("question-audio");
@@ -144,6 +176,12 @@ function playQuestion() {
 async function startRecording() {
     try {
         if (!BrowserSpeechRecognition.isSupported()) {
+            if (supportsServerTranscription()) {
+                await startServerRecording();
+                isRecording = true;
+                showRecordingControls(true);
+                return;
+            }
             showError(
                 "Speech recognition is not supported in your browser. Please use Chrome, Edge, or Safari.",
             );
@@ -187,12 +225,7 @@ async function startRecording() {
 
         speechRecognition.start();
         isRecording = true;
-
-        document.getElementById("record-btn").innerHTML =
-            '<i class="fas fa-stop me-2"></i>Stop Recording';
-        document.getElementById("record-btn").classList.remove("btn-danger");
-        document.getElementById("record-btn").classList.add("btn-warning");
-        document.getElementById("recording-indicator").style.display = "block";
+        showRecordingControls(true);
     } catch (error) {
         console.error("Error starting recording:", error);
         showError(
@@ -203,15 +236,144 @@ async function startRecording() {
 
 // Stop recording
 function stopRecording() {
-    if (speechRecognition && isRecording) {
+    if (serverRecording) {
+        isRecording = false;
+        showRecordingControls(false);
+        finishServerRecording();
+    } else if (speechRecognition && isRecording) {
         speechRecognition.stop();
         isRecording = false;
+        showRecordingControls(false);
+    }
+}
+
+function showRecordingControls(recording) {
+    const recordButton = document.getElementById("record-btn");
+    recordButton.innerHTML = recording
+        ? '<i class="fas fa-stop me-2"></i>Stop Recording'
+        : '<i class="fas fa-microphone me-2"></i>Record Answer';
+    recordButton.classList.toggle("btn-danger", !recording);
+    recordButton.classList.toggle("btn-warning", recording);
+    document.getElementById("recording-indicator").style.display = recording
+        ? "block"
+        : "none";
+}
+
+function supportsServerTranscription() {
+    return !!(
+        navigator.mediaDevices &&
+        navigator.mediaDevices.getUserMedia &&
+        window.MediaRecorder
+    );
+}
+
+// Record the answer as a series of self-contained segments, each uploaded
+// and transcribed on the server while the candidate keeps speaking
+async function startServerRecording() {
+    const stream = await navigator.mediaDevices.getUserMedia({ audio: true });
+    const recording = {
+        id: window.crypto && crypto.randomUUID
+            ? crypto.randomUUID()
+            : Date.now().toString(36) + Math.random().toString(36).slice(2),
+        stream: stream,
+        nextSequence: 0,
+        uploads: [],
+        active: true,
+        recorder: null,
+        timer: null,
+    };
+
+    const startSegment = () => {
+        const recorder = new MediaRecorder(stream);
+        const sequence = recording.nextSequence++;
+        recorder.ondataavailable = (event) => {
+            if (event.data && event.data.size) {
+                recording.uploads.push(
+                    uploadRecordingSegment(recording.id, sequence, event.data),
+                );
+            }
+        };
+        recorder.onstop = () => {
+            if (recording.active) {
+                startSegment();
+            }
+        };
+        recorder.start();
+        recording.recorder = recorder;
+    };
+
+    startSegment();
+    recording.timer = setInterval(
+        () => recording.recorder.stop(),
+        RECORDING_SEGMENT_MS,
+    );
+    serverRecording = recording;
+}
 
-        document.getElementById("record-btn").innerHTML =
-            '<i class="fas fa-microphone me-2"></i>Record Answer';
-        document.getElementById("record-btn").classList.remove("btn-warning");
-        document.getElementById("record-btn").classList.add("btn-danger");
-        document.getElementById("recording-indicator").style.display = "none";
+async function uploadRecordingSegment(recordingId, sequence, blob) {
+    for (let attempt = 1; ; attempt++) {
+        const formData = new FormData();
+        formData.append("sequence", sequence);
+        formData.append("audio", blob, `segment-${sequence}.webm`);
+        const response = await fetch(
+            `/api/transcription/${recordingId}/chunk`,
+            { method: "POST", body: formData },
+        );
+        if (response.ok) {
+            return;
+        }
+        // Server errors are retried; the server keeps or restarts the segment
+        if (response.status < 500 || attempt >= SEGMENT_UPLOAD_ATTEMPTS) {
+            throw new Error(`Segment upload failed: ${response.status}`);
+        }
+        const retryAfter = Number(response.headers.get("Retry-After")) || attempt;
+        await new Promise((resolve) => setTimeout(resolve, retryAfter * 1000));
+    }
+}
+
+async function finishServerRecording() {
+    const recording = serverRecording;
+    serverRecording = null;
+    recording.active = false;
+    clearInterval(recording.timer);
+
+    try {
+        // The last segment's data arrives before its stop event
+        await new Promise((resolve) => {
+            recording.recorder.addEventListener("stop", resolve, {
+                once: true,
+            });
+            recording.recorder.stop();
+        });
+        recording.stream.getTracks().forEach((track) => track.stop());
+        await Promise.all(recording.uploads);
+
+        showProcessingOverlay();
+        const response = await fetch(
+            `/api/transcription/${recording.id}/finish`,
+            {
+                method: "POST",
+                headers: { "Content-Type": "application/json" },
+                body: JSON.stringify({ segments: recording.uploads.length }),
+            },
+        );
+        const data = await response.json();
+        hideProcessingOverlay();
+
+        if (!data.success || !data.transcription) {
+            showError("Aucune transcription disponible. Veuillez réessayer.");
+            return;
+        }
+
+        recognizedText = data.transcription;
+        document.getElementById("transcribed-text").textContent =
+            data.transcription;
+        document.getElementById("answer-section").style.display = "block";
+        document.getElementById("submit-btn").style.display = "inline-block";
+    } catch (error) {
+        hideProcessingOverlay();
+        console.error("Error transcribing recording:", error);
+        showError("Erreur de transcription. Veuillez réessayer.");
     }
 }
 
@@ -230,34 +392,15 @@ async function submitAnswer() {
         // Show processing overlay
         showProcessingOverlay();
 
-        const response = await fetch("/api/submit_answer", {
-            method: "POST",
-            headers: {
-                "Content-Type": "application/json",
-            },
-            body: JSON.stringify({
-                question: currentQuestionText,
-                answer: answer,
-            }),
+        const payload = JSON.stringify({
+            question: currentQuestionText,
+            answer: answer,
         });
 
-        const data = await response.json();
-
-        if (data.success) {
-            if (data.completed) {
-                hideProcessingOverlay();
-                showCompletionScreen();
-            } else {
-                currentQuestion = data.question_number;
-                updateProgress();
-                displayQuestion(data.next_question);
-                await generateQuestionAudio(data.next_question);
-                hideProcessingOverlay();
-                resetForNextQuestion();
-            }
+        if (supportsEventStreams()) {
+            await submitAnswerStreaming(payload);
         } else {
-            hideProcessingOverlay();
-            throw new Error(data.error || "Failed to submit answer");
+            await submitAnswerSingleRequest(payload);
         }
     } catch (error) {
         hideProcessingOverlay();
@@ -266,6 +409,156 @@ async function submitAnswer() {
     }
 }
 
+// Single round-trip: the answer is saved, the next question is
+// generated and its audio synthesized by the same request
+async function submitAnswerSingleRequest(payload) {
+    const response = await fetch("/api/submit_turn", {
+        method: "POST",
+        headers: {
+            "Content-Type": "application/json",
+        },
+        body: payload,
+    });
+
+    const data = await response.json();
+
+    if (!data.success) {
+        throw new Error(data.error || "Failed to submit answer");
+    }
+
+    if (data.completed) {
+        hideProcessingOverlay();
+        showCompletionScreen();
+        return;
+    }
+
+    currentQuestion = data.question_number;
+    updateProgress();
+    displayQuestion(data.next_question, data.speech_token);
+    await playTurnAudio(data.audio_url, data.next_question);
+    hideProcessingOverlay();
+    resetForNextQuestion();
+}
+
+// Streaming variant: question text is rendered token by token, then the
+// audio URL arrives on the same connection
+async function submitAnswerStreaming(payload) {
+    const response = await fetch("/api/stream/turn", {
+        method: "POST",
+        headers: {
+            "Content-Type": "application/json",
+            Accept: "text/event-stream",
+        },
+        body: payload,
+    });
+
+    const contentType = response.headers.get("Content-Type") || "";
+    if (!response.ok || !contentType.includes("text/event-stream")) {
+        const data = await response.json();
+        throw new Error(data.error || "Failed to submit answer");
+    }
+
+    const questionElement = document.getElementById("current-question-text");
+    let streamedText = "";
+    let completed = false;
+    let audioHandled = false;
+
+    await readEventStream(response, {
+        token: (data) => {
+            if (!streamedText) {
+                hideProcessingOverlay();
+            }
+            streamedText += data.text;
+            questionElement.textContent = streamedText;
+        },
+        reset: () => {
+            streamedText = "";
+            questionElement.textContent = "";
+        },
+        done: (data) => {
+            if (data.completed) {
+                completed = true;
+                return;
+            }
+            currentQuestion = data.question_number;
+            updateProgress();
+            displayQuestion(data.next_question, data.speech_token);
+        },
+        audio: (data) => {
+            audioHandled = true;
+            playTurnAudio(data.audio_url, currentQuestionText);
+        },
+    });
+
+    hideProcessingOverlay();
+    if (completed) {
+        showCompletionScreen();
+        return;
+    }
+    if (!audioHandled) {
+        await generateQuestionAudio(currentQuestionText);
+    }
+    resetForNextQuestion();
+}
+
+// Play the audio returned with a turn, falling back to a separate synthesis
+// request if there is none or it cannot be loaded (e.g. another worker)
+async function playTurnAudio(audioUrl, questionText) {
+    if (audioUrl) {
+        playQuestionAudio(audioUrl, () => {
+            generateQuestionAudio(questionText);
+        });
+    } else {
+        await generateQuestionAudio(questionText);
+    }
+}
+
+function supportsEventStreams() {
+    return (
+        typeof ReadableStream !== "undefined" &&
+        typeof TextDecoder !== "undefined"
+    );
+}
+
+// Parse a text/event-stream response body, dispatching each event's JSON
+// payload to handlers[eventName]
+async function readEventStream(response, handlers) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+
+    const dispatch = (rawEvent) => {
+        let eventName = "message";
+        const dataLines = [];
+        for (const line of rawEvent.split("\n")) {
+            if (line.startsWith("event:")) {
+                eventName = line.slice(6).trim();
+            } else if (line.startsWith("data:")) {
+                dataLines.push(line.slice(5).trim());
+            }
+        }
+        if (dataLines.length && handlers[eventName]) {
+            handlers[eventName](JSON.parse(dataLines.join("\n")));
+        }
+    };
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) {
+            break;
+        }
+        buffer += decoder.decode(value, { stream: true });
+        let boundary;
+        while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+            dispatch(buffer.slice(0, boundary));
+            buffer = buffer.slice(boundary + 2);
+        }
+    }
+    if (buffer.trim()) {
+        dispatch(buffer);
+    }
+}
+
 // Update progress
 function updateProgress() {
     for (let i = 1; i <= 8; i++) {
@@ -323,11 +616,15 @@ async function generateReport() {
 
         const data = await response.json();
 
-        if (data.success) {
-            window.location.href = "/report";
-        } else {
+        if (!data.success) {
             throw new Error(data.error || "Failed to generate report");
         }
+
+        // The report is built by a background job; poll until it is ready
+        await waitForJob(data.status_url, (job) => {
+            button.innerHTML = `<i class="fas fa-spinner fa-spin me-2"></i>Generating... ${job.progress || 0}%`;
+        });
+        window.location.href = "/report";
     } catch (error) {
         console.error("Error generating report:", error);
         showError("Failed to generate report. Please try again.");
@@ -339,6 +636,28 @@ async function generateReport() {
     }
 }
 
+// Poll a background job until it finishes
+async function waitForJob(statusUrl, onProgress, intervalMs = 1000) {
+    while (true) {
+        const response = await fetch(statusUrl);
+        const job = await response.json();
+
+        if (job.error && !job.status) {
+            throw new Error(job.error);
+        }
+        if (onProgress) {
+            onProgress(job);
+        }
+        if (job.status === "done") {
+            return job;
+        }
+        if (job.status === "failed") {
+            throw new Error(job.error || "Job failed");
+        }
+        await new Promise((resolve) => setTimeout(resolve, intervalMs));
+    }
+}
+
 // Error message
 function showError(message) {
     const errorDiv = document.createElement("div");